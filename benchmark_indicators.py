@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the indicator kernels used by the strategies
+"""
+import sys
+import os
+import time
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+import ta
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.strategies import SupertrendIndicator, LayerDynamicGridStrategy
+from modules.indicators import IndicatorGraph, Node, INDICATOR_BACKENDS
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger('benchmark_indicators')
+
+
+def make_candles(n, seed=42, start_price=1.0):
+    """Generate a synthetic OHLCV DataFrame (random walk) with n 15m candles"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.004, n)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.003, n)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(10, 1, n)
+    open_time = pd.date_range('2023-01-01', periods=n, freq='15min')
+
+    return pd.DataFrame({
+        'open_time': open_time,
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume
+    })
+
+
+def legacy_supertrend(df, period=10, multiplier=3.0):
+    """Row-by-row pandas Supertrend loop kept as the reference implementation"""
+    df = df.copy()
+    df['atr'] = ta.volatility.average_true_range(
+        df['high'], df['low'], df['close'], window=period
+    )
+    df['basic_upper'] = (df['high'] + df['low']) / 2 + (multiplier * df['atr'])
+    df['basic_lower'] = (df['high'] + df['low']) / 2 - (multiplier * df['atr'])
+
+    df['supertrend'] = np.nan
+    df['supertrend_direction'] = np.nan
+    df['final_upper'] = np.nan
+    df['final_lower'] = np.nan
+
+    for i in range(period, len(df)):
+        if i == period:
+            df.loc[df.index[i], 'final_upper'] = df['basic_upper'].iloc[i]
+            df.loc[df.index[i], 'final_lower'] = df['basic_lower'].iloc[i]
+
+            if df['close'].iloc[i] <= df['final_upper'].iloc[i]:
+                df.loc[df.index[i], 'supertrend'] = df['final_upper'].iloc[i]
+                df.loc[df.index[i], 'supertrend_direction'] = -1
+            else:
+                df.loc[df.index[i], 'supertrend'] = df['final_lower'].iloc[i]
+                df.loc[df.index[i], 'supertrend_direction'] = 1
+        else:
+            if (df['basic_upper'].iloc[i] < df['final_upper'].iloc[i-1] or
+                df['close'].iloc[i-1] > df['final_upper'].iloc[i-1]):
+                df.loc[df.index[i], 'final_upper'] = df['basic_upper'].iloc[i]
+            else:
+                df.loc[df.index[i], 'final_upper'] = df['final_upper'].iloc[i-1]
+
+            if (df['basic_lower'].iloc[i] > df['final_lower'].iloc[i-1] or
+                df['close'].iloc[i-1] < df['final_lower'].iloc[i-1]):
+                df.loc[df.index[i], 'final_lower'] = df['basic_lower'].iloc[i]
+            else:
+                df.loc[df.index[i], 'final_lower'] = df['final_lower'].iloc[i-1]
+
+            if (df['supertrend'].iloc[i-1] == df['final_upper'].iloc[i-1] and
+                df['close'].iloc[i] <= df['final_upper'].iloc[i]):
+                df.loc[df.index[i], 'supertrend'] = df['final_upper'].iloc[i]
+                df.loc[df.index[i], 'supertrend_direction'] = -1
+            elif (df['supertrend'].iloc[i-1] == df['final_upper'].iloc[i-1] and
+                  df['close'].iloc[i] > df['final_upper'].iloc[i]):
+                df.loc[df.index[i], 'supertrend'] = df['final_lower'].iloc[i]
+                df.loc[df.index[i], 'supertrend_direction'] = 1
+            elif (df['supertrend'].iloc[i-1] == df['final_lower'].iloc[i-1] and
+                  df['close'].iloc[i] >= df['final_lower'].iloc[i]):
+                df.loc[df.index[i], 'supertrend'] = df['final_lower'].iloc[i]
+                df.loc[df.index[i], 'supertrend_direction'] = 1
+            elif (df['supertrend'].iloc[i-1] == df['final_lower'].iloc[i-1] and
+                  df['close'].iloc[i] < df['final_lower'].iloc[i]):
+                df.loc[df.index[i], 'supertrend'] = df['final_upper'].iloc[i]
+                df.loc[df.index[i], 'supertrend_direction'] = -1
+
+    return df
+
+
+def legacy_reversal_patterns(df):
+    """Row-by-row reversal pattern loop kept as the reference implementation"""
+    if len(df) < 5:
+        return pd.Series(0, index=df.index)
+
+    reversal = pd.Series(0, index=df.index)
+
+    for i in range(4, len(df)):
+        curr = df.iloc[i]
+        prev1 = df.iloc[i-1]
+        prev2 = df.iloc[i-2]
+
+        bullish_reversal = False
+        if (curr['close'] > curr['open'] and
+            prev1['close'] < prev1['open'] and
+            curr['close'] > prev1['open'] and
+            curr['open'] < prev1['close']):
+            bullish_reversal = True
+        elif (curr['low'] < curr['open'] and
+              curr['low'] < curr['close'] and
+              (curr['high'] - max(curr['open'], curr['close'])) <
+              (min(curr['open'], curr['close']) - curr['low']) * 2 and
+              (min(curr['open'], curr['close']) - curr['low']) >
+              (curr['high'] - max(curr['open'], curr['close'])) * 3):
+            bullish_reversal = True
+        elif (prev2['low'] > prev1['low'] and
+              prev2['rsi'] < prev1['rsi'] and
+              curr['supertrend_direction'] == 1):
+            bullish_reversal = True
+
+        bearish_reversal = False
+        if (curr['close'] < curr['open'] and
+            prev1['close'] > prev1['open'] and
+            curr['close'] < prev1['open'] and
+            curr['open'] > prev1['close']):
+            bearish_reversal = True
+        elif (curr['high'] > curr['open'] and
+              curr['high'] > curr['close'] and
+              (curr['high'] - max(curr['open'], curr['close'])) >
+              (min(curr['open'], curr['close']) - curr['low']) * 2 and
+              (curr['high'] - max(curr['open'], curr['close'])) >
+              (min(curr['open'], curr['close']) - curr['low']) * 3):
+            bearish_reversal = True
+        elif (prev2['high'] < prev1['high'] and
+              prev2['rsi'] > prev1['rsi'] and
+              curr['supertrend_direction'] == -1):
+            bearish_reversal = True
+
+        if bullish_reversal:
+            reversal.iloc[i] = 1
+        elif bearish_reversal:
+            reversal.iloc[i] = -1
+
+    return reversal
+
+
+def time_call(func, *args, repeat=1):
+    """Return the best wall time of `repeat` calls and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_values(a, b):
+    """Bit-for-bit comparison of two float Series (NaN == NaN)"""
+    a = a.to_numpy(dtype=np.float64)
+    b = b.to_numpy(dtype=np.float64)
+    return a.shape == b.shape and np.array_equal(a.view(np.int64), b.view(np.int64))
+
+
+def report(n, new_time, legacy_time, estimated, identical):
+    """Log one benchmark row"""
+    logger.info(
+        f"{n:>9,} candles | kernel {new_time * 1000:10.2f} ms | "
+        f"legacy {legacy_time * 1000:12.2f} ms{' (est.)' if estimated else '       '} | "
+        f"speedup {legacy_time / new_time:9.1f}x | identical: {identical}"
+    )
+
+
+def time_legacy(func, df, legacy_max):
+    """
+    Time a legacy row loop. The loops are linear in the number of rows, so
+    sizes above legacy_max are timed on a prefix and extrapolated.
+    """
+    n = len(df)
+    legacy_n = min(n, legacy_max)
+    legacy_time, result = time_call(func, df.iloc[:legacy_n])
+    estimated = legacy_n < n
+    if estimated:
+        legacy_time = legacy_time * n / legacy_n
+    return legacy_time, estimated, result
+
+
+def benchmark_supertrend(sizes, legacy_max):
+    """Compare the array Supertrend kernel against the row-by-row pandas loop"""
+    logger.info("=== Supertrend ===")
+    columns = ['supertrend', 'supertrend_direction', 'final_upper', 'final_lower']
+    indicator = SupertrendIndicator()
+
+    for n in sizes:
+        df = make_candles(n)
+        repeat = 5 if n <= 10000 else 1
+        kernel_time, kernel_df = time_call(lambda: indicator.calculate(df.copy()), repeat=repeat)
+
+        legacy_time, estimated, legacy_df = time_legacy(legacy_supertrend, df, legacy_max)
+
+        identical = all(
+            same_values(kernel_df[col].iloc[:len(legacy_df)], legacy_df[col]) for col in columns
+        )
+        report(n, kernel_time, legacy_time, estimated, identical)
+
+
+def benchmark_reversal(sizes, legacy_max):
+    """Compare the shifted-array reversal detector against the row-by-row loop"""
+    logger.info("=== Reversal patterns ===")
+    strategy = LayerDynamicGridStrategy()
+
+    for n in sizes:
+        df = make_candles(n)
+        df['rsi'] = ta.momentum.rsi(df['close'], window=strategy.rsi_period)
+        df = SupertrendIndicator(strategy.supertrend_period, strategy.supertrend_multiplier).calculate(df)
+
+        repeat = 5 if n <= 10000 else 1
+        new_time, reversal = time_call(strategy.detect_reversal_patterns, df, repeat=repeat)
+        legacy_time, estimated, legacy_reversal = time_legacy(legacy_reversal_patterns, df, legacy_max)
+
+        identical = (reversal.dtype == legacy_reversal.dtype and
+                     reversal.iloc[:len(legacy_reversal)].equals(legacy_reversal))
+        report(n, new_time, legacy_time, estimated, identical)
+
+
+def ta_reference(df):
+    """The indicators used by the strategies, computed with the ta package"""
+    close, high, low = df['close'], df['high'], df['low']
+    adx = ta.trend.ADXIndicator(high, low, close, window=14)
+    bollinger = ta.volatility.BollingerBands(close, window=20, window_dev=2)
+    return {
+        'ema': (Node('ema', source='close', span=21), None, ta.trend.ema_indicator(close, window=21)),
+        'sma': (Node('sma', source='volume', window=20), None, ta.trend.sma_indicator(df['volume'], window=20)),
+        'rsi': (Node('rsi', window=14), None, ta.momentum.rsi(close, window=14)),
+        'atr': (Node('atr', window=20), None, ta.volatility.average_true_range(high, low, close, window=20)),
+        'adx': (Node('adx', window=14), 'adx', adx.adx()),
+        '+di': (Node('adx', window=14), 'di_plus', adx.adx_pos()),
+        '-di': (Node('adx', window=14), 'di_minus', adx.adx_neg()),
+        'bollinger': (Node('bollinger', window=20, window_dev=2), 'upper', bollinger.bollinger_hband()),
+        'macd': (Node('macd', fast=12, slow=26), None, ta.trend.macd(close, window_slow=26, window_fast=12)),
+        'macd signal': (Node('macd_signal', fast=12, slow=26, signal=9), None,
+                        ta.trend.macd_signal(close, window_slow=26, window_fast=12, window_sign=9)),
+    }
+
+
+def max_scaled_error(values, reference):
+    """Largest absolute difference relative to the reference's largest magnitude, inf if the NaNs differ"""
+    values = np.asarray(values, dtype=np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    if not np.array_equal(np.isnan(values), np.isnan(reference)):
+        return float('inf')
+    valid = ~np.isnan(reference)
+    scale = np.max(np.abs(reference[valid])) if valid.any() else 0.0
+    if scale == 0:
+        return float(np.max(np.abs(values[valid]), initial=0.0))
+    return float(np.max(np.abs(values[valid] - reference[valid])) / scale)
+
+
+def benchmark_backends(sizes, legacy_max, tolerance=1e-9):
+    """
+    Time every indicator on both IndicatorGraph backends and check the NumPy
+    backend against the ta package (on the first legacy_max candles, since
+    the ta package's ADX is a row loop)
+    """
+    logger.info("=== Indicator backends ===")
+    for n in sizes:
+        df = make_candles(n)
+        check_df = df.iloc[:min(n, legacy_max)]
+        references = ta_reference(check_df)
+        repeat = 5 if n <= 10000 else 1
+        total = {backend: 0.0 for backend in INDICATOR_BACKENDS}
+
+        for name, (node, key, reference) in references.items():
+            times = {}
+            for backend in INDICATOR_BACKENDS:
+                times[backend], _ = time_call(lambda: IndicatorGraph(df, backend).get(node), repeat=repeat)
+                total[backend] += times[backend]
+
+            result = IndicatorGraph(check_df, 'numpy').get(node)
+            error = max_scaled_error(result[key] if key else result, reference)
+            logger.info(
+                f"{n:>9,} candles | {name:<11} | ta {times['ta'] * 1000:10.2f} ms | "
+                f"numpy {times['numpy'] * 1000:9.2f} ms | speedup {times['ta'] / times['numpy']:7.1f}x | "
+                f"error vs ta {error:.1e} {'ok' if error <= tolerance else 'MISMATCH'}"
+            )
+        logger.info(
+            f"{n:>9,} candles | {'total':<11} | ta {total['ta'] * 1000:10.2f} ms | "
+            f"numpy {total['numpy'] * 1000:9.2f} ms | speedup {total['ta'] / total['numpy']:7.1f}x"
+        )
+
+
+def frame_bytes(df):
+    """Deep memory usage of a frame (index included)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def benchmark_memory(sizes):
+    """Bytes per candle of the indicator frame before and after compact_frame"""
+    logger.info("=== Indicator frame memory ===")
+    strategy = LayerDynamicGridStrategy()
+
+    for n in sizes:
+        # Frames built from raw klines carry the string kline fields as well
+        candles = make_candles(n)
+        open_ms = candles['open_time'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+        klines = [
+            [t, str(o), str(h), str(l), str(c), str(v), t + 899999, '0', 0, '0', '0', '0']
+            for t, o, h, l, c, v in zip(open_ms, candles['open'], candles['high'],
+                                        candles['low'], candles['close'], candles['volume'])
+        ]
+        df = strategy.add_indicators(strategy.prepare_data(klines))
+        compact = strategy.compact_frame(df)
+
+        full_size = frame_bytes(df) / n
+        compact_size = frame_bytes(compact) / n
+        logger.info(
+            f"{n:>9,} candles | full {full_size:8.1f} B/candle ({len(df.columns)} columns) | "
+            f"compact {compact_size:8.1f} B/candle ({len(compact.columns)} columns) | "
+            f"saved {1 - compact_size / full_size:6.1%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark indicator kernels')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[200, 10000, 1000000],
+                        help='Candle counts to benchmark (e.g., 200 10000 1000000)')
+    parser.add_argument('--legacy-max', type=int, default=10000,
+                        help='Largest candle count the legacy loops run on before extrapolating')
+    args = parser.parse_args()
+
+    benchmark_supertrend(args.sizes, args.legacy_max)
+    benchmark_reversal(args.sizes, args.legacy_max)
+    benchmark_backends(args.sizes, args.legacy_max)
+    benchmark_memory(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,14 +15,26 @@ from pathlib import Path
 # Import our modules
 from modules.binance_client import BinanceClient
 from modules.risk_manager import RiskManager
-from modules.strategies import get_strategy
+from modules.strategies import get_strategy, StrategyPool
+from modules.kline_store import KlineBuffer
+from modules.kline_cache import KlineCache
 from modules.backtest import Backtester
 from modules.websocket_handler import BinanceWebSocketManager
+from modules.grid_executor import GridExecutor, GRID_EXECUTION_MODES
+from modules.shadow import ShadowRunner, load_variants
+from modules.sweep import ParameterSweep, SuccessiveHalving, WalkForward, load_sweep_spec
 from modules.config import (
     TRADING_SYMBOL, TIMEFRAME, STRATEGY, LOG_LEVEL,
     USE_TELEGRAM, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
     SEND_DAILY_REPORT, DAILY_REPORT_TIME, AUTO_COMPOUND,
     MULTI_INSTANCE_MODE, MAX_POSITIONS_PER_SYMBOL,
+    USE_STREAMING_INDICATORS, STREAMING_DRIFT_CHECK_INTERVAL, USE_TICK_TRIGGERS,
+    COMPACT_INDICATORS, RESAMPLE_HISTORY_CANDLES,
+    SHADOW_VARIANTS_FILE, SHADOW_WORKERS,
+    USE_KLINE_CACHE, KLINE_CACHE_DIR, KLINE_CACHE_OFFLINE,
+    WALK_FORWARD_SPEC, WALK_FORWARD_PERIOD, WALK_FORWARD_TRAIN_DAYS, WALK_FORWARD_TEST_DAYS,
+    WALK_FORWARD_WORKERS,
+    GRID_EXECUTION_MODE,
     # Add these to your config.py:
     # BACKTEST_BEFORE_LIVE = True
     # BACKTEST_MIN_PROFIT_PCT = 5.0
@@ -80,8 +92,13 @@ binance_client = None
 risk_manager = None
 strategy = None
 websocket_manager = None
-klines_data = {}
+grid_executor = None  # GridExecutor when grid levels rest on the exchange (GRID_EXECUTION_MODE=limit)
+shadow_runner = None  # ShadowRunner paper-trading strategy variants on the live candles
+klines_data = {}  # symbol -> KlineBuffer of the latest 200 candles
 new_candle_received = {}
+closed_candle_count = {}
+pending_triggers = {}  # symbol -> intrabar trigger crossing waiting for execution
+backtest_strategies = StrategyPool()  # Strategies reused by run_backtest calls (e.g. backtest_all_coins.py)
 stats = {
     'total_trades': 0,
     'winning_trades': 0,
@@ -173,7 +190,7 @@ class TelegramNotifier:
 
 def setup():
     """Initialize the trading bot"""
-    global binance_client, risk_manager, strategy, stats, websocket_manager
+    global binance_client, risk_manager, strategy, stats, websocket_manager, grid_executor, shadow_runner
     
     logger.info("Setting up trading bot...")
     
@@ -202,6 +219,26 @@ def setup():
     strategy.set_risk_manager(risk_manager)
     logger.info(f"Connected risk manager to strategy for adaptive risk management")
     
+    # Smaller indicator frames (float32 oscillators, int8 flags, no intermediate columns)
+    if COMPACT_INDICATORS and hasattr(strategy, 'compact_indicators'):
+        strategy.compact_indicators = True
+    
+    # Paper-trade strategy variants on the same closed candles
+    if SHADOW_VARIANTS_FILE:
+        try:
+            shadow_runner = ShadowRunner(load_variants(SHADOW_VARIANTS_FILE),
+                                         workers=SHADOW_WORKERS or os.cpu_count() or 1)
+        except Exception as e:
+            logger.error(f"Could not start shadow variants from {SHADOW_VARIANTS_FILE}: {e}")
+    
+    # Keep grid levels resting on the exchange instead of polling for grid signals
+    if GRID_EXECUTION_MODE not in GRID_EXECUTION_MODES:
+        logger.warning(f"Unknown grid execution mode {GRID_EXECUTION_MODE}. Using market orders.")
+    elif GRID_EXECUTION_MODE == 'limit' and hasattr(strategy, 'resting_grid_orders'):
+        strategy.resting_grid_orders = True
+        grid_executor = GridExecutor(binance_client, TRADING_SYMBOL, grid_order_quantity)
+        logger.info("Grid levels will rest on the exchange as limit orders")
+    
     # Initialize futures settings for the trading symbol
     try:
         binance_client.initialize_futures(TRADING_SYMBOL)
@@ -220,6 +257,8 @@ def setup():
     websocket_manager.register_callback('account_update', on_account_update)
     websocket_manager.register_callback('order_update', on_order_update)
     websocket_manager.register_callback('trade', on_trade)
+    if USE_TICK_TRIGGERS:
+        websocket_manager.register_callback('price_trigger', on_price_trigger)
     
     # Start WebSocket connections
     websocket_manager.start()
@@ -357,44 +396,75 @@ def initialize_klines_data(timeframe=None):
             logger.warning(f"Not enough historical data to initialize (got {len(klines) if klines else 0} candles)")
             return
             
-        klines_data[TRADING_SYMBOL] = klines
+        klines_data[TRADING_SYMBOL] = KlineBuffer.from_klines(klines, capacity=200)
         logger.info(f"Initialized historical data with {len(klines)} candles using timeframe {tf}")
+        
+        # Seed the 1m resampler with one history download (the last candle is still open)
+        if websocket_manager is not None and websocket_manager.resample:
+            minute_klines = binance_client.get_historical_klines(
+                symbol=TRADING_SYMBOL,
+                interval='1m',
+                start_str=f"{RESAMPLE_HISTORY_CANDLES} minutes ago UTC",
+                limit=1000
+            )
+            resampler = websocket_manager.get_resampler(TRADING_SYMBOL)
+            if minute_klines:
+                resampler.extend(minute_klines[:-1])
+                resampler.update(minute_klines[-1], closed=False)
+            if hasattr(strategy, 'candle_resampler'):
+                strategy.candle_resampler = resampler
+            logger.info(f"Resampling {', '.join(resampler.timeframes)} candles from "
+                        f"{len(minute_klines) if minute_klines else 0} 1m candles")
+        
+        # Shadow variants start from the closed candles (the last one is still open)
+        if shadow_runner is not None:
+            shadow_runner.seed(list(klines_data[TRADING_SYMBOL])[:-1])
+        
+        # Seed the streaming indicators so closed candles only need an O(1) update
+        if USE_STREAMING_INDICATORS and hasattr(strategy, 'seed_indicator_engine'):
+            strategy.seed_indicator_engine(klines_data[TRADING_SYMBOL])
+        elif hasattr(strategy, 'session_vwap'):
+            strategy.session_vwap.seed(strategy.prepare_data(klines_data[TRADING_SYMBOL]))
     except Exception as e:
         logger.error(f"Error initializing klines data: {e}")
 
 
 def on_kline_closed(symbol, kline_data):
     """Callback for when a kline (candlestick) closes"""
-    global klines_data, new_candle_received
+    global klines_data, new_candle_received, closed_candle_count
     
     logger.info(f"Kline closed for {symbol}: {kline_data['close_time']}")
     
     try:
-        candle = [
-            kline_data['open_time'],
-            str(kline_data['open']),
-            str(kline_data['high']),
-            str(kline_data['low']),
-            str(kline_data['close']),
-            str(kline_data['volume']),
-            kline_data['close_time'],
-            "0",
-            "0",
-            "0",
-            "0",
-            "0"
-        ]
-        
-        if symbol in klines_data:
-            klines_data[symbol].append(candle)
-            if len(klines_data[symbol]) > 200:
-                klines_data[symbol].pop(0)
-        else:
-            klines_data[symbol] = [candle]
+        if symbol not in klines_data:
+            klines_data[symbol] = KlineBuffer(capacity=200)
+        # Replaces the in-progress copy of this candle, otherwise appends it
+        klines_data[symbol].upsert(kline_data)
+            
+        if getattr(strategy, 'indicator_engine', None) is not None:
+            latest = strategy.update_indicator_engine(klines_data[symbol][-1])
+            if latest:
+                logger.info(f"Streaming indicators for {symbol}: RSI {latest['rsi']:.2f} | ADX {latest['adx']:.2f} | "
+                            f"VWAP {latest['vwap']:.4f} | {latest['market_condition']}")
+            
+            # Periodically compare against a full recalculation
+            closed_candle_count[symbol] = closed_candle_count.get(symbol, 0) + 1
+            if STREAMING_DRIFT_CHECK_INTERVAL > 0 and closed_candle_count[symbol] % STREAMING_DRIFT_CHECK_INTERVAL == 0:
+                strategy.check_indicator_drift(klines_data[symbol])
+        elif hasattr(strategy, 'session_vwap'):
+            vwap = strategy.session_vwap.update(kline_data['open_time'], kline_data['close'], kline_data['volume'])
+            logger.info(f"Session VWAP for {symbol}: {vwap}")
             
         new_candle_received[symbol] = True
         check_for_signals(symbol)
         
+        if shadow_runner is not None and symbol == TRADING_SYMBOL:
+            shadow_runner.on_kline_closed(klines_data[symbol][-1])
+            for rank, variant in enumerate(shadow_runner.leaderboard(3), 1):
+                logger.info(f"Shadow #{rank} {variant['name']}: equity {variant['equity']:.2f} | "
+                            f"{variant['trades']} trades | win rate {variant['win_rate']:.1f}% | "
+                            f"position {variant['position'] or 'flat'}")
+        
     except Exception as e:
         logger.error(f"Error processing kline close: {e}")
 
@@ -415,23 +485,10 @@ def on_kline_update(symbol, kline_data):
     # Store data for later use
     global klines_data
     if symbol in klines_data and klines_data[symbol]:
-        # Update the latest candle with real-time data until it's closed
-        if not kline_data['is_closed'] and len(klines_data[symbol]) > 0:
-            candle = [
-                kline_data['open_time'],
-                str(kline_data['open']),
-                str(kline_data['high']),
-                str(kline_data['low']),
-                str(kline_data['close']),
-                str(kline_data['volume']),
-                kline_data['close_time'],
-                "0",
-                "0",
-                "0",
-                "0",
-                "0"
-            ]
-            klines_data[symbol][-1] = candle
+        # Update the latest candle in place until it's closed; the first
+        # update of a new candle is appended after the closed one
+        if not kline_data['is_closed']:
+            klines_data[symbol].upsert(kline_data)
 
 
 def on_book_ticker(symbol, ticker_data):
@@ -484,6 +541,14 @@ def on_trade(symbol, trade_data):
         logger.info(f"💰 Large {side} Trade | {symbol} | Price: {price:.2f} | Qty: {qty:.4f} | Value: ${value:.2f} | {trade_time}")
 
 
+def on_price_trigger(symbol, trigger):
+    """Callback for an intrabar crossing of a published trigger price"""
+    # Runs on the WebSocket thread - only schedule, the main loop executes it
+    pending_triggers[symbol] = trigger
+    logger.info(f"⚡ {symbol} {trigger['side']} trigger at {trigger['price']} "
+                f"(level {trigger['trigger_price']:.6f}) scheduled")
+
+
 def on_account_update(balance_updates, position_updates):
     """Callback for account updates"""
     global stats
@@ -529,12 +594,21 @@ def on_order_update(order_data):
     global stats
     
     try:
+        # Mark filled grid levels as triggered; a filled grid order is a trade
+        # like a market entry (stats, trade record, protective orders)
+        grid_fill = None
+        if grid_executor is not None:
+            grid_fill = grid_executor.on_order_update(order_data)
+        
         symbol = order_data['symbol']
         status = order_data['order_status']
         side = order_data['side']
         order_type = order_data['type']
         filled_qty = order_data['filled_quantity']
         price = order_data['last_filled_price']
+        if grid_fill:
+            filled_qty = float(grid_fill['quantity'])
+            price = float(grid_fill['price'])
         
         # Create a more visually informative log message
         if status == 'FILLED':
@@ -561,7 +635,7 @@ def on_order_update(order_data):
                 logger.info(f"✅✅✅ EXECUTED {order_type} {side} ORDER: {filled_qty} {symbol} @ {price} ✅✅✅")
                 
             # For filled orders, update trade statistics
-            if order_type == 'MARKET':
+            if order_type == 'MARKET' or grid_fill:
                 stats['total_trades'] += 1
                 stats['last_trade_time'] = datetime.now()
                 
@@ -597,11 +671,14 @@ def on_order_update(order_data):
                     'balance': stats['current_balance'],
                     'market_condition': market_condition,
                     'strategy': strategy_name,
-                    'execution_type': order_type
+                    'execution_type': 'GRID_LIMIT' if grid_fill else order_type
                 }
                 
                 save_trade(trade_data)
                 
+                if grid_fill:
+                    protect_grid_position(symbol, grid_fill)
+                
                 # Show current account balance after trade
                 current_balance = stats['current_balance']
                 try:
@@ -696,8 +773,97 @@ def on_order_update(order_data):
         logger.error(traceback.format_exc())
 
 
-def check_for_signals(symbol=None):
-    """Check for trading signals and execute trades"""
+def place_protective_orders(symbol, position, current_price):
+    """
+    Place the volatility-based stop loss and the partial take profits (or a
+    single take profit if those fail) covering the whole of `position`
+    
+    Args:
+        symbol: Trading symbol
+        position: Position from get_position_info (amount > 0 long, < 0 short)
+        current_price: Entry price used when the position reports none
+    """
+    side = "BUY" if position['position_amount'] > 0 else "SELL"
+    close_side = "SELL" if side == "BUY" else "BUY"
+    quantity = abs(position['position_amount'])
+    entry_price = float(position.get('entry_price', current_price))
+    
+    # Get recent klines for volatility calculation
+    recent_klines = klines_data[symbol].window(30) if klines_data.get(symbol) else None
+    
+    # Place protective stop loss using volatility-based calculation
+    stop_loss_price = risk_manager.calculate_volatility_based_stop_loss(
+        symbol, side, entry_price, recent_klines
+    )
+    
+    if stop_loss_price:
+        sl_order = binance_client.place_stop_loss_order(
+            symbol, close_side, quantity, stop_loss_price
+        )
+        if sl_order:
+            logger.info(f"✅ Volatility-based stop loss placed at {stop_loss_price}")
+        else:
+            logger.error(f"❌ Failed to place stop loss at {stop_loss_price}")
+    
+    # Place partial take profits instead of a single take profit
+    tp_orders = place_partial_take_profits(
+        symbol, side, quantity, entry_price, position
+    )
+    
+    if tp_orders:
+        logger.info(f"✅ Successfully placed {len(tp_orders)} partial take profit orders")
+    else:
+        # Fallback to regular take profit if partial TP failed
+        logger.warning("⚠️ Partial take profits failed, trying regular take profit")
+        take_profit_price = risk_manager.calculate_take_profit(symbol, side, entry_price)
+        if take_profit_price:
+            tp_order = binance_client.place_take_profit_order(
+                symbol, close_side, quantity, take_profit_price
+            )
+            if tp_order:
+                logger.info(f"✅ Take profit placed at {take_profit_price}")
+            else:
+                logger.error(f"❌ Failed to place take profit at {take_profit_price}")
+
+
+def protect_grid_position(symbol, fill):
+    """
+    Replace the stop loss and take profits after a resting grid order filled,
+    so they cover the position as it is now (opened, grown, reduced or closed)
+    
+    Args:
+        symbol: Trading symbol
+        fill: Fill details from GridExecutor.on_order_update
+    """
+    cancelled = binance_client.cancel_position_orders(symbol)
+    if cancelled:
+        logger.info(f"Cancelled {cancelled} protective orders sized for the previous position")
+    
+    position = binance_client.get_position_info(symbol)
+    if not position or abs(position['position_amount']) < 0.000001:
+        logger.info(f"Grid fill closed the {symbol} position, no protective orders needed")
+        return
+    
+    logger.info(f"Protecting {symbol} position of {position['position_amount']} after grid fill")
+    place_protective_orders(symbol, position, float(fill['price']))
+
+
+def grid_order_quantity(side, price):
+    """Quantity of one resting grid level: the risk-based position size spread over the grid levels"""
+    stop_loss_price = risk_manager.calculate_stop_loss(TRADING_SYMBOL, side, price)
+    quantity = risk_manager.calculate_position_size(TRADING_SYMBOL, side, price, stop_loss_price)
+    return round_quantity(quantity / max(1, strategy.grid_levels), TRADING_SYMBOL)
+
+
+def check_for_signals(symbol=None, trigger=None):
+    """
+    Check for trading signals and execute trades
+    
+    Args:
+        symbol: Trading symbol (defaults to TRADING_SYMBOL)
+        trigger: Intrabar trigger crossing from on_price_trigger; acts on the
+            trigger's side without waiting for a new candle
+    """
     global klines_data, new_candle_received
     
     if not symbol:
@@ -708,21 +874,25 @@ def check_for_signals(symbol=None):
         logger.warning(f"Ignoring signal check for {symbol} - this instance is dedicated to {TRADING_SYMBOL}")
         return
     
-    if not new_candle_received.get(symbol, False):
-        return
-    
-    new_candle_received[symbol] = False
+    if trigger is None:
+        if not new_candle_received.get(symbol, False):
+            return
+        
+        new_candle_received[symbol] = False
     
     logger.info(f"Checking for trading signals for {symbol}")
     
     try:
-        klines = klines_data.get(symbol, [])
+        klines = klines_data.get(symbol)
         
         if not klines or len(klines) < 30:
             logger.warning(f"Not enough historical data to generate signals (got {len(klines) if klines else 0} candles)")
             return
             
-        current_price = websocket_manager.get_last_kline(symbol).get('close', None)
+        if trigger is not None:
+            current_price = trigger['price']
+        else:
+            current_price = websocket_manager.get_last_kline(symbol).get('close', None)
         if not current_price:
             logger.error("Failed to get current price from WebSocket")
             return
@@ -734,8 +904,20 @@ def check_for_signals(symbol=None):
         
         logger.info(f"Current position amount: {position_amount}")
         
-        signal = strategy.get_signal(klines)
-        logger.info(f"Strategy signal: {signal}")
+        if trigger is not None:
+            signal = strategy.confirm_trigger(trigger['side'], trigger['price'])
+            logger.info(f"Intrabar trigger signal: {signal}")
+        else:
+            signal = strategy.get_signal(klines)
+            logger.info(f"Strategy signal: {signal}")
+            
+            # Publish the next trigger prices for tick-level checks until the next close
+            if USE_TICK_TRIGGERS and getattr(strategy, 'trigger_prices', None):
+                websocket_manager.set_trigger_prices(symbol, **strategy.trigger_prices)
+            
+            # Replace only the resting grid orders whose levels changed
+            if grid_executor is not None:
+                grid_executor.sync(strategy.grids)
         
         # Verify bot status before proceeding with trades
         if not binance_client:
@@ -807,44 +989,7 @@ def check_for_signals(symbol=None):
                     if new_position and new_position['position_amount'] > 0:
                         logger.info(f"Position verification successful. Amount: {new_position['position_amount']}")
                         
-                        entry_price = float(new_position.get('entry_price', current_price))
-                        
-                        # Get recent klines for volatility calculation
-                        recent_klines = klines_data.get(symbol, [])[-30:] if klines_data.get(symbol) else None
-                        
-                        # Place protective stop loss using volatility-based calculation
-                        stop_loss_price = risk_manager.calculate_volatility_based_stop_loss(
-                            symbol, "BUY", entry_price, recent_klines
-                        )
-                        
-                        if stop_loss_price:
-                            sl_order = binance_client.place_stop_loss_order(
-                                symbol, "SELL", new_position['position_amount'], stop_loss_price
-                            )
-                            if sl_order:
-                                logger.info(f"✅ Volatility-based stop loss placed at {stop_loss_price}")
-                            else:
-                                logger.error(f"❌ Failed to place stop loss at {stop_loss_price}")
-                        
-                        # Place partial take profits instead of a single take profit
-                        tp_orders = place_partial_take_profits(
-                            symbol, "BUY", new_position['position_amount'], entry_price, new_position
-                        )
-                        
-                        if tp_orders:
-                            logger.info(f"✅ Successfully placed {len(tp_orders)} partial take profit orders")
-                        else:
-                            # Fallback to regular take profit if partial TP failed
-                            logger.warning("⚠️ Partial take profits failed, trying regular take profit")
-                            take_profit_price = risk_manager.calculate_take_profit(symbol, "BUY", entry_price)
-                            if take_profit_price:
-                                tp_order = binance_client.place_take_profit_order(
-                                    symbol, "SELL", new_position['position_amount'], take_profit_price
-                                )
-                                if tp_order:
-                                    logger.info(f"✅ Take profit placed at {take_profit_price}")
-                                else:
-                                    logger.error(f"❌ Failed to place take profit at {take_profit_price}")
+                        place_protective_orders(symbol, new_position, current_price)
                     else:
                         logger.warning("⚠️ Position verification failed after BUY order. Check position manually.")
                 else:
@@ -914,44 +1059,7 @@ def check_for_signals(symbol=None):
                     if new_position and new_position['position_amount'] < 0:
                         logger.info(f"Position verification successful. Amount: {new_position['position_amount']}")
                         
-                        entry_price = float(new_position.get('entry_price', current_price))
-                        
-                        # Get recent klines for volatility calculation
-                        recent_klines = klines_data.get(symbol, [])[-30:] if klines_data.get(symbol) else None
-                        
-                        # Place protective stop loss using volatility-based calculation
-                        stop_loss_price = risk_manager.calculate_volatility_based_stop_loss(
-                            symbol, "SELL", entry_price, recent_klines
-                        )
-                        
-                        if stop_loss_price:
-                            sl_order = binance_client.place_stop_loss_order(
-                                symbol, "BUY", abs(new_position['position_amount']), stop_loss_price
-                            )
-                            if sl_order:
-                                logger.info(f"✅ Volatility-based stop loss placed at {stop_loss_price}")
-                            else:
-                                logger.error(f"❌ Failed to place stop loss at {stop_loss_price}")
-                        
-                        # Place partial take profits instead of a single take profit
-                        tp_orders = place_partial_take_profits(
-                            symbol, "SELL", abs(new_position['position_amount']), entry_price, new_position
-                        )
-                        
-                        if tp_orders:
-                            logger.info(f"✅ Successfully placed {len(tp_orders)} partial take profit orders")
-                        else:
-                            # Fallback to regular take profit if partial TP failed
-                            logger.warning("⚠️ Partial take profits failed, trying regular take profit")
-                            take_profit_price = risk_manager.calculate_take_profit(symbol, "SELL", entry_price)
-                            if take_profit_price:
-                                tp_order = binance_client.place_take_profit_order(
-                                    symbol, "BUY", abs(new_position['position_amount']), take_profit_price
-                                )
-                                if tp_order:
-                                    logger.info(f"✅ Take profit placed at {take_profit_price}")
-                                else:
-                                    logger.error(f"❌ Failed to place take profit at {take_profit_price}")
+                        place_protective_orders(symbol, new_position, current_price)
                     else:
                         logger.warning("⚠️ Position verification failed after SELL order. Check position manually.")
                 else:
@@ -1256,6 +1364,14 @@ def handle_exit(signal, frame):
     except Exception as e:
         logger.error(f"Failed to send stop notification: {e}")
     
+    # Don't leave grid orders resting unattended
+    if grid_executor is not None:
+        cancelled = grid_executor.cancel_all()
+        logger.info(f"Cancelled {cancelled} resting grid orders")
+    
+    if shadow_runner is not None:
+        shadow_runner.stop()
+    
     if websocket_manager:
         websocket_manager.stop()
         logger.info("WebSocket connections closed")
@@ -1346,76 +1462,117 @@ def load_state():
     return None
 
 
-def run_backtest(symbol, timeframe, strategy_name, start_date, end_date=None, save_results=True):
-    """Run backtest using historical data"""
-    logger.info(f"Starting backtest for {symbol} with {strategy_name} strategy")
+def fetch_backtest_klines(symbol, timeframe, start_date, end_date=None, base_timeframe=None):
+    """
+    Download the kline history for a backtest
     
-    try:
-        binance = BinanceClient()
+    With USE_KLINE_CACHE the candles come from the local KlineCache, which
+    downloads only the ranges it does not hold yet (none for a warm cache,
+    so no API client is created).
+    
+    Args:
+        start_date: YYYY-MM-DD or a relative date such as "30 days ago"
+        base_timeframe: Download this timeframe instead of `timeframe` (resampled later)
+    
+    Returns:
+        tuple: (klines (a KlineWindow when cached) or None if the download
+        failed or is too short, backtest start date as YYYY-MM-DD)
+    """
+    binance = None
+    
+    def download(start_str, end_str):
+        nonlocal binance
+        if binance is None:
+            binance = BinanceClient()
+        return binance.get_historical_klines(
+            symbol=symbol,
+            interval=base_timeframe or timeframe,
+            start_str=start_str,
+            end_str=end_str,
+            limit=1000
+        )
+    
+    # Handle relative date strings like "30 days" or "1 year ago"
+    if isinstance(start_date, str) and any(word in start_date for word in ['day', 'week', 'month', 'year']):
+        # For Binance API, we can use relative dates directly
+        api_start_date = start_date
         
-        # Handle relative date strings like "30 days" or "1 year ago"
-        if isinstance(start_date, str) and any(word in start_date for word in ['day', 'week', 'month', 'year']):
-            # For Binance API, we can use relative dates directly
-            api_start_date = start_date
-            
-            # For the Backtester, convert to YYYY-MM-DD format
-            # Extract the numeric value and time unit
-            parts = start_date.split()
-            
-            # Default values
-            num = 30  # Default to 30 days if parsing fails
-            unit = 'days'
+        # For the Backtester, convert to YYYY-MM-DD format
+        # Extract the numeric value and time unit
+        parts = start_date.split()
+        
+        # Default values
+        num = 30  # Default to 30 days if parsing fails
+        unit = 'days'
+        
+        if len(parts) >= 2 and parts[0].isdigit():
+            num = int(parts[0])
+            unit = parts[1].lower()
             
-            if len(parts) >= 2 and parts[0].isdigit():
-                num = int(parts[0])
-                unit = parts[1].lower()
-                
-                # Calculate actual date
-                if unit.startswith('day'):
-                    backtest_start_date = (datetime.now() - timedelta(days=num)).strftime('%Y-%m-%d')
-                elif unit.startswith('week'):
-                    backtest_start_date = (datetime.now() - timedelta(weeks=num)).strftime('%Y-%m-%d')
-                elif unit.startswith('month'):
-                    backtest_start_date = (datetime.now() - timedelta(days=num*30)).strftime('%Y-%m-%d')
-                elif unit.startswith('year'):
-                    backtest_start_date = (datetime.now() - timedelta(days=num*365)).strftime('%Y-%m-%d')
-                else:
-                    # Default fallback
-                    backtest_start_date = (datetime.now() - timedelta(days=num)).strftime('%Y-%m-%d')
+            # Calculate actual date
+            if unit.startswith('day'):
+                backtest_start_date = (datetime.now() - timedelta(days=num)).strftime('%Y-%m-%d')
+            elif unit.startswith('week'):
+                backtest_start_date = (datetime.now() - timedelta(weeks=num)).strftime('%Y-%m-%d')
+            elif unit.startswith('month'):
+                backtest_start_date = (datetime.now() - timedelta(days=num*30)).strftime('%Y-%m-%d')
+            elif unit.startswith('year'):
+                backtest_start_date = (datetime.now() - timedelta(days=num*365)).strftime('%Y-%m-%d')
             else:
-                # Default fallback if we can't parse the input
-                backtest_start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-                logger.warning(f"Couldn't parse date format '{start_date}', using past 30 days as default")
+                # Default fallback
+                backtest_start_date = (datetime.now() - timedelta(days=num)).strftime('%Y-%m-%d')
         else:
-            # If it's already in YYYY-MM-DD format, use it directly for both
-            api_start_date = start_date
-            backtest_start_date = start_date
-            
-        logger.info(f"Fetching historical data from: {api_start_date} (as {backtest_start_date})")
-        logger.info(f"Using {symbol} on {timeframe} timeframe")
+            # Default fallback if we can't parse the input
+            backtest_start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            logger.warning(f"Couldn't parse date format '{start_date}', using past 30 days as default")
+    else:
+        # If it's already in YYYY-MM-DD format, use it directly for both
+        api_start_date = start_date
+        backtest_start_date = start_date
         
-        try:
+    logger.info(f"Fetching historical data from: {api_start_date} (as {backtest_start_date})")
+    logger.info(f"Using {symbol} on {timeframe} timeframe")
+    
+    try:
+        if USE_KLINE_CACHE:
+            cache = KlineCache(KLINE_CACHE_DIR, offline=KLINE_CACHE_OFFLINE)
+            klines = cache.get(symbol, base_timeframe or timeframe, api_start_date, end_date or None,
+                               fetch=download)
+        else:
             logger.info("Starting historical data request - this may take some time...")
-            klines = binance.get_historical_klines(
-                symbol=symbol,
-                interval=timeframe,
-                start_str=api_start_date,
-                end_str=end_date,
-                limit=1000
-            )
-            logger.info(f"Successfully retrieved {len(klines)} historical candles")
-        except Exception as api_error:
-            logger.error(f"API Error fetching klines: {api_error}")
-            logger.error(f"Detailed error: {traceback.format_exc()}")
+            klines = download(api_start_date, end_date)
+        logger.info(f"Successfully retrieved {len(klines)} historical candles")
+    except Exception as api_error:
+        logger.error(f"API Error fetching klines: {api_error}")
+        logger.error(f"Detailed error: {traceback.format_exc()}")
+        return None, backtest_start_date
+    
+    if klines is None or len(klines) < 100:
+        logger.error(f"Not enough historical data for backtest. Got {len(klines) if klines is not None else 0} candles.")
+        return None, backtest_start_date
+    
+    return klines, backtest_start_date
+
+
+def run_backtest(symbol, timeframe, strategy_name, start_date, end_date=None, save_results=True, engine=None,
+                 base_timeframe=None):
+    """
+    Run backtest using historical data
+    
+    With `base_timeframe` (e.g. '1m'), that history is downloaded once and
+    resampled to `timeframe` locally.
+    """
+    logger.info(f"Starting backtest for {symbol} with {strategy_name} strategy")
+    
+    try:
+        klines, backtest_start_date = fetch_backtest_klines(symbol, timeframe, start_date, end_date, base_timeframe)
+        if klines is None:
             return None
         
-        if not klines or len(klines) < 100:
-            logger.error(f"Not enough historical data for backtest. Got {len(klines) if klines else 0} candles.")
-            return None
-            
-        backtester = Backtester(strategy_name, symbol, timeframe, backtest_start_date, end_date)
+        backtester = Backtester(strategy_name, symbol, timeframe, backtest_start_date, end_date, engine=engine,
+                                strategy=backtest_strategies.acquire(symbol, strategy_name))
         
-        df = backtester.load_historical_data(klines)
+        df = backtester.load_historical_data(klines, base_timeframe=base_timeframe)
         
         results = backtester.run(df)
         
@@ -1444,6 +1601,78 @@ def run_backtest(symbol, timeframe, strategy_name, start_date, end_date=None, sa
         return None
 
 
+def run_sweep(spec_path, symbol, timeframe, strategy_name, start_date, end_date=None, engine=None,
+              base_timeframe=None, workers=None, output_dir=None, halving=False, eta=3):
+    """
+    Backtest every parameter point of a sweep spec in parallel (see modules.sweep)
+    
+    The history is downloaded once; runs already recorded in the output
+    directory are skipped, so an interrupted sweep resumes where it stopped.
+    With `halving`, points are evaluated by successive halving: all of them
+    on a short recent slice, then the best 1/eta on slices eta times longer.
+    
+    Returns:
+        pd.DataFrame: Ranked results, or None if the history could not be loaded
+    """
+    spec = load_sweep_spec(spec_path)
+    strategy_name = spec['strategy'] or strategy_name
+    logger.info(f"Starting parameter sweep of {strategy_name} on {symbol} {timeframe} "
+                f"({len(spec['points'])} points from {spec_path})")
+    
+    klines, backtest_start_date = fetch_backtest_klines(symbol, timeframe, start_date, end_date, base_timeframe)
+    if klines is None:
+        return None
+    
+    df = Backtester(strategy_name, symbol, timeframe, backtest_start_date, end_date,
+                    engine=engine).load_historical_data(klines, base_timeframe=base_timeframe)
+    
+    options = dict(output_dir=output_dir, engine=engine, workers=workers, seed=spec['seed'], rank_by=spec['rank_by'])
+    if halving:
+        sweep = SuccessiveHalving(strategy_name, spec['points'], symbol, timeframe, backtest_start_date,
+                                  end_date, eta=eta, **options)
+    else:
+        sweep = ParameterSweep(strategy_name, spec['points'], symbol, timeframe, backtest_start_date,
+                               end_date, **options)
+    ranked = sweep.run(df)
+    if not ranked.empty:
+        print("\n" + ranked.head(20).to_string(index=False) + "\n")
+    return ranked
+
+
+def run_walk_forward(spec_path, symbol, timeframe, strategy_name, start_date, end_date=None, engine=None,
+                     base_timeframe=None, workers=None, train_days=WALK_FORWARD_TRAIN_DAYS,
+                     test_days=WALK_FORWARD_TEST_DAYS, anchored=False, output_dir=None):
+    """
+    Walk-forward optimization of a sweep spec's parameters (see modules.sweep.WalkForward)
+    
+    Returns:
+        dict: Stitched out-of-sample results, or None if the history could not be loaded
+    """
+    spec = load_sweep_spec(spec_path)
+    strategy_name = spec['strategy'] or strategy_name
+    logger.info(f"Starting walk-forward of {strategy_name} on {symbol} {timeframe} "
+                f"({train_days:g}d in-sample / {test_days:g}d out-of-sample, {len(spec['points'])} points)")
+    
+    klines, backtest_start_date = fetch_backtest_klines(symbol, timeframe, start_date, end_date, base_timeframe)
+    if klines is None:
+        return None
+    
+    df = Backtester(strategy_name, symbol, timeframe, backtest_start_date, end_date,
+                    engine=engine).load_historical_data(klines, base_timeframe=base_timeframe)
+    
+    walk_forward = WalkForward(
+        strategy_name, spec['points'], symbol, timeframe, train_days, test_days, anchored=anchored,
+        output_dir=output_dir, engine=engine, workers=workers, seed=spec['seed'], rank_by=spec['rank_by']
+    )
+    results = walk_forward.run(df)
+    if results:
+        print("\n" + pd.DataFrame(results['windows']).to_string(index=False) + "\n")
+        print(f"Out-of-sample: return {results['total_return']:.2f}% | max drawdown {results['max_drawdown']:.2f}% | "
+              f"Sharpe {results['sharpe_ratio']:.2f} | {results['total_trades']} trades | "
+              f"{results['profitable_windows']}/{len(results['windows'])} profitable windows\n")
+    return results
+
+
 def validate_backtest_results(results):
     """
     Validate backtest results against minimum performance criteria
@@ -1478,19 +1707,32 @@ def run_safety_backtest(symbol, timeframe, strategy_name):
     """
     Run a backtest to check strategy performance before live trading
     """
-    logger.info("Running safety backtest before starting live trading...")
-    
-    # Use past period defined in config for backtest
-    start_date = BACKTEST_PERIOD
-    
-    # Run the backtest
-    results = run_backtest(
-        symbol=symbol,
-        timeframe=timeframe,
-        strategy_name=strategy_name,
-        start_date=start_date,
-        save_results=True
-    )
+    if WALK_FORWARD_SPEC:
+        # Score parameters chosen on past windows on the windows that follow
+        # them, instead of one fixed parameter set over BACKTEST_PERIOD
+        logger.info("Running walk-forward validation before starting live trading...")
+        results = run_walk_forward(
+            WALK_FORWARD_SPEC,
+            symbol=symbol,
+            timeframe=timeframe,
+            strategy_name=strategy_name,
+            start_date=WALK_FORWARD_PERIOD,
+            workers=WALK_FORWARD_WORKERS or None
+        )
+    else:
+        logger.info("Running safety backtest before starting live trading...")
+        
+        # Use past period defined in config for backtest
+        start_date = BACKTEST_PERIOD
+        
+        # Run the backtest
+        results = run_backtest(
+            symbol=symbol,
+            timeframe=timeframe,
+            strategy_name=strategy_name,
+            start_date=start_date,
+            save_results=True
+        )
     
     if not results:
         return False, "Backtest failed to complete"
@@ -1928,23 +2170,17 @@ def generate_trade_chart(symbol, side, price, profit_loss=None):
         os.makedirs(charts_dir, exist_ok=True)
         
         # Get recent price data for chart
-        recent_klines = klines_data.get(symbol, [])
+        recent_klines = klines_data.get(symbol)
         if not recent_klines or len(recent_klines) < 20:
             logger.warning("Not enough historical data to generate trade chart")
             return None
             
-        # Convert to dataframe
-        df = pd.DataFrame(recent_klines[-100:], columns=[
-            'open_time', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'number_of_trades',
-            'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-        ])
-        
-        # Convert data types
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            df[col] = pd.to_numeric(df[col])
-            
-        df['timestamp'] = pd.to_datetime(df['open_time'].astype(float), unit='ms')
+        # Read the last 100 candles straight from the buffer's arrays
+        window = recent_klines.window(100)
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(window.column('open_time'), unit='ms'),
+            'close': window.column('close')
+        })
         
         # Create the chart
         plt.figure(figsize=(10, 6))
@@ -2032,6 +2268,28 @@ def main():
     parser.add_argument('--small-account', action='store_true', help='Run with small account (under $45) - skips test trade and uses adjusted risk')
     parser.add_argument('--force-balance', action='store_true', help='Force initialization of balance from config file')
     parser.add_argument('--test-trade', action='store_true', help='Run test trade only and exit')
+    parser.add_argument('--backtest-engine', type=str, choices=['event', 'legacy'], default=None,
+                        help='Backtest engine: event (indicators computed once) or legacy (per-candle rebuild)')
+    parser.add_argument('--base-timeframe', type=str, default=None,
+                        help='Download this timeframe (e.g. 1m) for the backtest and resample it to --timeframe')
+    parser.add_argument('--sweep', type=str, default=None, metavar='SPEC',
+                        help='Run a parallel parameter sweep from a JSON spec (grid and/or random search)')
+    parser.add_argument('--halving', action='store_true',
+                        help='Search the --sweep spec by successive halving instead of backtesting every point fully')
+    parser.add_argument('--halving-eta', type=int, default=3,
+                        help='Successive halving keeps 1/eta of the points per rung on eta times more history')
+    parser.add_argument('--walk-forward', type=str, default=None, metavar='SPEC',
+                        help='Walk-forward optimization of a sweep spec on rolling in-/out-of-sample windows')
+    parser.add_argument('--train-days', type=float, default=WALK_FORWARD_TRAIN_DAYS,
+                        help='In-sample window for --walk-forward in days')
+    parser.add_argument('--test-days', type=float, default=WALK_FORWARD_TEST_DAYS,
+                        help='Out-of-sample window (and step) for --walk-forward in days')
+    parser.add_argument('--anchored', action='store_true',
+                        help='Expanding in-sample windows from the start of the history for --walk-forward')
+    parser.add_argument('--sweep-workers', type=int, default=None,
+                        help='Worker processes for --sweep and --walk-forward (default: one per CPU)')
+    parser.add_argument('--sweep-output', type=str, default=None,
+                        help='Results directory for --sweep (reusing it resumes an interrupted sweep) or --walk-forward')
     args = parser.parse_args()
     
     signal.signal(signal.SIGINT, handle_exit)
@@ -2043,6 +2301,51 @@ def main():
         generate_performance_report()
         return
     
+    # Run a parameter sweep (Ctrl+C stops it; running it again resumes)
+    if args.sweep:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        try:
+            run_sweep(
+                args.sweep,
+                symbol=args.symbol or TRADING_SYMBOL,
+                timeframe=args.timeframe or TIMEFRAME,
+                strategy_name=args.strategy or STRATEGY,
+                start_date=args.start_date or "30 days ago",
+                end_date=args.end_date,
+                engine=args.backtest_engine,
+                base_timeframe=args.base_timeframe,
+                workers=args.sweep_workers,
+                output_dir=args.sweep_output,
+                halving=args.halving,
+                eta=args.halving_eta
+            )
+        except KeyboardInterrupt:
+            logger.info("Sweep stopped")
+        return
+    
+    # Run a walk-forward optimization
+    if args.walk_forward:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        try:
+            run_walk_forward(
+                args.walk_forward,
+                symbol=args.symbol or TRADING_SYMBOL,
+                timeframe=args.timeframe or TIMEFRAME,
+                strategy_name=args.strategy or STRATEGY,
+                start_date=args.start_date or WALK_FORWARD_PERIOD,
+                end_date=args.end_date,
+                engine=args.backtest_engine,
+                base_timeframe=args.base_timeframe,
+                workers=args.sweep_workers,
+                train_days=args.train_days,
+                test_days=args.test_days,
+                anchored=args.anchored,
+                output_dir=args.sweep_output
+            )
+        except KeyboardInterrupt:
+            logger.info("Walk-forward stopped")
+        return
+    
     # Run only in backtest mode
     if args.backtest:
         symbol = args.symbol or TRADING_SYMBOL
@@ -2055,7 +2358,9 @@ def main():
             timeframe=timeframe,
             strategy_name=strategy,
             start_date=start_date,
-            end_date=args.end_date
+            end_date=args.end_date,
+            engine=args.backtest_engine,
+            base_timeframe=args.base_timeframe
         )
         return
     
@@ -2190,6 +2495,12 @@ def main():
                 check_for_signals()
                 next_check = current_time + check_interval
             
+            # Execute intrabar trigger crossings scheduled by the WebSocket thread
+            for symbol in list(pending_triggers):
+                trigger = pending_triggers.pop(symbol, None)
+                if trigger:
+                    check_for_signals(symbol, trigger=trigger)
+            
             # Check if it's time for the daily report
             now = datetime.now()
             if now >= next_report:
@@ -11,22 +11,43 @@ import json
 from modules.config import (
     BACKTEST_INITIAL_BALANCE, BACKTEST_COMMISSION, RISK_PER_TRADE,
     LEVERAGE, STOP_LOSS_PCT, TAKE_PROFIT_PCT, BACKTEST_USE_AUTO_COMPOUND,
-    COMPOUND_REINVEST_PERCENT
+    COMPOUND_REINVEST_PERCENT, BACKTEST_ENGINE, COMPACT_INDICATORS
 )
 from modules.strategies import get_strategy, TradingStrategy
+from modules.kline_store import KlineWindow
+from modules.resampler import resample_klines
 
 logger = logging.getLogger(__name__)
 
+BACKTEST_ENGINES = ('event', 'legacy')
+
 class Backtester:
-    def __init__(self, strategy_name, symbol, timeframe, start_date, end_date=None):
+    def __init__(self, strategy_name, symbol, timeframe, start_date, end_date=None, engine=None,
+                 strategy=None, progress=True):
         self.strategy_name = strategy_name
         self.symbol = symbol
         self.timeframe = timeframe
         self.start_date = start_date
         self.end_date = end_date or datetime.now().strftime("%Y-%m-%d")
         
-        # Initialize strategy
-        self.strategy = get_strategy(strategy_name)
+        # Backtest engine: 'event' computes indicators once over the whole frame,
+        # 'legacy' rebuilds the full history for every candle
+        self.engine = engine or BACKTEST_ENGINE
+        if self.engine not in BACKTEST_ENGINES:
+            logger.warning(f"Unknown backtest engine {self.engine}. Defaulting to event engine.")
+            self.engine = 'event'
+        
+        # Per-candle progress bar (off for batch runs such as parameter sweeps)
+        self.progress = progress
+        
+        # Initialize strategy (a pooled instance starts from a clean trading state)
+        if strategy is not None:
+            strategy.reset_state()
+            self.strategy = strategy
+        else:
+            self.strategy = get_strategy(strategy_name)
+        if COMPACT_INDICATORS and hasattr(self.strategy, 'compact_indicators'):
+            self.strategy.compact_indicators = True
         
         # Initialize risk manager and connect it to the strategy
         self.risk_manager = self._initialize_risk_manager()
@@ -67,8 +88,23 @@ class Backtester:
         
         return risk_manager
         
-    def load_historical_data(self, klines):
-        """Convert klines to dataframe for backtesting"""
+    def load_historical_data(self, klines, base_timeframe=None):
+        """
+        Convert klines to dataframe for backtesting
+        
+        Args:
+            klines: Historical klines (Binance API lists or a KlineWindow,
+                e.g. from KlineCache)
+            base_timeframe: Timeframe of `klines` if it is not the backtest
+                timeframe (e.g. '1m'); they are resampled to it first
+        """
+        if base_timeframe and base_timeframe != self.timeframe:
+            klines = resample_klines(klines, self.timeframe, base=base_timeframe)
+        
+        if isinstance(klines, KlineWindow):
+            # Typed columns, no string conversion needed
+            return klines.to_frame()
+        
         df = pd.DataFrame(klines, columns=[
             'open_time', 'open', 'high', 'low', 'close', 'volume',
             'close_time', 'quote_asset_volume', 'number_of_trades',
@@ -316,37 +352,84 @@ class Backtester:
                 
         return False
         
-    def run(self, df):
-        """Run backtest on historical data"""
+    def run(self, df, warm_start=False):
+        """
+        Run backtest on historical data
+        
+        Args:
+            df: Candle frame (load_historical_data)
+            warm_start: Compute indicators over all of `df`, including candles
+                before start_date, and only trade the date range - the range
+                starts with warmed-up indicators, and every range of the same
+                frame shares one cached indicator frame (walk-forward windows)
+        """
         logger.info(f"Running backtest on {self.symbol} {self.timeframe} from {self.start_date} to {self.end_date}")
         logger.info(f"Strategy: {self.strategy_name}, Initial Balance: {self.initial_balance}")
         
         # Filter date range
         start_date = pd.to_datetime(self.start_date)
         end_date = pd.to_datetime(self.end_date)
-        df = df[(df['open_time'] >= start_date) & (df['open_time'] <= end_date)]
+        open_times = df['open_time']
+        if open_times.is_monotonic_increasing:
+            # Chronological candles: the range is a slice, which shares the
+            # frame's memory (e.g. a SharedKlineDataset frame) instead of copying it
+            first = open_times.searchsorted(start_date, side='left')
+            last = open_times.searchsorted(end_date, side='right')
+        else:
+            if warm_start:
+                raise ValueError("warm_start needs candles in chronological order")
+            df = df[(open_times >= start_date) & (open_times <= end_date)]
+            first, last = 0, len(df)
+        if not warm_start:
+            df = df.iloc[first:last]
+            first, last = 0, len(df)
         
         # Ensure we have enough data
-        if len(df) < 100:
+        if last - first < 100:
             logger.error("Not enough historical data for backtesting")
             return None
         
         # Add market randomness for realistic simulation
         # Randomly skip some trading signals (market noise, execution issues)
         trade_execution_probability = 0.85  # 85% chance of executing a valid signal
+        
+        # The event engine needs a strategy that can evaluate precomputed indicators
+        use_event_engine = self.engine == 'event' and hasattr(self.strategy, 'generate_signals')
+        if self.engine == 'event' and not use_event_engine:
+            logger.info(f"{self.strategy_name} does not support the event engine. Using legacy engine.")
+        
+        # First row read by the candle loop: with warm_start only the traded
+        # range and the rows its first candles look back on, so a short range
+        # of a long history stays cheap
+        base = 0
+        if use_event_engine:
+            # All indicators are causal, so computing them once over the whole
+            # frame gives the same values as rebuilding the history per candle
+            indicator_df = self.strategy.calculate_indicators(df)
+            lookback = self.strategy.signal_lookback
+            if warm_start:
+                base = max(0, first - lookback)
+            # Stateless part of the signal cascade for every candle in one pass
+            # (rows only look one row back, and rows past the lookback are all evaluable)
+            signals = self.strategy.generate_signals(indicator_df.iloc[base:last])
+            signal_codes = signals['signal'].to_numpy()
+            needs_grid = signals['needs_grid'].to_numpy()
+            evaluable = signals['evaluable'].to_numpy()
+        
+        # Plain arrays avoid building a row Series for every candle
+        dates = df['open_time'].iloc[base:last].tolist()
+        closes = df['close'].to_numpy()[base:last]
+        highs = df['high'].to_numpy()[base:last]
+        lows = df['low'].to_numpy()[base:last]
             
         # Process each candle
         prev_idx = 30  # Start with enough data for indicators
-        for i in tqdm(range(prev_idx, len(df))):
+        for i in tqdm(range(max(first, prev_idx), last), disable=not self.progress):
             # Get current candle data
-            current = df.iloc[i]
-            date = current['open_time']
-            close = current['close']
-            high = current['high']
-            low = current['low']
-            
-            # Get historical data up to current candle for signal generation
-            hist_data = df.iloc[:i+1].values.tolist()
+            date = dates[i - base]
+            close = closes[i - base]
+            high = highs[i - base]
+            low = lows[i - base]
             
             # First check if stop loss or take profit was hit
             if self.in_position:
@@ -356,7 +439,16 @@ class Backtester:
                     continue
             
             # Generate trading signal
-            signal = self.strategy.get_signal(hist_data)
+            if use_event_engine:
+                # Only cool-off and grid triggers are resolved per candle, on a
+                # fixed-size trailing window, so each step is O(1)
+                window = indicator_df.iloc[max(0, i - lookback + 1):i + 1]
+                row = i - base
+                signal = self.strategy.resolve_signal(window, signal_codes[row], needs_grid[row], evaluable[row])
+            else:
+                # Get historical data up to current candle for signal generation
+                hist_data = df.iloc[:i+1].values.tolist()
+                signal = self.strategy.get_signal(hist_data)
             
             # Apply randomness - sometimes we miss trading opportunities due to various reasons
             execute_trade = np.random.random() < trade_execution_probability
@@ -383,8 +475,8 @@ class Backtester:
             
         # Close any open position at the end
         if self.in_position:
-            last_price = df.iloc[-1]['close']
-            last_date = df.iloc[-1]['open_time']
+            last_price = df.iloc[last - 1]['close']
+            last_date = df.iloc[last - 1]['open_time']
             self.exit_position(last_price, last_date, "backtest_end")
             
         return self.generate_results()
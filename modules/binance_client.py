@@ -22,7 +22,7 @@ class BinanceClient:
         for attempt in range(RETRY_COUNT):
             try:
                 # Initialize with simple parameters for compatibility
-                client = Client(API_KEY, API_SECRET, testnet=API_TESTNET)
+                client = self._client_class()(API_KEY, API_SECRET, testnet=API_TESTNET)
                 
                 # Set proper timeout for API calls - increased timeout for historical data
                 client.options = {'timeout': 60, 'recvWindow': RECV_WINDOW}
@@ -70,6 +70,23 @@ class BinanceClient:
                     # Throw exception after all retries fail
                     raise ConnectionError(f"Failed to connect to Binance API after {RETRY_COUNT} attempts")
     
+    @staticmethod
+    def _client_class():
+        """
+        python-binance Client class, pointed at API_URL when BINANCE_API_URL
+        overrides the production endpoint (e.g. a local mock futures exchange)
+        """
+        if API_TESTNET or API_URL.rstrip('/') == 'https://fapi.binance.com':
+            return Client
+        
+        base_url = API_URL.rstrip('/')
+        logger.info(f"Using custom Binance API endpoint: {base_url}")
+        return type('EndpointClient', (Client,), {
+            'API_URL': f"{base_url}/api",
+            'FUTURES_URL': f"{base_url}/fapi",
+            'FUTURES_DATA_URL': f"{base_url}/futures/data"
+        })
+    
     def _sync_time(self, client=None):
         """Synchronize local time with Binance server time"""
         if client is None:
@@ -468,11 +485,17 @@ class BinanceClient:
         logger.error("Maximum retries reached when placing market order")
         return None
     
-    def place_limit_order(self, symbol, side, quantity, price):
-        """Place a limit order in futures market"""
+    def place_limit_order(self, symbol, side, quantity, price, client_order_id=None):
+        """
+        Place a limit order in futures market
+        
+        Args:
+            client_order_id: Optional newClientOrderId (e.g. to tag the bot's grid orders)
+        """
         max_retries = 3
         backoff_factor = 2
         
+        params = {'newClientOrderId': client_order_id} if client_order_id else {}
         for retry in range(max_retries):
             try:
                 order = self.client.futures_create_order(
@@ -481,7 +504,8 @@ class BinanceClient:
                     type="LIMIT",
                     timeInForce="GTC",  # Good Till Cancelled
                     quantity=quantity,
-                    price=price
+                    price=price,
+                    **params
                 )
                 logger.info(f"Placed {side} limit order for {quantity} {symbol} at {price}")
                 return order
@@ -667,6 +691,19 @@ class BinanceClient:
             logger.error(f"Failed to cancel orders: {e}")
             return None
     
+    def cancel_order(self, symbol, order_id):
+        """Cancel a single open order by ID"""
+        try:
+            result = self.client.futures_cancel_order(symbol=symbol, orderId=order_id)
+            logger.info(f"Cancelled order {order_id} for {symbol}")
+            return result
+        except BinanceAPIException as e:
+            logger.error(f"Failed to cancel order {order_id} for {symbol}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error cancelling order {order_id} for {symbol}: {e}")
+            return None
+    
     def get_current_price(self, symbol):
         """Get current price of a symbol"""
         max_retries = 3
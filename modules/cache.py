@@ -0,0 +1,100 @@
+import logging
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(df, columns, params=()):
+    """
+    Content fingerprint of a DataFrame's columns plus a parameter tuple
+
+    Args:
+        df: DataFrame to fingerprint
+        columns: Columns whose values identify the data (e.g. open_time and OHLCV)
+        params: Hashable description of anything else the cached value depends on
+
+    Returns:
+        str: Hex digest that changes whenever any value or parameter changes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(params).encode())
+    digest.update(str(len(df)).encode())
+    for column in columns:
+        values = np.ascontiguousarray(df[column].to_numpy())
+        digest.update(column.encode())
+        digest.update(str(values.dtype).encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    """
+    LRU cache of indicator DataFrames with a memory budget
+
+    Entries are kept in an OrderedDict in least- to most-recently-used order,
+    so lookups, inserts and evictions are O(1). Stored frames are never handed
+    out directly - callers get a copy, so mutating a result cannot corrupt the cache.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (DataFrame, size in bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Return a copy of the cached frame for `key`, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0].copy()
+
+    def put(self, key, df):
+        """Store a copy of `df` under `key`, evicting least-recently-used entries to fit"""
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            logger.debug(f"Frame of {size} bytes exceeds the indicator cache budget, not cached")
+            return
+
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key)[1]
+
+        while self._entries and self.current_bytes + size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+        self._entries[key] = (df.copy(), size)
+        self.current_bytes += size
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    @property
+    def stats(self):
+        """Hit/miss/eviction counters and memory use"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
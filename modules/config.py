@@ -89,6 +89,12 @@ FAST_EMA = int(os.getenv('FAST_EMA', '8'))
 SLOW_EMA = int(os.getenv('SLOW_EMA', '21'))
 TIMEFRAME = os.getenv('TIMEFRAME', '15m')
 
+# Candle resampling: subscribe to 1m klines only and build TIMEFRAME and the
+# RESAMPLE_TIMEFRAMES candles from them locally
+RESAMPLE_FROM_1M = os.getenv('RESAMPLE_FROM_1M', 'False').lower() == 'true'
+RESAMPLE_TIMEFRAMES = [tf.strip() for tf in os.getenv('RESAMPLE_TIMEFRAMES', '3m,5m,15m,1h,4h').split(',') if tf.strip()]
+RESAMPLE_HISTORY_CANDLES = int(os.getenv('RESAMPLE_HISTORY_CANDLES', '1000'))  # 1m candles downloaded once at startup to seed the resampled timeframes
+
 # Risk management - Standard settings
 USE_STOP_LOSS = os.getenv('USE_STOP_LOSS', 'True').lower() == 'true'
 STOP_LOSS_PCT = float(os.getenv('STOP_LOSS_PCT', '0.02'))
@@ -122,6 +128,26 @@ BACKTEST_END_DATE = os.getenv('BACKTEST_END_DATE', '')  # Empty means use curren
 BACKTEST_INITIAL_BALANCE = float(os.getenv('BACKTEST_INITIAL_BALANCE', '50.0'))
 BACKTEST_COMMISSION = float(os.getenv('BACKTEST_COMMISSION', '0.0004'))  # 0.04% taker fee
 BACKTEST_USE_AUTO_COMPOUND = os.getenv('BACKTEST_USE_AUTO_COMPOUND', 'True').lower() == 'true'
+BACKTEST_ENGINE = os.getenv('BACKTEST_ENGINE', 'event')  # 'event' (indicators computed once) or 'legacy'
+
+# Historical kline cache for backtests (monthly NumPy partitions per symbol and interval)
+USE_KLINE_CACHE = os.getenv('USE_KLINE_CACHE', 'True').lower() == 'true'  # Download only candles that are not cached yet
+KLINE_CACHE_DIR = os.getenv('KLINE_CACHE_DIR', '')  # Empty means kline_cache/ in the bot directory
+KLINE_CACHE_OFFLINE = os.getenv('KLINE_CACHE_OFFLINE', 'False').lower() == 'true'  # Use cached candles only, never download
+
+# Live indicator calculation
+USE_STREAMING_INDICATORS = os.getenv('USE_STREAMING_INDICATORS', 'True').lower() == 'true'  # O(1) updates per closed candle
+STREAMING_DRIFT_CHECK_INTERVAL = int(os.getenv('STREAMING_DRIFT_CHECK_INTERVAL', '96'))  # Closed candles between full recalculation checks, 0 disables
+USE_TICK_TRIGGERS = os.getenv('USE_TICK_TRIGGERS', 'True').lower() == 'true'  # Act on grid/band crossings from trade and bookTicker ticks between candle closes
+INDICATOR_BACKEND = os.getenv('INDICATOR_BACKEND', 'ta')  # 'ta' (same values as the ta package) or 'numpy' (vectorised recursive filters)
+COMPACT_INDICATORS = os.getenv('COMPACT_INDICATORS', 'False').lower() == 'true'  # float32/int8 indicator frames without intermediate columns (live and backtest)
+
+# Grid order execution
+GRID_EXECUTION_MODE = os.getenv('GRID_EXECUTION_MODE', 'market')  # 'market' (act on grid signals with market orders) or 'limit' (levels rest on the exchange as limit orders)
+
+# Shadow strategy variants (paper trading on the live candles)
+SHADOW_VARIANTS_FILE = os.getenv('SHADOW_VARIANTS_FILE', '')  # JSON list of variants, empty disables
+SHADOW_WORKERS = int(os.getenv('SHADOW_WORKERS', '0'))  # Worker processes for the variants, 0 = one per CPU
 
 # Pre-live backtest validation
 BACKTEST_BEFORE_LIVE = os.getenv('BACKTEST_BEFORE_LIVE', 'True').lower() == 'true'
@@ -129,6 +155,13 @@ BACKTEST_MIN_PROFIT_PCT = float(os.getenv('BACKTEST_MIN_PROFIT_PCT', '5.0'))
 BACKTEST_MIN_WIN_RATE = float(os.getenv('BACKTEST_MIN_WIN_RATE', '40.0'))
 BACKTEST_PERIOD = os.getenv('BACKTEST_PERIOD', '15 days')
 
+# Walk-forward validation (replaces the single pre-live backtest when a spec is set)
+WALK_FORWARD_SPEC = os.getenv('WALK_FORWARD_SPEC', '')  # Sweep spec JSON with the parameters to optimize, empty disables
+WALK_FORWARD_PERIOD = os.getenv('WALK_FORWARD_PERIOD', '90 days')
+WALK_FORWARD_TRAIN_DAYS = float(os.getenv('WALK_FORWARD_TRAIN_DAYS', '21'))  # In-sample window
+WALK_FORWARD_TEST_DAYS = float(os.getenv('WALK_FORWARD_TEST_DAYS', '7'))  # Out-of-sample window and step
+WALK_FORWARD_WORKERS = int(os.getenv('WALK_FORWARD_WORKERS', '0'))  # Worker processes, 0 = one per CPU
+
 # Logging and notifications
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 USE_TELEGRAM = os.getenv('USE_TELEGRAM', 'True').lower() == 'true'
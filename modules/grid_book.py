@@ -0,0 +1,148 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Grid level sides as stored in GridBook.sides
+GRID_SIDES = {'BUY': 1, 'SELL': -1}
+GRID_SIDE_LABELS = {1: 'BUY', -1: 'SELL'}
+
+
+class GridBook:
+    """
+    Grid levels as parallel NumPy arrays (price, side, active), sorted by price.
+
+    Range bounds and active counters are O(1). The nearest active buy (the
+    highest active BUY level) and nearest active sell (the lowest active SELL
+    level) are tracked with one pointer per side that only moves past
+    triggered levels, so lookups are amortised O(1), and price lookups are
+    binary searches. Levels are triggered by index, never by float price match.
+    """
+    def __init__(self, prices, sides, created_at=None):
+        """
+        Args:
+            prices: Level prices (any order)
+            sides: Level sides, 'BUY'/'SELL' or 1/-1
+            created_at: Open time of the candle the grid was generated on
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        sides = np.asarray([GRID_SIDES.get(side, side) for side in sides], dtype=np.int8)
+        if len(prices) != len(sides):
+            raise ValueError("GridBook needs one side per price")
+
+        order = np.argsort(prices, kind='stable')
+        self.prices = prices[order]
+        self.sides = sides[order]
+        self.active = np.ones(len(prices), dtype=bool)
+        self.created_at = created_at
+
+        # Book positions of each side's levels, in ascending price order
+        self._buy_index = np.flatnonzero(self.sides == 1)
+        self._sell_index = np.flatnonzero(self.sides == -1)
+        self._buy_top = len(self._buy_index) - 1
+        self._sell_bottom = 0
+
+        self.active_count = len(prices)
+        self.active_buys = len(self._buy_index)
+        self.active_sells = len(self._sell_index)
+
+    @classmethod
+    def from_levels(cls, levels):
+        """Build a book from a list of {'price', 'type', 'status'} grid dicts"""
+        levels = list(levels)
+        book = cls([level['price'] for level in levels],
+                   [level['type'] for level in levels],
+                   levels[0].get('created_at') if levels else None)
+        for level in levels:
+            if level.get('status', 'ACTIVE') != 'ACTIVE':
+                book.trigger(book.index_of(level['price']))
+        return book
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __getitem__(self, index):
+        """Level at `index` as a grid dict ('price', 'type', 'status', 'created_at')"""
+        return {
+            'price': float(self.prices[index]),
+            'type': GRID_SIDE_LABELS[int(self.sides[index])],
+            'status': 'ACTIVE' if self.active[index] else 'TRIGGERED',
+            'created_at': self.created_at
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def min_price(self):
+        return float(self.prices[0]) if len(self.prices) else None
+
+    @property
+    def max_price(self):
+        return float(self.prices[-1]) if len(self.prices) else None
+
+    @property
+    def active_fraction(self):
+        """Share of levels that have not been triggered yet"""
+        return self.active_count / len(self.prices) if len(self.prices) else 0.0
+
+    def closest_buy(self):
+        """Book index of the highest active BUY level, or None"""
+        while self._buy_top >= 0 and not self.active[self._buy_index[self._buy_top]]:
+            self._buy_top -= 1
+        return int(self._buy_index[self._buy_top]) if self._buy_top >= 0 else None
+
+    def closest_sell(self):
+        """Book index of the lowest active SELL level, or None"""
+        while self._sell_bottom < len(self._sell_index) and not self.active[self._sell_index[self._sell_bottom]]:
+            self._sell_bottom += 1
+        if self._sell_bottom < len(self._sell_index):
+            return int(self._sell_index[self._sell_bottom])
+        return None
+
+    def index_of(self, price):
+        """Book index of the first level at exactly `price`, or None"""
+        index = int(np.searchsorted(self.prices, price, side='left'))
+        if index < len(self.prices) and self.prices[index] == price:
+            return index
+        return None
+
+    def levels_between(self, low, high, side=None):
+        """
+        Book indexes of the active levels priced within [low, high]
+
+        Args:
+            low: Lower price bound (inclusive)
+            high: Upper price bound (inclusive)
+            side: Optional 'BUY'/'SELL' filter
+        """
+        start = np.searchsorted(self.prices, low, side='left')
+        stop = np.searchsorted(self.prices, high, side='right')
+        indexes = np.arange(start, stop)
+        mask = self.active[start:stop]
+        if side is not None:
+            mask &= self.sides[start:stop] == GRID_SIDES.get(side, side)
+        return indexes[mask]
+
+    def trigger(self, index):
+        """
+        Mark the level at `index` as triggered, together with any other level
+        at the same price (levels snapped to one Fibonacci level are one level)
+
+        Returns:
+            int: Number of levels that changed from active to triggered
+        """
+        price = self.prices[index]
+        start = np.searchsorted(self.prices, price, side='left')
+        stop = np.searchsorted(self.prices, price, side='right')
+        newly = self.active[start:stop]
+        buys = int(np.count_nonzero(newly & (self.sides[start:stop] == 1)))
+        sells = int(np.count_nonzero(newly & (self.sides[start:stop] == -1)))
+        self.active[start:stop] = False
+
+        self.active_buys -= buys
+        self.active_sells -= sells
+        self.active_count -= buys + sells
+        return buys + sells
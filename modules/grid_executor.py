@@ -0,0 +1,193 @@
+import logging
+import time
+
+import numpy as np
+
+from modules.grid_book import GRID_SIDE_LABELS
+
+logger = logging.getLogger(__name__)
+
+# How grid levels are executed: 'market' acts on get_grid_signal with market
+# orders, 'limit' keeps the levels resting on the exchange as limit orders
+GRID_EXECUTION_MODES = ('market', 'limit')
+
+# newClientOrderId prefix of the orders placed by GridExecutor; only resting
+# orders carrying it are adopted (and so ever cancelled) as grid orders
+GRID_ORDER_PREFIX = 'grid_'
+
+
+class GridExecutor:
+    """
+    Keeps the active levels of a strategy's GridBook resting on the exchange
+    as GTC limit orders.
+
+    Orders are keyed by (side, exchange price), so when the grid is refreshed
+    only the levels that changed are cancelled or placed, and fills reported
+    by ORDER_TRADE_UPDATE events mark their level as triggered in the book.
+    Orders are tagged with a GRID_ORDER_PREFIX client order id, so manual or
+    other strategies' limit orders on the symbol are never touched. The
+    client only needs place_limit_order, cancel_order, get_open_orders and
+    get_symbol_info, so a BinanceClient pointed at a mock endpoint (or any
+    object with those methods) can be used for testing.
+    """
+    def __init__(self, client, symbol, quantity_for):
+        """
+        Args:
+            client: BinanceClient (or compatible) used to place and cancel orders
+            symbol: Trading symbol
+            quantity_for: Function (side, price) -> order quantity for one level
+        """
+        self.client = client
+        self.symbol = symbol
+        self.quantity_for = quantity_for
+        self.book = None
+        self.price_precision = None
+        self.orders = {}  # order_id -> {'side', 'price', 'book_price', 'quantity'}
+        self._order_ids = {}  # (side, price) -> order_id
+        self._adopted = False
+        self._sequence = 0
+        self.fills = 0
+
+    def __len__(self):
+        return len(self.orders)
+
+    def _round_price(self, price):
+        if self.price_precision is None:
+            info = self.client.get_symbol_info(self.symbol)
+            self.price_precision = info['price_precision'] if info else 8
+        return round(float(price), self.price_precision)
+
+    def _register(self, order_id, side, price, book_price, quantity):
+        self.orders[order_id] = {
+            'side': side,
+            'price': price,
+            'book_price': book_price,
+            'quantity': quantity
+        }
+        self._order_ids[(side, price)] = order_id
+
+    def _forget(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self._order_ids.pop((order['side'], order['price']), None)
+        return order
+
+    def _client_order_id(self):
+        """New GRID_ORDER_PREFIX client order id (unique across restarts)"""
+        self._sequence += 1
+        return f"{GRID_ORDER_PREFIX}{int(time.time() * 1000)}_{self._sequence}"
+
+    def adopt_open_orders(self):
+        """Track grid orders already resting for the symbol (e.g. after a restart)"""
+        adopted = 0
+        for order in self.client.get_open_orders(self.symbol):
+            if order.get('type') != 'LIMIT' or order.get('symbol') != self.symbol:
+                continue
+            if not str(order.get('clientOrderId', '')).startswith(GRID_ORDER_PREFIX):
+                # Manual or other strategies' order
+                continue
+            price = self._round_price(order['price'])
+            quantity = float(order.get('origQty', 0))
+            self._register(order['orderId'], order['side'], price, price, quantity)
+            adopted += 1
+        self._adopted = True
+        if adopted:
+            logger.info(f"Adopted {adopted} resting grid orders for {self.symbol}")
+        return adopted
+
+    def desired_orders(self, book):
+        """Active levels of `book` as {(side, exchange price): book price}"""
+        desired = {}
+        if book is None:
+            return desired
+        for index in np.flatnonzero(book.active):
+            side = GRID_SIDE_LABELS[int(book.sides[index])]
+            book_price = float(book.prices[index])
+            desired.setdefault((side, self._round_price(book_price)), book_price)
+        return desired
+
+    def sync(self, book):
+        """
+        Make the resting orders match the active levels of `book`, cancelling
+        and placing only the levels that differ
+
+        Args:
+            book: The strategy's current GridBook (None cancels everything)
+
+        Returns:
+            tuple: (orders placed, orders cancelled)
+        """
+        if not self._adopted:
+            self.adopt_open_orders()
+
+        desired = self.desired_orders(book)
+        self.book = book
+
+        cancelled = 0
+        for key in [key for key in self._order_ids if key not in desired]:
+            order_id = self._order_ids[key]
+            # A failed cancel usually means the order just filled - its update reconciles it
+            if self.client.cancel_order(self.symbol, order_id):
+                self._forget(order_id)
+                cancelled += 1
+
+        placed = 0
+        for (side, price), book_price in desired.items():
+            order_id = self._order_ids.get((side, price))
+            if order_id is not None:
+                self.orders[order_id]['book_price'] = book_price
+                continue
+
+            quantity = self.quantity_for(side, price)
+            if not quantity or quantity <= 0:
+                logger.warning(f"Skipping {side} grid level at {price}: quantity {quantity}")
+                continue
+
+            order = self.client.place_limit_order(self.symbol, side, quantity, price,
+                                                  client_order_id=self._client_order_id())
+            if order and 'orderId' in order:
+                self._register(order['orderId'], side, price, book_price, quantity)
+                placed += 1
+
+        if placed or cancelled:
+            logger.info(f"Grid orders for {self.symbol}: placed {placed}, cancelled {cancelled}, "
+                        f"resting {len(self.orders)}")
+        return placed, cancelled
+
+    def on_order_update(self, order_data):
+        """
+        Reconcile an ORDER_TRADE_UPDATE event (BinanceWebSocketManager order_data)
+
+        Returns:
+            dict: Fill details ('side', 'price', 'quantity', 'order_id') when one
+            of the grid's orders filled, otherwise None
+        """
+        order_id = order_data.get('order_id')
+        if order_id not in self.orders:
+            return None
+
+        status = order_data.get('order_status')
+        if status == 'FILLED':
+            order = self._forget(order_id)
+            self.fills += 1
+            if self.book is not None:
+                index = self.book.index_of(order['book_price'])
+                if index is not None:
+                    self.book.trigger(index)
+            fill = {
+                'order_id': order_id,
+                'side': order['side'],
+                'price': order_data.get('avg_price') or order['price'],
+                'quantity': order_data.get('cumulative_filled_quantity') or order['quantity']
+            }
+            logger.info(f"Grid {fill['side']} level filled: {fill['quantity']} {self.symbol} @ {fill['price']}")
+            return fill
+
+        if status in ('CANCELED', 'EXPIRED', 'REJECTED'):
+            self._forget(order_id)
+            logger.info(f"Grid order {order_id} for {self.symbol} {status.lower()}")
+        return None
+
+    def cancel_all(self):
+        """Cancel every resting grid order"""
+        return self.sync(None)[1]
@@ -0,0 +1,391 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from modules.config import INDICATOR_BACKEND
+
+logger = logging.getLogger(__name__)
+
+# Registered node kinds: kind -> (function, inputs(**params) -> list of input nodes/columns)
+NODE_KINDS = {}
+
+# Indicator backends: 'ta' reproduces the ta package bit for bit (pandas ewm/rolling
+# and Python loops for Wilder smoothing), 'numpy' evaluates the recursive filters
+# on contiguous arrays and matches 'ta' to floating point rounding
+INDICATOR_BACKENDS = ('ta', 'numpy')
+
+# Backend -> {kind: function} replacing the node kind's default ('ta') function
+BACKEND_KERNELS = {backend: {} for backend in INDICATOR_BACKENDS}
+
+
+class Node:
+    """
+    A parameterised indicator in the graph, e.g. Node('atr', window=10).
+
+    The node's name qualifies the kind with its parameter values ('atr_10',
+    'ema_close_21'), so the same indicator with different parameters never
+    shares a name and the same indicator with the same parameters is
+    computed only once per frame.
+    """
+    def __init__(self, kind, **params):
+        if kind not in NODE_KINDS:
+            raise ValueError(f"Unknown indicator node: {kind}")
+        self.kind = kind
+        self.params = params
+        self.name = '_'.join([kind] + [str(value) for value in params.values()])
+
+    def __repr__(self):
+        return f"Node({self.name})"
+
+
+def indicator(kind, inputs=lambda **params: []):
+    """
+    Register a node kind
+
+    Args:
+        kind: Node kind name
+        inputs: Function of the node parameters returning its inputs, each either
+            a frame column name or another Node
+    """
+    def decorator(func):
+        NODE_KINDS[kind] = (func, inputs)
+        return func
+    return decorator
+
+
+def kernel(kind, backend):
+    """
+    Register a backend's function for an existing node kind (same inputs and
+    parameters as the default function)
+    """
+    def decorator(func):
+        BACKEND_KERNELS[backend][kind] = func
+        return func
+    return decorator
+
+
+def default_backend():
+    """The configured INDICATOR_BACKEND, 'ta' if it is unknown"""
+    if INDICATOR_BACKEND in INDICATOR_BACKENDS:
+        return INDICATOR_BACKEND
+    logger.warning(f"Unknown indicator backend {INDICATOR_BACKEND}. Using ta.")
+    return 'ta'
+
+
+class IndicatorGraph:
+    """
+    Evaluates indicator nodes over one frame, computing every node at most once.
+
+    Nodes are resolved recursively from their declared inputs, and results
+    are memoised by node name, so shared intermediates (true range, moving
+    averages of close, EMAs) are computed once however many indicators use them.
+    """
+    def __init__(self, data, backend=None):
+        """
+        Args:
+            data: DataFrame (or mapping of column name -> array) with the raw columns
+            backend: One of INDICATOR_BACKENDS (default: INDICATOR_BACKEND from config)
+        """
+        self.data = data
+        self.backend = backend or default_backend()
+        self._kernels = BACKEND_KERNELS[self.backend]
+        self._columns = {}
+        self._results = {}
+
+    def column(self, name):
+        """Raw frame column as a float64 array"""
+        if name not in self._columns:
+            self._columns[name] = np.asarray(self.data[name], dtype=np.float64)
+        return self._columns[name]
+
+    def get(self, node):
+        """Compute (or reuse) the result of a node"""
+        if isinstance(node, str):
+            return self.column(node)
+        if node.name not in self._results:
+            func, inputs = NODE_KINDS[node.kind]
+            func = self._kernels.get(node.kind, func)
+            args = [self.get(source) for source in inputs(**node.params)]
+            self._results[node.name] = func(*args, **node.params)
+        return self._results[node.name]
+
+    @property
+    def computed(self):
+        """Names of the nodes computed so far, in evaluation order"""
+        return list(self._results)
+
+
+@indicator('true_range', lambda: ['high', 'low', 'close'])
+def true_range(high, low, close):
+    """True range, h - l on the first candle (same values as ta's _true_range)"""
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    # fmax skips the NaN previous close on the first candle, like DataFrame.max(axis=1)
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+@indicator('atr', lambda window: [Node('true_range')])
+def average_true_range(true_range, window):
+    """Wilder ATR with ta's warm-up (zeros, then the mean of the first `window` true ranges)"""
+    n = len(true_range)
+    atr = np.zeros(n)
+    if n < window:
+        return atr
+
+    atr[window - 1] = true_range[0:window].mean()
+    value = atr[window - 1]
+    tr = true_range.tolist()
+    for i in range(window, n):
+        value = (value * (window - 1) + tr[i]) / float(window)
+        atr[i] = value
+    return atr
+
+
+@indicator('adx', lambda window: ['high', 'low', Node('true_range')])
+def average_directional_index(high, low, true_range, window):
+    """
+    ADX with +DI/-DI, same values as ta's ADXIndicator
+
+    The true range equals ta's max(high, prev_close) - min(low, prev_close).
+
+    Returns:
+        dict: 'adx', 'di_plus' and 'di_minus' arrays
+    """
+    n = len(high)
+    adx = np.zeros(n)
+    di_plus = np.zeros(n)
+    di_minus = np.zeros(n)
+    if n < 2 * window:
+        return {'adx': adx, 'di_plus': di_plus, 'di_minus': di_minus}
+
+    diff_up = np.empty(n)
+    diff_down = np.empty(n)
+    diff_up[0] = diff_down[0] = np.nan
+    diff_up[1:] = high[1:] - high[:-1]
+    diff_down[1:] = low[:-1] - low[1:]
+    pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    # Smoothed sums start with the plain sum of rows 1..window
+    trs = true_range[1:window + 1].sum()
+    dip = pos[1:window + 1].sum()
+    din = neg[1:window + 1].sum()
+    tr_list, pos_list, neg_list = true_range.tolist(), pos.tolist(), neg.tolist()
+
+    dx = np.zeros(n)
+    for i in range(window, n):
+        if i > window:
+            trs = trs - (trs / float(window)) + tr_list[i]
+            dip = dip - (dip / float(window)) + pos_list[i]
+            din = din - (din / float(window)) + neg_list[i]
+        plus = 100 * (dip / trs) if trs != 0 else 0.0
+        minus = 100 * (din / trs) if trs != 0 else 0.0
+        if i > window:
+            # ta leaves +DI/-DI at zero on the first smoothed row
+            di_plus[i] = plus
+            di_minus[i] = minus
+        if plus + minus != 0:
+            dx[i] = 100 * abs((plus - minus) / (plus + minus))
+
+    value = dx[window:2 * window].mean()
+    adx[2 * window - 1] = value
+    dx_list = dx.tolist()
+    for i in range(2 * window, n):
+        value = ((value * (window - 1)) + dx_list[i]) / float(window)
+        adx[i] = value
+
+    return {'adx': adx, 'di_plus': di_plus, 'di_minus': di_minus}
+
+
+@indicator('ema', lambda source, span: [source])
+def exponential_moving_average(values, source, span):
+    """EMA without adjustment, NaN until `span` values were seen (ta's _ema)"""
+    return pd.Series(values).ewm(span=span, min_periods=span, adjust=False).mean().to_numpy()
+
+
+@indicator('sma', lambda source, window: [source])
+def simple_moving_average(values, source, window):
+    """Rolling mean, NaN until the window is full"""
+    return pd.Series(values).rolling(window, min_periods=window).mean().to_numpy()
+
+
+@indicator('std', lambda source, window: [source])
+def rolling_std(values, source, window):
+    """Rolling population standard deviation (ddof=0), as used by Bollinger Bands"""
+    return pd.Series(values).rolling(window, min_periods=window).std(ddof=0).to_numpy()
+
+
+@indicator('bollinger', lambda window, window_dev: [Node('sma', source='close', window=window),
+                                                     Node('std', source='close', window=window)])
+def bollinger_bands(mavg, mstd, window, window_dev):
+    """
+    Returns:
+        dict: 'upper', 'middle' and 'lower' band arrays
+    """
+    return {
+        'upper': mavg + window_dev * mstd,
+        'middle': mavg,
+        'lower': mavg - window_dev * mstd,
+    }
+
+
+@indicator('rsi', lambda window: ['close'])
+def relative_strength_index(close, window):
+    """Wilder RSI (ta's RSIIndicator)"""
+    diff = pd.Series(close).diff(1)
+    up_direction = diff.where(diff > 0, 0.0)
+    down_direction = -diff.where(diff < 0, 0.0)
+    emaup = up_direction.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    emadn = down_direction.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    relative_strength = emaup / emadn
+    return np.where(emadn == 0, 100, 100 - (100 / (1 + relative_strength)))
+
+
+@indicator('macd', lambda fast, slow: [Node('ema', source='close', span=fast),
+                                       Node('ema', source='close', span=slow)])
+def macd_line(ema_fast, ema_slow, fast, slow):
+    return ema_fast - ema_slow
+
+
+@indicator('macd_signal', lambda fast, slow, signal: [Node('macd', fast=fast, slow=slow)])
+def macd_signal_line(macd, fast, slow, signal):
+    return exponential_moving_average(macd, 'macd', signal)
+
+
+# NumPy backend
+
+def linear_filter(values, decay, initial=0.0):
+    """
+    First-order recursive filter y[i] = decay * y[i-1] + values[i], y[-1] = initial
+    
+    Evaluated in blocks with cumulative sums instead of a Python loop: inside
+    a block y[t] = decay^t * (decay * y_prev + sum(values[k] / decay^k)). The
+    block length keeps decay^-k below 1e100, so the scaled sums stay well
+    inside float64 range.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    n = len(values)
+    result = np.empty(n)
+    if n == 0:
+        return result
+    if decay == 0:
+        result[:] = values
+        return result
+    
+    block = n if decay >= 1 else max(1, min(n, int(100 / -np.log10(decay))))
+    powers = decay ** np.arange(block, dtype=np.float64)
+    scale = 1.0 / powers
+    previous = initial
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        m = len(chunk)
+        out = powers[:m] * (decay * previous + np.cumsum(chunk * scale[:m]))
+        result[start:start + m] = out
+        previous = out[-1]
+    return result
+
+
+def exponential_filter(values, alpha, min_periods):
+    """
+    pandas' ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean() for
+    a series whose only NaNs are leading ones
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) == 0:
+        return result
+    
+    first = valid[0]
+    # Seeding with the first value makes y[first] = values[first], as in pandas
+    result[first:] = linear_filter(alpha * values[first:], 1.0 - alpha, values[first])
+    result[first:first + min_periods - 1] = np.nan
+    return result
+
+
+@kernel('ema', 'numpy')
+def exponential_moving_average_numpy(values, source, span):
+    return exponential_filter(values, 2.0 / (span + 1), span)
+
+
+@kernel('sma', 'numpy')
+def simple_moving_average_numpy(values, source, window):
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+    return result
+
+
+@kernel('std', 'numpy')
+def rolling_std_numpy(values, source, window):
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        result[window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1)
+    return result
+
+
+@kernel('rsi', 'numpy')
+def relative_strength_index_numpy(close, window):
+    # ta's diff().where() turns the first (NaN) difference into 0
+    diff = np.zeros(len(close))
+    diff[1:] = close[1:] - close[:-1]
+    up_direction = np.where(diff > 0, diff, 0.0)
+    down_direction = np.where(diff < 0, -diff, 0.0)
+    
+    emaup = exponential_filter(up_direction, 1.0 / window, window)
+    emadn = exponential_filter(down_direction, 1.0 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(emadn == 0, 100, 100 - (100 / (1 + emaup / emadn)))
+
+
+@kernel('atr', 'numpy')
+def average_true_range_numpy(true_range, window):
+    n = len(true_range)
+    atr = np.zeros(n)
+    if n < window:
+        return atr
+    
+    initial = true_range[0:window].mean()
+    atr[window - 1] = initial
+    atr[window:] = linear_filter(true_range[window:] / window, (window - 1) / window, initial)
+    return atr
+
+
+@kernel('adx', 'numpy')
+def average_directional_index_numpy(high, low, true_range, window):
+    n = len(high)
+    adx = np.zeros(n)
+    di_plus = np.zeros(n)
+    di_minus = np.zeros(n)
+    if n < 2 * window:
+        return {'adx': adx, 'di_plus': di_plus, 'di_minus': di_minus}
+    
+    diff_up = np.zeros(n)
+    diff_down = np.zeros(n)
+    diff_up[1:] = high[1:] - high[:-1]
+    diff_down[1:] = low[:-1] - low[1:]
+    pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+    
+    # Wilder sums from row `window`, seeded with the plain sum of rows 1..window
+    decay = 1.0 - 1.0 / window
+    trs = linear_filter(true_range[window:], decay, (true_range[1:window + 1].sum() - true_range[window]) / decay)
+    dip = linear_filter(pos[window:], decay, (pos[1:window + 1].sum() - pos[window]) / decay)
+    din = linear_filter(neg[window:], decay, (neg[1:window + 1].sum() - neg[window]) / decay)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus = np.where(trs != 0, 100 * dip / trs, 0.0)
+        minus = np.where(trs != 0, 100 * din / trs, 0.0)
+        total = plus + minus
+        dx = np.where(total != 0, 100 * np.abs((plus - minus) / total), 0.0)
+    
+    # ta leaves +DI/-DI at zero on the first smoothed row
+    di_plus[window + 1:] = plus[1:]
+    di_minus[window + 1:] = minus[1:]
+    
+    initial = dx[:window].mean()
+    adx[2 * window - 1] = initial
+    adx[2 * window:] = linear_filter(dx[window:] / window, decay, initial)
+    return {'adx': adx, 'di_plus': di_plus, 'di_minus': di_minus}
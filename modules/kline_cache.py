@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import time
+
+import numpy as np
+from binance.helpers import date_to_milliseconds
+
+from modules.kline_store import KLINE_FIELDS, FIELD_NAMES, KlineBuffer, KlineWindow
+from modules.resampler import TIMEFRAME_MS
+
+logger = logging.getLogger(__name__)
+
+# Default location: kline_cache/ next to backtest_results/
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'kline_cache')
+
+
+def _to_ms(value):
+    """Milliseconds of a timestamp, a date string or a relative date ("30 days ago")"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return date_to_milliseconds(value)
+
+
+class KlineCache:
+    """
+    On-disk kline history, one NumPy partition per symbol, interval and month.
+
+    Layout: <root>/<SYMBOL>/<interval>/<YYYY-MM>.npz with one typed array per
+    kline field, plus coverage.json holding the contiguous open time range
+    [start, end) (ms) that has been downloaded. A request only downloads the
+    part of its range outside that coverage (an older head and/or a newer
+    tail), so repeated backtests over the same history run without any API
+    call. Only closed candles are stored; a range reaching into the current
+    candle ends at the last closed one.
+    """
+    def __init__(self, root=None, offline=False):
+        """
+        Args:
+            root: Cache directory (DEFAULT_CACHE_DIR if empty)
+            offline: Never download, serve only what is cached
+        """
+        self.root = root or DEFAULT_CACHE_DIR
+        self.offline = offline
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def coverage(self, symbol, interval):
+        """Cached open time range as (start, end) ms, end exclusive, or None"""
+        path = os.path.join(self._dir(symbol, interval), 'coverage.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            coverage = json.load(f)
+        return coverage['start'], coverage['end']
+
+    def _set_coverage(self, symbol, interval, start, end):
+        path = os.path.join(self._dir(symbol, interval), 'coverage.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'start': int(start), 'end': int(end)}, f)
+        os.replace(path + '.tmp', path)
+
+    def _read_month(self, path):
+        with np.load(path) as data:
+            return {name: data[name] for name in FIELD_NAMES}
+
+    def _write_month(self, path, columns):
+        # np.savez appends .npz to names without it
+        tmp = path[:-len('.npz')] + '.tmp.npz'
+        np.savez(tmp, **columns)
+        os.replace(tmp, path)
+
+    def store(self, symbol, interval, klines):
+        """
+        Merge candles into the monthly partitions (newer values win on equal open times)
+
+        Args:
+            klines: Raw klines (Binance API lists) or a KlineWindow
+
+        Returns:
+            int: Number of candles written
+        """
+        if len(klines) == 0:
+            return 0
+        if not isinstance(klines, KlineWindow):
+            klines = KlineBuffer.from_klines(klines, capacity=len(klines)).window()
+        columns = {name: klines.column(name) for name in FIELD_NAMES}
+
+        directory = self._dir(symbol, interval)
+        os.makedirs(directory, exist_ok=True)
+        months = columns['open_time'].astype('datetime64[ms]').astype('datetime64[M]')
+        for month in np.unique(months):
+            selected = months == month
+            part = {name: values[selected] for name, values in columns.items()}
+            path = os.path.join(directory, f'{month}.npz')
+            if os.path.exists(path):
+                existing = self._read_month(path)
+                part = {name: np.concatenate((part[name], existing[name])) for name in FIELD_NAMES}
+            # np.unique keeps the first occurrence: the new candles come first
+            _, keep = np.unique(part['open_time'], return_index=True)
+            self._write_month(path, {name: values[keep] for name, values in part.items()})
+        return len(klines)
+
+    def load(self, symbol, interval, start, end):
+        """
+        Cached candles with open times in [start, end] (ms)
+
+        Returns:
+            KlineWindow: Typed columns, chronological
+        """
+        directory = self._dir(symbol, interval)
+        first, last = np.array([start, end], dtype='datetime64[ms]').astype('datetime64[M]')
+        parts = []
+        for month in np.arange(first, last + 1):
+            path = os.path.join(directory, f'{month}.npz')
+            if os.path.exists(path):
+                parts.append(self._read_month(path))
+
+        if not parts:
+            return KlineWindow({name: np.zeros(0, dtype=dtype) for name, dtype in KLINE_FIELDS})
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in FIELD_NAMES}
+        open_time = columns['open_time']
+        lo = np.searchsorted(open_time, start, side='left')
+        hi = np.searchsorted(open_time, end, side='right')
+        return KlineWindow({name: values[lo:hi] for name, values in columns.items()})
+
+    def _download(self, symbol, interval, start, end, fetch, now):
+        """
+        Download and store the candles opening in [start, end)
+
+        Returns:
+            int or None: End of the stored range (the open time of the first
+            candle still open, or `end`), None if nothing was downloaded
+        """
+        logger.info(f"Downloading {symbol} {interval} candles "
+                    f"{np.datetime64(start, 'ms')} - {np.datetime64(end - 1, 'ms')}")
+        klines = fetch(start, end - 1)
+        if not klines:
+            return None
+        window = KlineBuffer.from_klines(klines, capacity=len(klines)).window()
+        closed = window.column('close_time') < now
+        if not closed.all():
+            end = min(end, int(window.column('open_time')[~closed].min()))
+            window = KlineWindow({name: window.column(name)[closed] for name in FIELD_NAMES})
+        self.store(symbol, interval, window)
+        return end
+
+    def get(self, symbol, interval, start_str, end_str=None, fetch=None):
+        """
+        Closed candles for a range, downloading only what the cache is missing
+
+        Args:
+            symbol: Trading pair, e.g. 'LAYERUSDT'
+            interval: Kline interval, e.g. '15m'
+            start_str: First open time: ms, a date string or a relative date
+                such as "30 days ago" (as for get_historical_klines)
+            end_str: Last open time (same formats), None for now
+            fetch: fetch(start_ms, end_ms) -> raw klines with open times in
+                [start_ms, end_ms] (e.g. BinanceClient.get_historical_klines);
+                not called when the cache covers the range or in offline mode
+
+        Returns:
+            KlineWindow: Typed columns of the candles, chronological
+        """
+        now = int(time.time() * 1000)
+        start = _to_ms(start_str)
+        end = min(_to_ms(end_str) if end_str else now, now)
+        stop = end + 1
+
+        coverage = self.coverage(symbol, interval)
+        if coverage is None:
+            missing = [(start, stop)]
+        else:
+            covered_start, covered_end = coverage
+            missing = []
+            if start < covered_start:
+                missing.append((start, covered_start))
+            # A tail shorter than one candle cannot hold a closed candle yet
+            if stop - covered_end >= TIMEFRAME_MS.get(interval, 1):
+                missing.append((covered_end, stop))
+
+        if missing and (self.offline or fetch is None):
+            logger.warning(f"Kline cache is missing {symbol} {interval} candles for the requested range "
+                           f"(offline), using the cached candles only")
+        elif missing:
+            for lo, hi in missing:
+                try:
+                    stored_end = self._download(symbol, interval, lo, hi, fetch, now)
+                except Exception as e:
+                    # e.g. no network: the cached candles are still usable
+                    logger.warning(f"Kline download failed, using the cached candles only: {e}")
+                    break
+                if stored_end is None:
+                    logger.warning(f"No {symbol} {interval} candles downloaded for "
+                                   f"{np.datetime64(lo, 'ms')} - {np.datetime64(hi - 1, 'ms')}")
+                    continue
+                # Both ranges touch the covered one, so coverage stays contiguous
+                if coverage is None:
+                    coverage = (lo, stored_end)
+                elif lo < coverage[0]:
+                    coverage = (lo, coverage[1])
+                else:
+                    coverage = (coverage[0], max(coverage[1], stored_end))
+                self._set_coverage(symbol, interval, *coverage)
+
+        window = self.load(symbol, interval, start, end)
+        logger.info(f"Kline cache: {len(window)} {symbol} {interval} candles")
+        return window
@@ -0,0 +1,185 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Kline fields stored by the buffer, in Binance API order ('ignore' is dropped)
+KLINE_FIELDS = (
+    ('open_time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+    ('close_time', np.int64),
+    ('quote_asset_volume', np.float64),
+    ('number_of_trades', np.int64),
+    ('taker_buy_base_asset_volume', np.float64),
+    ('taker_buy_quote_asset_volume', np.float64),
+)
+FIELD_NAMES = tuple(name for name, _ in KLINE_FIELDS)
+
+
+class KlineWindow:
+    """
+    Read-only chronological view over the candles of a KlineBuffer.
+
+    Columns are NumPy views into the buffer (no copy), so a window is only
+    valid until the next append to the buffer - copy what you need to keep.
+    """
+    def __init__(self, columns):
+        self._columns = columns
+
+    def __len__(self):
+        return len(self._columns['open_time'])
+
+    def __getitem__(self, index):
+        """Candle at `index` as a list in Binance kline format (numeric values)"""
+        row = [self._columns[name][index].item() for name in FIELD_NAMES]
+        row.append(0)  # 'ignore'
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def column(self, name):
+        """Read-only array view of one field"""
+        return self._columns[name]
+
+    def to_frame(self):
+        """
+        DataFrame with the same columns and dtypes as TradingStrategy.prepare_data,
+        built straight from the arrays (no string parsing). The data is copied.
+        """
+        df = pd.DataFrame({name: np.array(values) for name, values in self._columns.items()})
+        df['ignore'] = 0
+        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
+        df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
+        return df
+
+
+class KlineBuffer:
+    """
+    Fixed-capacity, column-oriented ring buffer of candles.
+
+    Every field is stored twice in an array of 2 * capacity elements (at i and
+    i + capacity), so the last `len(buffer)` candles are always one contiguous
+    slice in chronological order. Appends and in-place updates of the latest
+    candle are O(1), and reads are zero-copy views.
+    """
+    def __init__(self, capacity=200):
+        if capacity < 1:
+            raise ValueError("KlineBuffer capacity must be at least 1")
+        self.capacity = capacity
+        self._data = {name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in KLINE_FIELDS}
+        self._start = 0
+        self._size = 0
+
+    @classmethod
+    def from_klines(cls, klines, capacity=200):
+        """Build a buffer from raw klines (Binance API lists or websocket dicts)"""
+        buffer = cls(capacity)
+        buffer.extend(klines)
+        return buffer
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        """Candle at `index` (negative indexes count from the latest) in Binance kline format"""
+        return self.window()[index]
+
+    def __iter__(self):
+        return iter(self.window())
+
+    @staticmethod
+    def _values(kline):
+        """Field values of a Binance API kline list or a websocket kline dict"""
+        if isinstance(kline, dict):
+            return [kline.get(name, 0) for name in FIELD_NAMES]
+        return kline[:len(FIELD_NAMES)]
+
+    def _write(self, position, kline):
+        for (name, dtype), value in zip(KLINE_FIELDS, self._values(kline)):
+            # int(float(...)) accepts both "123" and "123.0" style strings
+            value = int(float(value)) if dtype is np.int64 else float(value)
+            self._data[name][position] = value
+            self._data[name][position + self.capacity] = value
+
+    def append(self, kline):
+        """Add a candle after the latest one, dropping the oldest candle when full"""
+        if self._size < self.capacity:
+            position = (self._start + self._size) % self.capacity
+            self._size += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._write(position, kline)
+
+    def update_last(self, kline):
+        """Overwrite the latest candle in place"""
+        if self._size == 0:
+            self.append(kline)
+            return
+        self._write((self._start + self._size - 1) % self.capacity, kline)
+
+    def upsert(self, kline):
+        """
+        Replace the latest candle if `kline` has the same open time, append it
+        if it is newer, and ignore it if it is older.
+
+        Returns:
+            bool: True if the candle was stored
+        """
+        open_time = int(float(self._values(kline)[0]))
+        last_open_time = self.last_open_time
+        if last_open_time is not None and open_time == last_open_time:
+            self.update_last(kline)
+        elif last_open_time is None or open_time > last_open_time:
+            self.append(kline)
+        else:
+            logger.debug(f"Ignoring out-of-order candle {open_time} (latest {last_open_time})")
+            return False
+        return True
+
+    def extend(self, klines):
+        """Upsert a sequence of candles in order"""
+        for kline in klines:
+            self.upsert(kline)
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    @property
+    def last_open_time(self):
+        if self._size == 0:
+            return None
+        return int(self._data['open_time'][self._start + self._size - 1])
+
+    def column(self, name, rows=None):
+        """Read-only view of one field for the last `rows` candles (default: all)"""
+        return self.window(rows).column(name)
+
+    def window(self, rows=None):
+        """
+        Chronological zero-copy view of the last `rows` candles (default: all)
+
+        Returns:
+            KlineWindow: Read-only view, valid until the next append
+        """
+        rows = self._size if rows is None else max(0, min(rows, self._size))
+        start = self._start + self._size - rows
+        columns = {}
+        for name, values in self._data.items():
+            view = values[start:start + rows]
+            view.flags.writeable = False
+            columns[name] = view
+        return KlineWindow(columns)
+
+    def to_frame(self, rows=None):
+        """DataFrame of the last `rows` candles in TradingStrategy.prepare_data format"""
+        return self.window(rows).to_frame()
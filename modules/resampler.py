@@ -0,0 +1,242 @@
+import logging
+
+import numpy as np
+
+from modules.kline_store import KlineBuffer, KlineWindow, FIELD_NAMES
+
+logger = logging.getLogger(__name__)
+
+# Candle length per timeframe. Binance aligns these intervals to the UTC epoch,
+# so a candle's bucket is open_time - open_time % length.
+TIMEFRAME_MS = {
+    '1m': 60000, '3m': 180000, '5m': 300000, '15m': 900000, '30m': 1800000,
+    '1h': 3600000, '2h': 7200000, '4h': 14400000, '6h': 21600000,
+    '8h': 28800000, '12h': 43200000, '1d': 86400000
+}
+
+# Fields summed when candles are merged (volume, quote volume, trades, taker volumes)
+SUMMED_FIELDS = ('volume', 'quote_asset_volume', 'number_of_trades',
+                 'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume')
+
+
+def is_aligned(timeframe, base='1m'):
+    """True if `timeframe` candles are whole multiples of `base` candles"""
+    return (timeframe in TIMEFRAME_MS and base in TIMEFRAME_MS and
+            TIMEFRAME_MS[timeframe] % TIMEFRAME_MS[base] == 0)
+
+
+def _candle_dict(kline):
+    """Field dict of a Binance API kline list or a websocket kline dict (numeric values)"""
+    values = KlineBuffer._values(kline)
+    candle = {}
+    for name, value in zip(FIELD_NAMES, values):
+        if name in ('open_time', 'close_time', 'number_of_trades'):
+            candle[name] = int(float(value))
+        else:
+            candle[name] = float(value)
+    return candle
+
+
+def _merge(aggregate, candle):
+    """Candle covering `aggregate` followed by `candle` (aggregate may be None)"""
+    if aggregate is None:
+        return dict(candle)
+    merged = dict(aggregate)
+    merged['high'] = max(aggregate['high'], candle['high'])
+    merged['low'] = min(aggregate['low'], candle['low'])
+    merged['close'] = candle['close']
+    for name in SUMMED_FIELDS:
+        merged[name] = aggregate[name] + candle[name]
+    return merged
+
+
+class CandleResampler:
+    """
+    Builds higher-timeframe candles for one symbol from a single base stream.
+
+    For every timeframe it keeps the merge of the closed base candles of the
+    current bucket; an update merges the in-progress base candle on top of
+    that, so each base update costs O(1) per timeframe whether it is a
+    still-open candle being revised or a closed one. Resampled candles are
+    stored in one KlineBuffer per timeframe, in the same format as candles
+    received from Binance. The first bucket is partial if the base stream
+    starts in the middle of it.
+    """
+    def __init__(self, timeframes=('3m', '5m', '15m', '1h', '4h'), base='1m', capacity=200):
+        """
+        Args:
+            timeframes: Timeframes to build (multiples of `base`)
+            base: Timeframe of the candles fed to update()
+            capacity: Candles kept per timeframe
+        """
+        if base not in TIMEFRAME_MS:
+            raise ValueError(f"Unsupported base timeframe: {base}")
+        self.base = base
+        self.base_ms = TIMEFRAME_MS[base]
+        self.capacity = capacity
+        self.buffers = {}
+        self._length = {}
+        self._bucket = {}  # timeframe -> open time of the bucket being built
+        self._closed = {}  # timeframe -> merge of the bucket's closed base candles
+        self.last_base_open_time = None
+        for timeframe in timeframes:
+            self.add_timeframe(timeframe)
+
+    def add_timeframe(self, timeframe):
+        """
+        Start building `timeframe` candles (from the next base candle on)
+
+        Raises:
+            ValueError: If the timeframe is not a multiple of the base timeframe
+        """
+        if timeframe in self.buffers:
+            return
+        if not is_aligned(timeframe, self.base):
+            raise ValueError(f"{timeframe} candles cannot be built from {self.base} candles")
+        self.buffers[timeframe] = KlineBuffer(self.capacity)
+        self._length[timeframe] = TIMEFRAME_MS[timeframe]
+        self._bucket[timeframe] = None
+        self._closed[timeframe] = None
+
+    @property
+    def timeframes(self):
+        return list(self.buffers)
+
+    def update(self, kline, closed=None):
+        """
+        Feed one base candle (new, revised or closed)
+
+        Args:
+            kline: Base candle as a Binance API list or a websocket kline dict
+            closed: Whether the candle is final (default: the dict's 'is_closed',
+                True for API lists)
+
+        Returns:
+            list: Timeframes whose candle closed with this update
+        """
+        if closed is None:
+            closed = kline.get('is_closed', False) if isinstance(kline, dict) else True
+        candle = _candle_dict(kline)
+        open_time = candle['open_time']
+        if self.last_base_open_time is not None and open_time < self.last_base_open_time:
+            logger.debug(f"Ignoring out-of-order base candle {open_time} (latest {self.last_base_open_time})")
+            return []
+        self.last_base_open_time = open_time
+
+        completed = []
+        for timeframe, buffer in self.buffers.items():
+            length = self._length[timeframe]
+            bucket = open_time - open_time % length
+
+            if self._bucket[timeframe] != bucket:
+                # Missing base candles: the previous bucket is final with what it got
+                if self._bucket[timeframe] is not None and buffer.last_open_time == self._bucket[timeframe]:
+                    completed.append(timeframe)
+                self._bucket[timeframe] = bucket
+                self._closed[timeframe] = None
+
+            resampled = _merge(self._closed[timeframe], candle)
+            resampled['open_time'] = bucket
+            resampled['close_time'] = bucket + length - 1
+            buffer.upsert(resampled)
+
+            if closed:
+                self._closed[timeframe] = resampled
+                if open_time + self.base_ms >= bucket + length:
+                    completed.append(timeframe)
+                    self._bucket[timeframe] = None
+                    self._closed[timeframe] = None
+        return completed
+
+    def extend(self, klines, closed=True):
+        """Feed a sequence of base candles (e.g. REST history) in order"""
+        for kline in klines:
+            self.update(kline, closed)
+
+    def buffer(self, timeframe):
+        """KlineBuffer of `timeframe` candles (the latest may still be open)"""
+        if timeframe not in self.buffers:
+            raise KeyError(f"{timeframe} candles are not being built (add_timeframe first)")
+        return self.buffers[timeframe]
+
+    def klines(self, timeframe, rows=None):
+        """Zero-copy KlineWindow of the last `rows` `timeframe` candles"""
+        return self.buffer(timeframe).window(rows)
+
+    def latest(self, timeframe):
+        """
+        Latest `timeframe` candle in BinanceWebSocketManager's kline_data format
+
+        Returns:
+            dict: 'open_time', 'open', 'high', 'low', 'close', 'volume',
+            'close_time' and 'is_closed', or None before the first candle
+        """
+        buffer = self.buffer(timeframe)
+        if not len(buffer):
+            return None
+        kline = buffer[-1]
+        return {
+            'open_time': kline[0],
+            'open': kline[1],
+            'high': kline[2],
+            'low': kline[3],
+            'close': kline[4],
+            'volume': kline[5],
+            'close_time': kline[6],
+            'is_closed': self._bucket[timeframe] != kline[0]
+        }
+
+
+def resample_klines(klines, timeframe, base='1m', drop_partial=True):
+    """
+    Resample a base kline history (e.g. 1m candles for a backtest) in one pass
+
+    Args:
+        klines: Base candles in Binance API format or a KlineWindow, chronological
+        timeframe: Target timeframe (a multiple of `base`)
+        base: Timeframe of `klines`
+        drop_partial: Drop a last bucket that is still missing base candles
+
+    Returns:
+        list: `timeframe` candles in Binance API format (numeric values)
+    """
+    if not is_aligned(timeframe, base):
+        raise ValueError(f"{timeframe} candles cannot be built from {base} candles")
+    if len(klines) == 0:
+        return []
+
+    if isinstance(klines, KlineWindow):
+        columns = {name: klines.column(name).astype(np.float64) for name in FIELD_NAMES}
+    else:
+        fields = list(zip(*[KlineBuffer._values(kline) for kline in klines]))
+        columns = {name: np.asarray(values, dtype=np.float64) for name, values in zip(FIELD_NAMES, fields)}
+    length = TIMEFRAME_MS[timeframe]
+    open_time = columns['open_time'].astype(np.int64)
+    bucket = open_time - open_time % length
+
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.concatenate((starts[1:], [len(bucket)])) - 1
+    resampled = {
+        'open_time': bucket[starts],
+        'open': columns['open'][starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': columns['close'][ends],
+        'close_time': bucket[starts] + length - 1,
+    }
+    for name in SUMMED_FIELDS:
+        resampled[name] = np.add.reduceat(columns[name], starts)
+
+    count = len(starts)
+    if drop_partial and open_time[-1] + TIMEFRAME_MS[base] < bucket[-1] + length:
+        count -= 1
+
+    result = []
+    for i in range(count):
+        row = []
+        for name in FIELD_NAMES:
+            value = resampled[name][i]
+            row.append(int(value) if name in ('open_time', 'close_time', 'number_of_trades') else float(value))
+        row.append(0)  # 'ignore'
+        result.append(row)
+    return result
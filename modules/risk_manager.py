@@ -1,7 +1,8 @@
 import logging
 import math
 import pandas as pd
-import ta
+from modules.kline_store import KlineBuffer, KlineWindow
+from modules.indicators import IndicatorGraph, Node
 from modules.config import (
     INITIAL_BALANCE, RISK_PER_TRADE, MAX_OPEN_POSITIONS,
     USE_STOP_LOSS, STOP_LOSS_PCT, USE_TAKE_PROFIT, 
@@ -517,7 +518,7 @@ class RiskManager:
             symbol: Trading pair symbol
             side: 'BUY' or 'SELL'
             entry_price: Entry price
-            klines: Optional recent price data for ATR calculation
+            klines: Optional recent price data for ATR calculation (raw klines or a KlineBuffer/KlineWindow)
             
         Returns:
             float: Volatility-adjusted stop loss price
@@ -533,24 +534,26 @@ class RiskManager:
         is_layer = 'LAYER' in symbol
             
         try:
-            # Convert klines to dataframe for ATR calculation
-            df = pd.DataFrame(klines, columns=[
-                'open_time', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_asset_volume', 'number_of_trades',
-                'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
-            ])
-            
-            # Convert string values to numeric
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = pd.to_numeric(df[col])
+            if isinstance(klines, (KlineBuffer, KlineWindow)):
+                # Read the buffer's numeric columns directly
+                df = pd.DataFrame({col: klines.column(col) for col in ['high', 'low', 'close']})
+            else:
+                # Convert klines to dataframe for ATR calculation
+                df = pd.DataFrame(klines, columns=[
+                    'open_time', 'open', 'high', 'low', 'close', 'volume',
+                    'close_time', 'quote_asset_volume', 'number_of_trades',
+                    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+                ])
+                
+                # Convert string values to numeric
+                for col in ['open', 'high', 'low', 'close']:
+                    df[col] = pd.to_numeric(df[col])
                 
             # Calculate ATR
             atr_period = 14
             if len(df) >= atr_period:
-                # Use ta library ATR
-                atr = ta.volatility.average_true_range(
-                    df['high'], df['low'], df['close'], window=atr_period
-                ).iloc[-1]
+                # Same Wilder ATR node the strategies use
+                atr = IndicatorGraph(df).get(Node('atr', window=atr_period))[-1]
                 
                 # Calculate ATR as percentage of price
                 atr_pct = atr / entry_price
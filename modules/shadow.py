@@ -0,0 +1,303 @@
+import itertools
+import json
+import logging
+import multiprocessing
+
+from modules.config import (
+    BACKTEST_INITIAL_BALANCE, BACKTEST_COMMISSION, RISK_PER_TRADE,
+    LEVERAGE, STOP_LOSS_PCT, TAKE_PROFIT_PCT
+)
+from modules.indicators import IndicatorGraph
+from modules.kline_store import KlineBuffer
+from modules.strategies import get_strategy
+
+logger = logging.getLogger(__name__)
+
+
+def expand_variants(strategy_name, grid):
+    """
+    Variant specs for every combination of a parameter grid
+
+    Args:
+        strategy_name: Registered strategy name
+        grid: Parameter name -> list of values
+
+    Returns:
+        list: {'name', 'strategy', 'params'} specs
+    """
+    names = sorted(grid)
+    specs = []
+    for values in itertools.product(*[grid[name] for name in names]):
+        params = dict(zip(names, values))
+        label = ','.join(f'{name}={value}' for name, value in params.items())
+        specs.append({'name': f'{strategy_name}[{label}]', 'strategy': strategy_name, 'params': params})
+    return specs
+
+
+def load_variants(path):
+    """
+    Read variant specs from a JSON file: a list of {'name', 'strategy', 'params'}
+    entries and/or {'strategy', 'grid'} entries expanded with expand_variants
+    """
+    with open(path) as f:
+        entries = json.load(f)
+
+    specs = []
+    for entry in entries:
+        if 'grid' in entry:
+            specs.extend(expand_variants(entry['strategy'], entry['grid']))
+        else:
+            specs.append({
+                'name': entry.get('name') or entry['strategy'],
+                'strategy': entry['strategy'],
+                'params': entry.get('params', {})
+            })
+    return specs
+
+
+class ShadowVariant:
+    """
+    One paper-traded strategy variant.
+
+    Signals open (or flip) a simulated position at the candle close, sized
+    like the backtest (RISK_PER_TRADE of the balance at LEVERAGE), and the
+    position is closed at STOP_LOSS_PCT / TAKE_PROFIT_PCT when a later
+    candle's range reaches them (stop first). Closed trades feed the
+    strategy's own cool-off counter.
+    """
+    def __init__(self, spec):
+        self.name = spec['name']
+        self.strategy_name = spec['strategy']
+        self.params = spec.get('params', {})
+        self.strategy = get_strategy(self.strategy_name, **self.params)
+        self.balance = BACKTEST_INITIAL_BALANCE
+        self.side = None
+        self.entry_price = 0.0
+        self.quantity = 0.0
+        self.trades = 0
+        self.wins = 0
+        self.realized_pnl = 0.0
+        self.last_price = None
+        self.last_signal = None
+
+    @property
+    def unrealized_pnl(self):
+        if self.side is None or self.last_price is None:
+            return 0.0
+        direction = 1 if self.side == 'BUY' else -1
+        return (self.last_price - self.entry_price) * self.quantity * direction
+
+    def _open(self, side, price):
+        self.side = side
+        self.entry_price = price
+        self.quantity = self.balance * RISK_PER_TRADE * LEVERAGE / price
+        self.balance -= price * self.quantity * BACKTEST_COMMISSION
+
+    def _close(self, price):
+        direction = 1 if self.side == 'BUY' else -1
+        pnl = (price - self.entry_price) * self.quantity * direction
+        pnl -= price * self.quantity * BACKTEST_COMMISSION
+        self.balance += pnl
+        self.realized_pnl += pnl
+        self.trades += 1
+        self.wins += int(pnl > 0)
+        self.strategy.update_trade_result(pnl > 0)
+        self.side = None
+        self.quantity = 0.0
+
+    def on_candle(self, high, low, close, signal):
+        """Apply one closed candle and the variant's signal for it"""
+        if self.side is not None:
+            direction = 1 if self.side == 'BUY' else -1
+            stop = self.entry_price * (1 - direction * STOP_LOSS_PCT)
+            target = self.entry_price * (1 + direction * TAKE_PROFIT_PCT)
+            if (low <= stop) if direction == 1 else (high >= stop):
+                self._close(stop)
+            elif (high >= target) if direction == 1 else (low <= target):
+                self._close(target)
+
+        self.last_signal = signal
+        if signal in ('BUY', 'SELL') and signal != self.side:
+            if self.side is not None:
+                self._close(close)
+            self._open(signal, close)
+        self.last_price = close
+
+    def summary(self):
+        return {
+            'name': self.name,
+            'strategy': self.strategy_name,
+            'params': self.params,
+            'balance': self.balance,
+            'equity': self.balance + self.unrealized_pnl,
+            'realized_pnl': self.realized_pnl,
+            'unrealized_pnl': self.unrealized_pnl,
+            'trades': self.trades,
+            'win_rate': self.wins / self.trades * 100 if self.trades else 0.0,
+            'position': self.side,
+            'last_signal': self.last_signal
+        }
+
+
+class ShadowGroup:
+    """
+    Paper variants evaluated in one process on a shared candle history.
+
+    Variants with the same indicator parameters share one indicator frame,
+    and every frame of a candle event is built on one IndicatorGraph, so an
+    EMA, ADX or Bollinger node with the same parameters is computed once for
+    all variants.
+    """
+    def __init__(self, specs, capacity=200):
+        self.klines = KlineBuffer(capacity)
+        self.variants = [ShadowVariant(spec) for spec in specs]
+        self._groups = {}
+        for variant in self.variants:
+            self._groups.setdefault(variant.strategy.indicator_params, []).append(variant)
+
+    def seed(self, klines):
+        """Load the closed candle history"""
+        self.klines.clear()
+        self.klines.extend(klines)
+
+    def on_kline_closed(self, kline):
+        """
+        Evaluate every variant on a newly closed candle
+
+        Returns:
+            list: Variant summaries
+        """
+        self.klines.upsert(kline)
+        if not self.variants:
+            return []
+
+        df = self.variants[0].strategy.prepare_data(self.klines)
+        graph = IndicatorGraph(df)
+        latest = df.iloc[-1]
+        for variants in self._groups.values():
+            frame = variants[0].strategy.add_indicators(df.copy(), graph=graph)
+            for i, variant in enumerate(variants):
+                if i:
+                    # add_indicators set the first variant's Fibonacci levels
+                    variant.strategy.calculate_fibonacci_levels(frame)
+                try:
+                    signal = variant.strategy.evaluate_signal(frame)
+                except Exception as e:
+                    logger.error(f"Shadow variant {variant.name} failed: {e}")
+                    signal = None
+                variant.on_candle(latest['high'], latest['low'], latest['close'], signal)
+        return self.summary()
+
+    def summary(self):
+        return [variant.summary() for variant in self.variants]
+
+
+def _group_worker(conn, specs, capacity):
+    """Shadow process: owns a ShadowGroup and answers ('seed' | 'kline' | 'stop', payload) messages"""
+    # Dozens of variants would flood the log with per-signal info lines
+    logging.getLogger('modules.strategies').setLevel(logging.WARNING)
+    group = ShadowGroup(specs, capacity)
+    while True:
+        command, payload = conn.recv()
+        if command == 'stop':
+            break
+        if command == 'seed':
+            group.seed(payload)
+            conn.send(group.summary())
+        elif command == 'kline':
+            conn.send(group.on_kline_closed(payload))
+    conn.close()
+
+
+class ShadowRunner:
+    """
+    Runs paper-traded strategy variants next to the live strategy on the
+    same closed candles, without any extra market data connection.
+
+    With more than `variants_per_worker` variants and `workers` > 1, variants
+    are split over worker processes that keep their state between candles;
+    variants sharing indicator parameters stay in the same process so they
+    keep sharing indicator frames.
+    """
+    def __init__(self, specs, workers=1, variants_per_worker=16, capacity=200):
+        """
+        Args:
+            specs: Variant specs ({'name', 'strategy', 'params'})
+            workers: Maximum number of worker processes (1 runs in-process)
+            variants_per_worker: Variants one process handles before another is used
+            capacity: Closed candles kept for indicator calculation
+        """
+        self.specs = list(specs)
+        shards = min(max(1, workers), -(-len(self.specs) // variants_per_worker) or 1)
+        self.group = None
+        self.workers = []
+        if shards == 1:
+            self.group = ShadowGroup(self.specs, capacity)
+        else:
+            context = multiprocessing.get_context('spawn')
+            for shard in self._shard(shards):
+                parent, child = context.Pipe()
+                process = context.Process(target=_group_worker, args=(child, shard, capacity), daemon=True)
+                process.start()
+                self.workers.append((process, parent))
+        self.latest = []
+        logger.info(f"Shadow runner: {len(self.specs)} variants in {max(1, len(self.workers))} process(es)")
+
+    def _shard(self, shards):
+        """Split specs into `shards` lists, keeping equal indicator parameters together"""
+        groups = {}
+        for spec in self.specs:
+            key = get_strategy(spec['strategy'], **spec.get('params', {})).indicator_params
+            groups.setdefault(key, []).append(spec)
+        buckets = [[] for _ in range(shards)]
+        for specs in sorted(groups.values(), key=len, reverse=True):
+            min(buckets, key=len).extend(specs)
+        return [bucket for bucket in buckets if bucket]
+
+    def _broadcast(self, command, payload):
+        for _, conn in self.workers:
+            conn.send((command, payload))
+        summaries = []
+        for _, conn in self.workers:
+            summaries.extend(conn.recv())
+        return summaries
+
+    def seed(self, klines):
+        """Load the closed candle history (e.g. the live KlineBuffer without its open candle)"""
+        klines = [list(kline) for kline in klines]
+        if self.group is not None:
+            self.group.seed(klines)
+            self.latest = self.group.summary()
+        else:
+            self.latest = self._broadcast('seed', klines)
+
+    def on_kline_closed(self, kline):
+        """
+        Evaluate all variants on a closed candle
+
+        Args:
+            kline: Closed candle (Binance API list or websocket kline dict)
+
+        Returns:
+            list: Variant summaries
+        """
+        if self.group is not None:
+            self.latest = self.group.on_kline_closed(kline)
+        else:
+            self.latest = self._broadcast('kline', kline)
+        return self.latest
+
+    def leaderboard(self, top=None):
+        """Variant summaries ordered by equity (balance plus open PnL), best first"""
+        ranked = sorted(self.latest, key=lambda summary: summary['equity'], reverse=True)
+        return ranked[:top] if top else ranked
+
+    def stop(self):
+        """Stop the worker processes"""
+        for process, conn in self.workers:
+            try:
+                conn.send(('stop', None))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+        self.workers = []
@@ -0,0 +1,133 @@
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from modules.kline_store import KLINE_FIELDS, FIELD_NAMES, KlineBuffer, KlineWindow
+
+logger = logging.getLogger(__name__)
+
+# Every stored field is 8 bytes wide (int64 or float64)
+ITEM_SIZE = 8
+
+
+class SharedKlineDataset:
+    """
+    Kline history stored once in a shared memory block, column after column.
+
+    The process that creates the dataset owns the block. Pickling the dataset
+    (e.g. as a process pool initializer argument) only sends the block name
+    and row count; the receiving process attaches to the same memory, so
+    workers start without copying or unpickling candles and their memory use
+    does not grow with the history. Attached columns are read-only NumPy
+    views, and frame() wraps them in a DataFrame without copying.
+    """
+    def __init__(self, name, rows, owner=False):
+        self.name = name
+        self.rows = rows
+        self.owner = owner
+        self._shm = self._open(name, create_size=max(1, rows) * ITEM_SIZE * len(KLINE_FIELDS) if owner else None)
+        self._columns = {}
+        for i, (field, dtype) in enumerate(KLINE_FIELDS):
+            column = np.ndarray(rows, dtype=dtype, buffer=self._shm.buf, offset=i * rows * ITEM_SIZE)
+            self._columns[field] = column
+
+    @staticmethod
+    def _open(name, create_size=None):
+        if create_size is not None:
+            return shared_memory.SharedMemory(create=True, size=create_size)
+        try:
+            # Attaching must not hand the block to this process's resource tracker (Python 3.13+)
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            return shared_memory.SharedMemory(name=name)
+
+    @classmethod
+    def create(cls, klines):
+        """
+        Copy a kline history into a new shared memory block
+
+        Args:
+            klines: Raw klines (Binance API lists) or a frame from
+                Backtester.load_historical_data
+
+        Returns:
+            SharedKlineDataset: The owning handle (call unlink() when done)
+        """
+        if isinstance(klines, pd.DataFrame):
+            columns = {}
+            for field, dtype in KLINE_FIELDS:
+                values = klines[field]
+                if field in ('open_time', 'close_time') and pd.api.types.is_datetime64_any_dtype(values):
+                    values = values.to_numpy().astype('datetime64[ms]').astype(np.int64)
+                else:
+                    values = pd.to_numeric(values).to_numpy()
+                columns[field] = values.astype(dtype)
+            rows = len(klines)
+        else:
+            buffer = KlineBuffer.from_klines(klines, capacity=max(1, len(klines)))
+            window = buffer.window()
+            columns = {field: window.column(field) for field in FIELD_NAMES}
+            rows = len(window)
+
+        dataset = cls(None, rows, owner=True)
+        dataset.name = dataset._shm.name
+        for field in FIELD_NAMES:
+            dataset._columns[field][:] = columns[field]
+        for column in dataset._columns.values():
+            column.flags.writeable = False
+        logger.info(f"Shared {rows} candles in {dataset.nbytes / 1024 / 1024:.1f} MB ({dataset.name})")
+        return dataset
+
+    def __getstate__(self):
+        return {'name': self.name, 'rows': self.rows}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], state['rows'])
+        for column in self._columns.values():
+            column.flags.writeable = False
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def nbytes(self):
+        return self.rows * ITEM_SIZE * len(KLINE_FIELDS)
+
+    def column(self, name):
+        """Read-only array view of one field"""
+        return self._columns[name]
+
+    def window(self, start=0, stop=None):
+        """Zero-copy KlineWindow over candles [start, stop)"""
+        return KlineWindow({name: column[start:stop] for name, column in self._columns.items()})
+
+    def frame(self):
+        """
+        DataFrame with the columns of Backtester.load_historical_data (times as
+        datetime64[ms]) whose columns are views of the shared memory
+
+        The frame is read-only: it can be sliced, filtered and passed to a
+        Backtester, but not modified in place.
+        """
+        data = {}
+        for name, column in self._columns.items():
+            data[name] = column.view('datetime64[ms]') if name in ('open_time', 'close_time') else column
+        data['ignore'] = np.zeros(self.rows, dtype=np.int8)
+        return pd.DataFrame(data, copy=False)
+
+    def close(self):
+        """Detach this process from the block"""
+        self._columns = {}
+        try:
+            self._shm.close()
+        except BufferError:
+            # Frames or windows still reference the memory; it is unmapped with them
+            logger.debug(f"Shared candles {self.name} still in use, left mapped")
+
+    def unlink(self):
+        """Detach and free the block (owning process only)"""
+        self.close()
+        if self.owner:
+            self._shm.unlink()
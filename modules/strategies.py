@@ -1,99 +1,360 @@
 import logging
 import numpy as np
 import pandas as pd
-import ta
 import math
 from datetime import datetime, timedelta
-import random
+
+from modules.kline_store import KlineBuffer, KlineWindow
+from modules.cache import IndicatorCache, fingerprint
+from modules.indicators import IndicatorGraph, Node
+from modules.grid_book import GridBook
 
 logger = logging.getLogger(__name__)
 
+# Market condition labels, stored as int8 codes into this tuple
+MARKET_CONDITIONS = ('SIDEWAYS', 'BULLISH', 'BEARISH', 'EXTREME_BULLISH', 'EXTREME_BEARISH', 'SQUEEZE')
+MARKET_CONDITION_CODES = {label: code for code, label in enumerate(MARKET_CONDITIONS)}
+
+# Trend labels, stored as int8 codes into this tuple in compact frames
+TRENDS = ('DOWNTREND', 'UPTREND')
+
+# Compact indicator frames (compact_frame): Supertrend band intermediates and raw
+# kline fields nothing reads are dropped, oscillators and ratios are stored as
+# float32 and flags/directions as int8. Price-level columns stay float64 since
+# they are compared with each other and used for order prices.
+COMPACT_DROP_COLUMNS = (
+    'basic_upper', 'basic_lower', 'final_upper', 'final_lower',
+    'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume',
+    'taker_buy_quote_asset_volume', 'ignore'
+)
+COMPACT_FLOAT32_COLUMNS = (
+    'rsi', 'volume_ratio', 'volume_weighted_rsi', 'atr_pct', 'adx',
+    'di_plus', 'di_minus', 'bb_width'
+)
+COMPACT_INT8_COLUMNS = ('supertrend_direction', 'macd_crossover', 'potential_reversal')
+
+# Trade signals as int8 codes (generate_signals) and back
+SIGNAL_CODES = {'BUY': 1, 'SELL': -1}
+SIGNAL_LABELS = {1: 'BUY', -1: 'SELL', 0: None}
+
+# Stage of the signal cascade that produced a signal
+SIGNAL_STAGES = ('NONE', 'V_REVERSAL', 'SQUEEZE_BREAKOUT', 'MULTI_INDICATOR', 'MARKET_CONDITION')
+
+
+def supertrend_step(prev_close, price, basic_upper, basic_lower, prev_upper, prev_lower, prev_supertrend):
+    """
+    One step of the Supertrend band recursion.
+    
+    Returns:
+        tuple: (final_upper, final_lower, supertrend, direction) for the current candle
+    """
+    # Upper band only moves down unless the previous close broke above it
+    if basic_upper < prev_upper or prev_close > prev_upper:
+        upper = basic_upper
+    else:
+        upper = prev_upper
+    # Lower band only moves up unless the previous close broke below it
+    if basic_lower > prev_lower or prev_close < prev_lower:
+        lower = basic_lower
+    else:
+        lower = prev_lower
+    
+    if prev_supertrend == prev_upper and price <= upper:
+        return upper, lower, upper, -1.0  # Downtrend
+    elif prev_supertrend == prev_upper and price > upper:
+        return upper, lower, lower, 1.0  # Uptrend
+    elif prev_supertrend == prev_lower and price >= lower:
+        return upper, lower, lower, 1.0  # Uptrend
+    elif prev_supertrend == prev_lower and price < lower:
+        return upper, lower, upper, -1.0  # Downtrend
+    # Undefined (NaN inputs), stays undefined
+    return upper, lower, float('nan'), float('nan')
+
+
+def supertrend_kernel(close, basic_upper, basic_lower, period):
+    """
+    Single pass Supertrend band recursion over contiguous float64 arrays.
+    
+    Args:
+        close: Close prices
+        basic_upper: Basic upper band ((high + low) / 2 + multiplier * ATR)
+        basic_lower: Basic lower band ((high + low) / 2 - multiplier * ATR)
+        period: First row that carries a Supertrend value
+        
+    Returns:
+        tuple: (supertrend, direction, final_upper, final_lower) float64 arrays,
+        NaN before `period` and wherever the band recursion is undefined
+    """
+    n = len(close)
+    supertrend = np.full(n, np.nan)
+    direction = np.full(n, np.nan)
+    final_upper = np.full(n, np.nan)
+    final_lower = np.full(n, np.nan)
+    
+    if n <= period:
+        return supertrend, direction, final_upper, final_lower
+    
+    # Scalar reads from Python lists are much cheaper than NumPy item access
+    c = close.tolist()
+    bu = basic_upper.tolist()
+    bl = basic_lower.tolist()
+    
+    # Initial bands and trend direction
+    fu = bu[period]
+    fl = bl[period]
+    if c[period] <= fu:
+        st, d = fu, -1.0  # Downtrend
+    else:
+        st, d = fl, 1.0  # Uptrend
+    final_upper[period] = fu
+    final_lower[period] = fl
+    supertrend[period] = st
+    direction[period] = d
+    
+    for i in range(period + 1, n):
+        fu, fl, st, d = supertrend_step(c[i - 1], c[i], bu[i], bl[i], fu, fl, st)
+        final_upper[i] = fu
+        final_lower[i] = fl
+        supertrend[i] = st
+        direction[i] = d
+    
+    return supertrend, direction, final_upper, final_lower
+
+
+def session_cumsum(day, *columns):
+    """
+    Cumulative sums of each column that restart whenever `day` changes.
+    
+    Rows are laid out as a (sessions x candles-per-session) matrix padded with
+    zeros and accumulated along each row, so every session is summed in order
+    from its first candle - the same result as a per-day cumsum, without
+    iterating over the days in Python.
+    
+    Args:
+        day: Array of session keys (e.g. datetime64[D]), sorted by time
+        *columns: float64 arrays of the same length as `day`
+        
+    Returns:
+        tuple: One float64 array of running session sums per column
+    """
+    n = len(day)
+    if n == 0:
+        return tuple(np.zeros(0) for _ in columns)
+    
+    is_start = np.empty(n, dtype=bool)
+    is_start[0] = True
+    is_start[1:] = day[1:] != day[:-1]
+    starts = np.flatnonzero(is_start)
+    session = np.cumsum(is_start) - 1
+    position = np.arange(n) - starts[session]
+    width = int(position.max()) + 1
+    
+    sums = []
+    for values in columns:
+        matrix = np.zeros((len(starts), width))
+        matrix[session, position] = values
+        sums.append(np.cumsum(matrix, axis=1)[session, position])
+    return tuple(sums)
+
+
+class SessionVWAP:
+    """
+    Incremental session VWAP for the live bot.
+    
+    Carries the running price*volume and volume sums of the current UTC day
+    between calls, so each closed candle updates VWAP in O(1). Values match
+    LayerDynamicGridStrategy.calculate_vwap on the same candles.
+    """
+    MS_PER_DAY = 86400000
+    
+    def __init__(self):
+        self.reset()
+        
+    def reset(self):
+        """Forget all running sums"""
+        self.day = None
+        self.last_open_time = None
+        self.cum_vol_price = 0.0
+        self.cum_vol = 0.0
+        # Sums before the latest candle, so a re-delivered candle replaces itself
+        self._prev_vol_price = 0.0
+        self._prev_vol = 0.0
+        
+    def seed(self, df):
+        """Initialise the running sums from a prepared OHLCV DataFrame sorted by open_time"""
+        self.reset()
+        if len(df) == 0:
+            return
+            
+        open_time = df['open_time'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+        day = open_time // self.MS_PER_DAY
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        cum_vol_price, cum_vol = session_cumsum(day, close * volume, volume)
+        
+        self.day = int(day[-1])
+        self.last_open_time = int(open_time[-1])
+        self.cum_vol_price = float(cum_vol_price[-1])
+        self.cum_vol = float(cum_vol[-1])
+        if len(df) > 1 and day[-2] == day[-1]:
+            self._prev_vol_price = float(cum_vol_price[-2])
+            self._prev_vol = float(cum_vol[-2])
+            
+    def update(self, open_time, close, volume):
+        """
+        Add one candle to the running session sums.
+        
+        Args:
+            open_time: Candle open time in milliseconds
+            close: Close price
+            volume: Candle volume
+            
+        Returns:
+            float: Current session VWAP
+        """
+        open_time = int(open_time)
+        if self.last_open_time is not None and open_time < self.last_open_time:
+            logger.debug(f"Ignoring out-of-order candle {open_time} for session VWAP")
+            return self.value
+            
+        if open_time == self.last_open_time:
+            # Same candle delivered again (e.g. its final close) - replace its contribution
+            self.cum_vol_price = self._prev_vol_price
+            self.cum_vol = self._prev_vol
+        elif open_time // self.MS_PER_DAY != self.day:
+            # New UTC day - reset the session
+            self.day = open_time // self.MS_PER_DAY
+            self.cum_vol_price = 0.0
+            self.cum_vol = 0.0
+            
+        self._prev_vol_price = self.cum_vol_price
+        self._prev_vol = self.cum_vol
+        self.cum_vol_price += close * volume
+        self.cum_vol += volume
+        self.last_open_time = open_time
+        
+        return self.value
+        
+    @property
+    def value(self):
+        """Current session VWAP (NaN before any volume has traded)"""
+        if not self.cum_vol:
+            return float('nan')
+        return self.cum_vol_price / self.cum_vol
+
+
 class SupertrendIndicator:
     """Supertrend indicator implementation for faster trend detection"""
     def __init__(self, period=10, multiplier=3.0):
         self.period = period
         self.multiplier = multiplier
         
-    def calculate(self, df):
-        """Calculate Supertrend indicator"""
-        # Calculate ATR
-        df['atr'] = ta.volatility.average_true_range(
-            df['high'], df['low'], df['close'], window=self.period
-        )
+    def calculate(self, df, graph=None):
+        """
+        Calculate Supertrend indicator
+        
+        Args:
+            df: DataFrame with high, low and close
+            graph: Optional IndicatorGraph over `df` to share the ATR with other indicators
+        """
+        if graph is None:
+            graph = IndicatorGraph(df)
+        
+        # Calculate ATR (stored under a period-qualified name, e.g. atr_10)
+        atr_column = f'atr_{self.period}'
+        df[atr_column] = graph.get(Node('atr', window=self.period))
         
         # Calculate basic upper and lower bands
-        df['basic_upper'] = (df['high'] + df['low']) / 2 + (self.multiplier * df['atr'])
-        df['basic_lower'] = (df['high'] + df['low']) / 2 - (self.multiplier * df['atr'])
-        
-        # Initialize Supertrend columns
-        df['supertrend'] = np.nan
-        df['supertrend_direction'] = np.nan
-        df['final_upper'] = np.nan
-        df['final_lower'] = np.nan
-        
-        # Calculate final upper and lower bands
-        for i in range(self.period, len(df)):
-            if i == self.period:
-                # Using .loc to properly set values
-                df.loc[df.index[i], 'final_upper'] = df['basic_upper'].iloc[i]
-                df.loc[df.index[i], 'final_lower'] = df['basic_lower'].iloc[i]
-                
-                # Initial trend direction
-                if df['close'].iloc[i] <= df['final_upper'].iloc[i]:
-                    df.loc[df.index[i], 'supertrend'] = df['final_upper'].iloc[i]
-                    df.loc[df.index[i], 'supertrend_direction'] = -1  # Downtrend
-                else:
-                    df.loc[df.index[i], 'supertrend'] = df['final_lower'].iloc[i]
-                    df.loc[df.index[i], 'supertrend_direction'] = 1  # Uptrend
-            else:
-                # Calculate upper band
-                if (df['basic_upper'].iloc[i] < df['final_upper'].iloc[i-1] or 
-                    df['close'].iloc[i-1] > df['final_upper'].iloc[i-1]):
-                    df.loc[df.index[i], 'final_upper'] = df['basic_upper'].iloc[i]
-                else:
-                    df.loc[df.index[i], 'final_upper'] = df['final_upper'].iloc[i-1]
-                
-                # Calculate lower band
-                if (df['basic_lower'].iloc[i] > df['final_lower'].iloc[i-1] or 
-                    df['close'].iloc[i-1] < df['final_lower'].iloc[i-1]):
-                    df.loc[df.index[i], 'final_lower'] = df['basic_lower'].iloc[i]
-                else:
-                    df.loc[df.index[i], 'final_lower'] = df['final_lower'].iloc[i-1]
-                
-                # Calculate Supertrend value
-                if (df['supertrend'].iloc[i-1] == df['final_upper'].iloc[i-1] and 
-                    df['close'].iloc[i] <= df['final_upper'].iloc[i]):
-                    df.loc[df.index[i], 'supertrend'] = df['final_upper'].iloc[i]
-                    df.loc[df.index[i], 'supertrend_direction'] = -1  # Downtrend
-                elif (df['supertrend'].iloc[i-1] == df['final_upper'].iloc[i-1] and 
-                      df['close'].iloc[i] > df['final_upper'].iloc[i]):
-                    df.loc[df.index[i], 'supertrend'] = df['final_lower'].iloc[i]
-                    df.loc[df.index[i], 'supertrend_direction'] = 1  # Uptrend
-                elif (df['supertrend'].iloc[i-1] == df['final_lower'].iloc[i-1] and 
-                      df['close'].iloc[i] >= df['final_lower'].iloc[i]):
-                    df.loc[df.index[i], 'supertrend'] = df['final_lower'].iloc[i]
-                    df.loc[df.index[i], 'supertrend_direction'] = 1  # Uptrend
-                elif (df['supertrend'].iloc[i-1] == df['final_lower'].iloc[i-1] and 
-                      df['close'].iloc[i] < df['final_lower'].iloc[i]):
-                    df.loc[df.index[i], 'supertrend'] = df['final_upper'].iloc[i]
-                    df.loc[df.index[i], 'supertrend_direction'] = -1  # Downtrend
+        df['basic_upper'] = (df['high'] + df['low']) / 2 + (self.multiplier * df[atr_column])
+        df['basic_lower'] = (df['high'] + df['low']) / 2 - (self.multiplier * df[atr_column])
+        
+        # Calculate final bands and Supertrend on plain arrays
+        supertrend, direction, final_upper, final_lower = supertrend_kernel(
+            df['close'].to_numpy(dtype=np.float64),
+            df['basic_upper'].to_numpy(dtype=np.float64),
+            df['basic_lower'].to_numpy(dtype=np.float64),
+            self.period
+        )
+        df['supertrend'] = supertrend
+        df['supertrend_direction'] = direction
+        df['final_upper'] = final_upper
+        df['final_lower'] = final_lower
         
         return df
 
+def near_level(levels, price, tolerance):
+    """
+    Whether any level of an ascending array is within `tolerance` (relative
+    to `price`) of `price`. Only the two levels around price can be nearest,
+    so this is one binary search.
+    """
+    index = np.searchsorted(levels, price)
+    for candidate in (index - 1, index):
+        if 0 <= candidate < len(levels) and abs(price - levels[candidate]) / price < tolerance:
+            return True
+    return False
+
+
+def snap_to_level(levels, price, tolerance, highest=True):
+    """
+    Snap `price` to a level of an ascending array within `tolerance` (relative
+    to `price`)
+    
+    Args:
+        levels: Ascending level prices
+        price: Price to snap
+        tolerance: Maximum relative distance
+        highest: Pick the highest matching level, otherwise the lowest
+        
+    Returns:
+        float: The matching level, or `price` if no level is close enough
+    """
+    def close(index):
+        return abs(levels[index] - price) / price < tolerance
+    
+    # Matching levels form one contiguous run around price
+    index = np.searchsorted(levels, price)
+    if highest:
+        if index < len(levels) and close(index):
+            while index + 1 < len(levels) and close(index + 1):
+                index += 1
+            return levels[index]
+        if index > 0 and close(index - 1):
+            return levels[index - 1]
+    else:
+        if index > 0 and close(index - 1):
+            while index - 2 >= 0 and close(index - 2):
+                index -= 1
+            return levels[index - 1]
+        if index < len(levels) and close(index):
+            return levels[index]
+    return price
+
+
 class TradingStrategy:
     """Base class for trading strategies"""
     def __init__(self, strategy_name):
         self.strategy_name = strategy_name
         self.risk_manager = None
-        # Add cache related attributes
-        self._cache = {}
-        self._max_cache_entries = 10  # Limit cache size
-        self._cache_expiry = 3600  # Cache expiry in seconds (1 hour)
-        self._last_kline_time = None
-        self._cached_dataframe = None
+        # Finished indicator frames keyed by kline content and strategy parameters
+        self.indicator_cache = IndicatorCache()
+        
+        # Running session VWAP sums for O(1) live updates
+        self.session_vwap = SessionVWAP()
+        
+        # CandleResampler with higher-timeframe candles built from the 1m stream
+        self.candle_resampler = None
         
     def prepare_data(self, klines):
-        """Convert raw klines to a DataFrame with OHLCV data"""
+        """Convert raw klines (or a KlineBuffer) to a DataFrame with OHLCV data"""
+        if isinstance(klines, (KlineBuffer, KlineWindow)):
+            # Already numeric and in chronological order
+            return klines.to_frame()
+        if isinstance(klines, pd.DataFrame):
+            # A prepared kline frame (e.g. Backtester.load_historical_data); a
+            # copy-on-write copy, so adding indicator columns leaves it untouched
+            return klines.reset_index(drop=True)
+        
         df = pd.DataFrame(klines, columns=[
             'open_time', 'open', 'high', 'low', 'close', 'volume',
             'close_time', 'quote_asset_volume', 'number_of_trades',
@@ -113,6 +374,22 @@ class TradingStrategy:
         
         return df
     
+    def reset_state(self):
+        """Forget the state of a previous run so the instance can be reused"""
+        self.session_vwap.reset()
+    
+    def get_timeframe_klines(self, timeframe, rows=None):
+        """
+        Candles of another timeframe built from the 1m stream (see CandleResampler)
+        
+        Returns:
+            KlineWindow: The last `rows` candles (the latest may still be open),
+            or None if no resampler is attached or it does not build `timeframe`
+        """
+        if self.candle_resampler is None or timeframe not in self.candle_resampler.timeframes:
+            return None
+        return self.candle_resampler.klines(timeframe, rows)
+    
     def set_risk_manager(self, risk_manager):
         """Set the risk manager for the strategy"""
         self.risk_manager = risk_manager
@@ -167,6 +444,7 @@ class LayerDynamicGridStrategy(TradingStrategy):
                  supertrend_period=10,
                  supertrend_multiplier=3.0,
                  fibonacci_levels=[0.236, 0.382, 0.5, 0.618, 0.786],
+                 fibonacci_extensions=[1.272, 1.618, 2.0],
                  squeeze_threshold=0.5,
                  cooloff_period=3,
                  max_consecutive_losses=2):
@@ -196,148 +474,116 @@ class LayerDynamicGridStrategy(TradingStrategy):
         self.supertrend_period = supertrend_period
         self.supertrend_multiplier = supertrend_multiplier
         self.fibonacci_levels = fibonacci_levels
+        self.fibonacci_extensions = fibonacci_extensions
         self.squeeze_threshold = squeeze_threshold
         self.cooloff_period = cooloff_period
         self.max_consecutive_losses = max_consecutive_losses
         
         # State variables
-        self.grids = None
+        self.grids = None  # GridBook of the current grid levels
         self.current_trend = None
         self.current_market_condition = None
         self.last_grid_update = None
         self.consecutive_losses = 0
         self.last_loss_time = None
-        self.fib_support_levels = []
-        self.fib_resistance_levels = []
+        self.fib_support_levels = np.empty(0)  # Ascending
+        self.fib_resistance_levels = np.empty(0)  # Ascending
+        self._fib_key = None  # (swing high, swing low, trend) the cached levels belong to
+        self._fib_retracements = None
+        self._fib_extensions = None
         self.position_size_pct = 1.0  # Default position size percentage
+        self.trigger_prices = None  # Intrabar trigger prices published after each candle close
+        self._trigger_levels = None  # (GridBook, buy index, sell index) behind the trigger prices
+        self.resting_grid_orders = False  # Levels rest on the exchange as limit orders (GridExecutor)
+        self.compact_indicators = False  # calculate_indicators returns compact_frame output
         
-        # Cached indicators to avoid recalculation
-        self._last_kline_time = None
-        self._cached_dataframe = None
         self.supertrend_indicator = SupertrendIndicator(
             period=self.supertrend_period,
             multiplier=self.supertrend_multiplier
         )
         
-    def prepare_data(self, klines):
+        # Incremental indicator state for live trading (created on first seed)
+        self.indicator_engine = None
+        
+    def reset_state(self):
         """
-        Convert raw klines to a DataFrame with OHLCV data
-        Overrides base method to implement enhanced caching for performance
-        """
-        # Generate a cache key based on first and last kline timestamps
-        cache_key = None
-        if len(klines) > 0:
-            cache_key = f"{klines[0][0]}_{klines[-1][0]}"
-        
-        # Check if we can use cached data
-        if cache_key:
-            current_time = int(datetime.now().timestamp())
-            
-            # Clean up expired cache entries periodically
-            if random.random() < 0.05:  # 5% chance to clean on each call
-                expired_keys = []
-                for k, v in self._cache.items():
-                    if current_time - v.get('time', 0) > self._cache_expiry:
-                        expired_keys.append(k)
-                for k in expired_keys:
-                    del self._cache[k]
-                    logger.debug(f"Removed expired cache entry: {k}")
-            
-            # Look for cache entry
-            if cache_key in self._cache:
-                cache_entry = self._cache[cache_key]
-                cache_time = cache_entry.get('time', 0)
-                
-                # Check if cache is still valid (not expired)
-                if current_time - cache_time < self._cache_expiry:
-                    logger.debug(f"Using cached data for {cache_key}")
-                    return cache_entry['data']
-        
-        # Fall back to simple cache check if complex caching fails
-        if len(klines) > 0 and self._last_kline_time == klines[-1][0]:
-            if self._cached_dataframe is not None:
-                return self._cached_dataframe
-            
-        # Otherwise prepare data normally
-        df = super().prepare_data(klines)
-        
-        # Cache the result
-        if len(klines) > 0:
-            # Simple caching (backward compatible)
-            self._last_kline_time = klines[-1][0]
-            self._cached_dataframe = df
-            
-            # Enhanced caching with expiry and size management
-            if cache_key:
-                # Manage cache size - remove oldest entry if needed
-                if len(self._cache) >= self._max_cache_entries:
-                    oldest_key = min(self._cache.keys(), 
-                                    key=lambda k: self._cache[k].get('time', 0))
-                    del self._cache[oldest_key]
-                    logger.debug(f"Cache full, removed oldest entry {oldest_key}")
-                
-                # Store in cache with timestamp
-                self._cache[cache_key] = {
-                    'data': df,
-                    'time': current_time
-                }
-                logger.debug(f"Cached data for {cache_key}")
-            
-        return df
-    
-    def add_indicators(self, df):
-        """Add technical indicators to the DataFrame with enhanced features"""
+        Clear the trading state (grids, trend, cool-off, Fibonacci and trigger
+        levels, streaming indicators) so a pooled instance can start a new run.
+        Parameters and the content-keyed indicator cache are kept.
+        """
+        super().reset_state()
+        self.grids = None
+        self.current_trend = None
+        self.current_market_condition = None
+        self.last_grid_update = None
+        self.consecutive_losses = 0
+        self.last_loss_time = None
+        self.fib_support_levels = np.empty(0)
+        self.fib_resistance_levels = np.empty(0)
+        self._fib_key = None
+        self._fib_retracements = None
+        self._fib_extensions = None
+        self.position_size_pct = 1.0
+        self.trigger_prices = None
+        self._trigger_levels = None
+        self.indicator_engine = None
+        
+    def add_indicators(self, df, graph=None):
+        """
+        Add technical indicators to the DataFrame with enhanced features
+        
+        Indicators are evaluated on an IndicatorGraph, so shared inputs (true
+        range, EMAs of close) are computed once. The `atr` column is the
+        volatility_lookback ATR; Supertrend's ATR is in `atr_<supertrend_period>`.
+        
+        A `graph` over the same candles lets several strategies share
+        indicator nodes with equal parameters.
+        """
+        if graph is None:
+            graph = IndicatorGraph(df)
+        
         # Trend indicators
-        df['ema_fast'] = ta.trend.ema_indicator(df['close'], 
-                                               window=self.trend_ema_fast)
-        df['ema_slow'] = ta.trend.ema_indicator(df['close'], 
-                                               window=self.trend_ema_slow)
+        df['ema_fast'] = graph.get(Node('ema', source='close', span=self.trend_ema_fast))
+        df['ema_slow'] = graph.get(Node('ema', source='close', span=self.trend_ema_slow))
         
         # Add Supertrend indicator for faster trend detection
-        df = self.supertrend_indicator.calculate(df)
+        df = self.supertrend_indicator.calculate(df, graph)
         df['trend'] = np.where(df['supertrend_direction'] == 1, 'UPTREND', 'DOWNTREND')
         
         # Momentum indicators
-        df['rsi'] = ta.momentum.rsi(df['close'], window=self.rsi_period)
+        df['rsi'] = graph.get(Node('rsi', window=self.rsi_period))
         
         # Volume indicators first to avoid duplicate calculation
-        df['volume_ma'] = ta.trend.sma_indicator(df['volume'], 
-                                                window=self.volume_ma_period)
+        df['volume_ma'] = graph.get(Node('sma', source='volume', window=self.volume_ma_period))
         df['volume_ratio'] = df['volume'] / df['volume_ma']
         
         # Volume-weighted RSI (using the volume_ratio calculated above)
         df['volume_weighted_rsi'] = df['rsi'] * df['volume_ratio']
         
         # Volatility indicators
-        df['atr'] = ta.volatility.average_true_range(df['high'], df['low'], 
-                                                    df['close'], 
-                                                    window=self.volatility_lookback)
+        df['atr'] = graph.get(Node('atr', window=self.volatility_lookback))
         df['atr_pct'] = df['atr'] / df['close'] * 100
         
         # ADX for trend strength
-        adx_indicator = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], 
-                                             window=self.adx_period)
-        df['adx'] = adx_indicator.adx()
-        df['di_plus'] = adx_indicator.adx_pos()
-        df['di_minus'] = adx_indicator.adx_neg()
+        adx = graph.get(Node('adx', window=self.adx_period))
+        df['adx'] = adx['adx']
+        df['di_plus'] = adx['di_plus']
+        df['di_minus'] = adx['di_minus']
         
         # Bollinger Bands
-        indicator_bb = ta.volatility.BollingerBands(df['close'], 
-                                                   window=20, 
-                                                   window_dev=2)
-        df['bb_upper'] = indicator_bb.bollinger_hband()
-        df['bb_middle'] = indicator_bb.bollinger_mavg()
-        df['bb_lower'] = indicator_bb.bollinger_lband()
+        bollinger = graph.get(Node('bollinger', window=20, window_dev=2))
+        df['bb_upper'] = bollinger['upper']
+        df['bb_middle'] = bollinger['middle']
+        df['bb_lower'] = bollinger['lower']
         df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
         
         # Bollinger Band Squeeze detection
         df['bb_squeeze'] = df['bb_width'] < self.squeeze_threshold
         
         # MACD for additional trend confirmation
-        macd = ta.trend.MACD(df['close'], window_slow=26, window_fast=12, window_sign=9)
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-        df['macd_diff'] = macd.macd_diff()
+        df['macd'] = graph.get(Node('macd', fast=12, slow=26))
+        df['macd_signal'] = graph.get(Node('macd_signal', fast=12, slow=26, signal=9))
+        df['macd_diff'] = df['macd'] - df['macd_signal']
         df['macd_crossover'] = np.where(
             (df['macd'].shift(1) < df['macd_signal'].shift(1)) & 
             (df['macd'] > df['macd_signal']), 
@@ -363,225 +609,205 @@ class LayerDynamicGridStrategy(TradingStrategy):
         return df
     
     def calculate_vwap(self, df):
-        """Calculate VWAP (Volume Weighted Average Price)"""
-        # Get date component of timestamp for grouping
-        df['date'] = df['open_time'].dt.date
-        
-        # Calculate VWAP for each day
-        vwap = pd.Series(index=df.index)
-        for date, group in df.groupby('date'):
-            # Calculate cumulative sum of price * volume
-            cum_vol_price = (group['close'] * group['volume']).cumsum()
-            # Calculate cumulative sum of volume
-            cum_vol = group['volume'].cumsum()
-            # Calculate VWAP
-            daily_vwap = cum_vol_price / cum_vol
-            # Add to result series
-            vwap.loc[group.index] = daily_vwap
-            
-        return vwap
+        """
+        Calculate VWAP (Volume Weighted Average Price)
+        
+        Session VWAP that resets at every UTC day boundary, computed with a
+        reset-on-day cumulative sum over NumPy arrays (no per-day groupby loop
+        and no helper column left on the frame).
+        """
+        day = df['open_time'].to_numpy().astype('datetime64[D]')
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        
+        cum_vol_price, cum_vol = session_cumsum(day, close * volume, volume)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = cum_vol_price / cum_vol
+            
+        return pd.Series(vwap, index=df.index)
     
     def calculate_fibonacci_levels(self, df):
-        """Calculate Fibonacci retracement/extension levels for support and resistance"""
+        """
+        Calculate Fibonacci retracement/extension levels for support and resistance
+        
+        Levels are kept as ascending arrays in fib_support_levels and
+        fib_resistance_levels. They only depend on the swing high/low and the
+        trend, so they are recomputed when one of those changes; otherwise the
+        cached levels are just split around the current price.
+        """
         if len(df) < 20:  # Need sufficient data
             return
         
         # Find recent swing high and low points
         window = min(100, len(df) - 1)  # Look back window
-        price_data = df['close'].iloc[-window:]
+        price_data = df['close'].to_numpy()[-window:]
         
         # Identify swing high and low
         swing_high = price_data.max()
         swing_low = price_data.min()
         
-        # Reset fibonacci levels
-        self.fib_support_levels = []
-        self.fib_resistance_levels = []
-        
-        # Calculate levels based on trend
         latest = df.iloc[-1]
         current_price = latest['close']
         current_trend = latest['trend']
-        
-        if current_trend == 'UPTREND':
-            # In uptrend, calculate fib retracements from low to high for support
-            for fib in self.fibonacci_levels:
-                level = swing_low + (swing_high - swing_low) * (1 - fib)
-                if level < current_price:
-                    self.fib_support_levels.append(level)
-                else:
-                    self.fib_resistance_levels.append(level)
-                    
-            # Add extension levels for resistance
-            for ext in [1.272, 1.618, 2.0]:
-                level = swing_low + (swing_high - swing_low) * ext
-                self.fib_resistance_levels.append(level)
-                
-        else:  # DOWNTREND
-            # In downtrend, calculate fib retracements from high to low for resistance
-            for fib in self.fibonacci_levels:
-                level = swing_high - (swing_high - swing_low) * fib
-                if level > current_price:
-                    self.fib_resistance_levels.append(level)
-                else:
-                    self.fib_support_levels.append(level)
-                    
-            # Add extension levels for support
-            for ext in [1.272, 1.618, 2.0]:
-                level = swing_high - (swing_high - swing_low) * ext
-                self.fib_support_levels.append(level)
-        
-        # Sort the levels
-        self.fib_support_levels.sort(reverse=True)  # Descending
-        self.fib_resistance_levels.sort()  # Ascending
+        uptrend = current_trend == 'UPTREND'
+        
+        key = (swing_high, swing_low, uptrend)
+        if key != self._fib_key:
+            swing_range = swing_high - swing_low
+            fibs = np.asarray(self.fibonacci_levels, dtype=np.float64)
+            extensions = np.asarray(self.fibonacci_extensions, dtype=np.float64)
+            if uptrend:
+                # In uptrend, retracements from low to high, extensions above
+                retracements = swing_low + swing_range * (1 - fibs)
+                extensions = swing_low + swing_range * extensions
+            else:
+                # In downtrend, retracements from high to low, extensions below
+                retracements = swing_high - swing_range * fibs
+                extensions = swing_high - swing_range * extensions
+            self._fib_retracements = np.sort(retracements)
+            self._fib_extensions = np.sort(extensions)
+            self._fib_key = key
+        
+        retracements = self._fib_retracements
+        if uptrend:
+            # Retracements below price are support, extensions are resistance
+            split = np.searchsorted(retracements, current_price, side='left')
+            self.fib_support_levels = retracements[:split]
+            self.fib_resistance_levels = np.sort(np.concatenate((retracements[split:], self._fib_extensions)))
+        else:
+            # Retracements above price are resistance, extensions are support
+            split = np.searchsorted(retracements, current_price, side='right')
+            self.fib_support_levels = np.sort(np.concatenate((retracements[:split], self._fib_extensions)))
+            self.fib_resistance_levels = retracements[split:]
     
     def detect_reversal_patterns(self, df):
         """
         Enhanced reversal pattern detection
         Returns 1 for potential bullish reversal, -1 for bearish reversal, 0 for no reversal
+        
+        Each pattern is evaluated once over the whole history on shifted arrays
+        (curr = row i, prev1 = row i-1, prev2 = row i-2) starting at row 4.
+        Bullish patterns take precedence over bearish ones on the same candle.
         """
         if len(df) < 5:
             return pd.Series(0, index=df.index)
-            
-        # Initialize result series
-        reversal = pd.Series(0, index=df.index)
-        
-        for i in range(4, len(df)):
-            # Get relevant rows for pattern detection
-            curr = df.iloc[i]
-            prev1 = df.iloc[i-1]
-            prev2 = df.iloc[i-2]
-            prev3 = df.iloc[i-3]
-            
-            # Check for bullish reversal patterns
-            bullish_reversal = False
-            
-            # Bullish engulfing
-            if (curr['close'] > curr['open'] and  # Current candle is bullish
-                prev1['close'] < prev1['open'] and  # Previous candle is bearish
-                curr['close'] > prev1['open'] and  # Current close above prev open
-                curr['open'] < prev1['close']):  # Current open below prev close
-                bullish_reversal = True
-                
-            # Hammer pattern (bullish)
-            elif (curr['low'] < curr['open'] and
-                  curr['low'] < curr['close'] and
-                  (curr['high'] - max(curr['open'], curr['close'])) < 
-                  (min(curr['open'], curr['close']) - curr['low']) * 2 and
-                  (min(curr['open'], curr['close']) - curr['low']) > 
-                  (curr['high'] - max(curr['open'], curr['close'])) * 3):
-                bullish_reversal = True
-                
-            # RSI divergence (bullish)
-            elif (prev2['low'] > prev1['low'] and  # Price making lower low
-                  prev2['rsi'] < prev1['rsi'] and  # RSI making higher low
-                  curr['supertrend_direction'] == 1):  # Confirmed by Supertrend
-                bullish_reversal = True
-                
-            # Check for bearish reversal patterns
-            bearish_reversal = False
-            
-            # Bearish engulfing
-            if (curr['close'] < curr['open'] and  # Current candle is bearish
-                prev1['close'] > prev1['open'] and  # Previous candle is bullish
-                curr['close'] < prev1['open'] and  # Current close below prev open
-                curr['open'] > prev1['close']):  # Current open above prev close
-                bearish_reversal = True
-                
-            # Shooting star (bearish)
-            elif (curr['high'] > curr['open'] and
-                  curr['high'] > curr['close'] and
-                  (curr['high'] - max(curr['open'], curr['close'])) > 
-                  (min(curr['open'], curr['close']) - curr['low']) * 2 and
-                  (curr['high'] - max(curr['open'], curr['close'])) > 
-                  (min(curr['open'], curr['close']) - curr['low']) * 3):
-                bearish_reversal = True
-                
-            # RSI divergence (bearish)
-            elif (prev2['high'] < prev1['high'] and  # Price making higher high
-                  prev2['rsi'] > prev1['rsi'] and  # RSI making lower high
-                  curr['supertrend_direction'] == -1):  # Confirmed by Supertrend
-                bearish_reversal = True
-            
-            # Set reversal value
-            if bullish_reversal:
-                reversal.iloc[i] = 1
-            elif bearish_reversal:
-                reversal.iloc[i] = -1
-                
-        return reversal
+        
+        open_ = df['open'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+        rsi = df['rsi'].to_numpy(dtype=np.float64)
+        supertrend_dir = df['supertrend_direction'].to_numpy(dtype=np.float64)
+        
+        # Current candle (rows 4..n-1) and the candles before it
+        c_open, c_high, c_low, c_close = open_[4:], high[4:], low[4:], close[4:]
+        p1_open, p1_high, p1_low, p1_close, p1_rsi = open_[3:-1], high[3:-1], low[3:-1], close[3:-1], rsi[3:-1]
+        p2_high, p2_low, p2_rsi = high[2:-2], low[2:-2], rsi[2:-2]
+        c_dir = supertrend_dir[4:]
+        
+        # Same tie/NaN behaviour as Python's max(open, close) / min(open, close)
+        body_top = np.where(c_close > c_open, c_close, c_open)
+        body_bottom = np.where(c_close < c_open, c_close, c_open)
+        upper_wick = c_high - body_top
+        lower_wick = body_bottom - c_low
+        
+        # Bullish engulfing
+        bullish_engulfing = ((c_close > c_open) & (p1_close < p1_open) &
+                             (c_close > p1_open) & (c_open < p1_close))
+        # Hammer pattern (bullish)
+        hammer = ((c_low < c_open) & (c_low < c_close) &
+                  (upper_wick < lower_wick * 2) & (lower_wick > upper_wick * 3))
+        # RSI divergence (bullish): lower low in price, higher low in RSI, confirmed by Supertrend
+        bullish_divergence = (p2_low > p1_low) & (p2_rsi < p1_rsi) & (c_dir == 1)
+        bullish_reversal = bullish_engulfing | hammer | bullish_divergence
+        
+        # Bearish engulfing
+        bearish_engulfing = ((c_close < c_open) & (p1_close > p1_open) &
+                             (c_close < p1_open) & (c_open > p1_close))
+        # Shooting star (bearish)
+        shooting_star = ((c_high > c_open) & (c_high > c_close) &
+                         (upper_wick > lower_wick * 2) & (upper_wick > lower_wick * 3))
+        # RSI divergence (bearish): higher high in price, lower high in RSI, confirmed by Supertrend
+        bearish_divergence = (p2_high < p1_high) & (p2_rsi > p1_rsi) & (c_dir == -1)
+        bearish_reversal = bearish_engulfing | shooting_star | bearish_divergence
+        
+        reversal = np.zeros(len(df), dtype=np.int64)
+        reversal[4:] = np.where(bullish_reversal, 1, np.where(bearish_reversal, -1, 0))
+        
+        return pd.Series(reversal, index=df.index)
     
-    def classify_market_condition(self, df):
+    def classify_market_condition(self, df, trend_adx_factor=1.0, extreme_adx_factor=1.5,
+                                  extreme_di_factor=1.5, bullish_rsi=50, bearish_rsi=50,
+                                  squeeze_factor=1.0):
         """
         Improved market condition classification with better sideways detection
+        
+        The rule cascade is evaluated on whole columns with np.select; the first
+        matching rule wins, exactly as in a row-by-row if/elif chain. Labels are
+        stored as int8 codes into MARKET_CONDITIONS and returned as a categorical.
+        
+        Args:
+            df: DataFrame with adx, di_plus, di_minus, rsi, bb_width and supertrend_direction
+            trend_adx_factor: Multiplier on adx_threshold for strong trend confirmation
+            extreme_adx_factor: Multiplier on adx_threshold for extreme trends
+            extreme_di_factor: Required DI dominance ratio for extreme trends
+            bullish_rsi: RSI level above which a strong bullish trend is confirmed
+            bearish_rsi: RSI level below which a strong bearish trend is confirmed
+            squeeze_factor: Multiplier on squeeze_threshold for squeeze detection
+            
+        Returns:
+            pd.Series: Categorical market condition per row
         """
-        conditions = []
+        n = len(df)
+        adx = df['adx'].to_numpy(dtype=np.float64)
+        di_plus = df['di_plus'].to_numpy(dtype=np.float64)
+        di_minus = df['di_minus'].to_numpy(dtype=np.float64)
+        rsi = df['rsi'].to_numpy(dtype=np.float64)
+        bb_width = df['bb_width'].to_numpy(dtype=np.float64)
+        supertrend_dir = df['supertrend_direction'].to_numpy(dtype=np.float64, copy=True)
+        supertrend_dir[:self.supertrend_period] = 0
+        if 'macd_crossover' in df:
+            macd_crossover = df['macd_crossover'].to_numpy(dtype=np.float64)
+        else:
+            macd_crossover = np.zeros(n)
         
-        for i in range(len(df)):
-            if i < self.adx_period:
-                conditions.append('SIDEWAYS')  # Default for initial rows
-                continue
-                
-            # Get relevant indicators
-            adx = df['adx'].iloc[i]
-            di_plus = df['di_plus'].iloc[i]
-            di_minus = df['di_minus'].iloc[i]
-            rsi = df['rsi'].iloc[i]
-            bb_width = df['bb_width'].iloc[i]
-            supertrend_dir = df['supertrend_direction'].iloc[i] if i >= self.supertrend_period else 0
-            macd_crossover = df['macd_crossover'].iloc[i] if 'macd_crossover' in df else 0
-            
-            # Check for squeeze condition (low volatility, potential breakout)
-            is_squeeze = bb_width < self.squeeze_threshold
-            
-            # Enhanced condition classification with multi-indicator confirmation
+        trending = adx > self.adx_threshold * trend_adx_factor
+        extreme = adx > self.adx_threshold * extreme_adx_factor
+        st_up = supertrend_dir > 0
+        st_down = supertrend_dir < 0
+        
+        # Ordered rule cascade, first match wins
+        rules = [
             # Strong bullish trend confirmation
-            if (adx > self.adx_threshold and 
-                di_plus > di_minus and 
-                supertrend_dir > 0 and
-                (rsi > 50 or macd_crossover > 0)):
-                conditions.append('BULLISH')
-                
+            (trending & (di_plus > di_minus) & st_up & ((rsi > bullish_rsi) | (macd_crossover > 0)), 'BULLISH'),
             # Strong bearish trend confirmation
-            elif (adx > self.adx_threshold and 
-                  di_minus > di_plus and 
-                  supertrend_dir < 0 and
-                  (rsi < 50 or macd_crossover < 0)):
-                conditions.append('BEARISH')
-                
+            (trending & (di_minus > di_plus) & st_down & ((rsi < bearish_rsi) | (macd_crossover < 0)), 'BEARISH'),
             # Extreme bullish trend
-            elif (adx > self.adx_threshold * 1.5 and 
-                  di_plus > di_minus * 1.5 and 
-                  supertrend_dir > 0):
-                conditions.append('EXTREME_BULLISH')
-                
+            (extreme & (di_plus > di_minus * extreme_di_factor) & st_up, 'EXTREME_BULLISH'),
             # Extreme bearish trend
-            elif (adx > self.adx_threshold * 1.5 and 
-                  di_minus > di_plus * 1.5 and 
-                  supertrend_dir < 0):
-                conditions.append('EXTREME_BEARISH')
-                
+            (extreme & (di_minus > di_plus * extreme_di_factor) & st_down, 'EXTREME_BEARISH'),
             # Squeeze condition (potential breakout)
-            elif is_squeeze:
-                conditions.append('SQUEEZE')
-                
+            (bb_width < self.squeeze_threshold * squeeze_factor, 'SQUEEZE'),
             # Weak trend or consolidation
-            elif adx < self.sideways_threshold:
-                conditions.append('SIDEWAYS')
-                
+            (adx < self.sideways_threshold, 'SIDEWAYS'),
             # Moderate bullish trend
-            elif di_plus > di_minus and supertrend_dir > 0:
-                conditions.append('BULLISH')
-                
+            ((di_plus > di_minus) & st_up, 'BULLISH'),
             # Moderate bearish trend
-            elif di_minus > di_plus and supertrend_dir < 0:
-                conditions.append('BEARISH')
-                
-            # Default to sideways if no clear condition
-            else:
-                conditions.append('SIDEWAYS')
-        
-        return pd.Series(conditions, index=df.index)
+            ((di_minus > di_plus) & st_down, 'BEARISH'),
+        ]
+        codes = np.select(
+            [mask for mask, _ in rules],
+            [MARKET_CONDITION_CODES[label] for _, label in rules],
+            default=MARKET_CONDITION_CODES['SIDEWAYS']
+        ).astype(np.int8)
+        
+        # Default for initial rows
+        codes[:self.adx_period] = MARKET_CONDITION_CODES['SIDEWAYS']
+        
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=MARKET_CONDITIONS),
+            index=df.index
+        )
     
     def calculate_dynamic_position_size(self, df, base_position=1.0):
         """
@@ -743,7 +969,8 @@ class LayerDynamicGridStrategy(TradingStrategy):
         dynamic_grid_levels = self.calculate_dynamic_grid_levels(df)
         
         # Generate grid levels
-        grid_levels = []
+        grid_prices = []
+        grid_sides = []
         
         # Calculate number of levels above and below current price
         levels_above = int(dynamic_grid_levels * grid_bias)
@@ -754,45 +981,25 @@ class LayerDynamicGridStrategy(TradingStrategy):
             # Base grid price
             base_grid_price = current_price * (1 - (dynamic_spacing / 100) * i)
             
-            # Check if any Fibonacci support level is nearby
-            grid_price = base_grid_price
-            for support_level in self.fib_support_levels:
-                # If within 1% of a Fibonacci level, snap to it
-                if abs(support_level - base_grid_price) / base_grid_price < 0.01:
-                    grid_price = support_level
-                    break
-            
-            grid_levels.append({
-                'price': grid_price,
-                'type': 'BUY',
-                'status': 'ACTIVE',
-                'created_at': latest['open_time']
-            })
+            # If within 1% of a Fibonacci support level, snap to the highest such level
+            grid_price = snap_to_level(self.fib_support_levels, base_grid_price, 0.01, highest=True)
+            
+            grid_prices.append(grid_price)
+            grid_sides.append('BUY')
         
         # Generate grid levels above current price
         for i in range(1, levels_above + 1):
             # Base grid price
             base_grid_price = current_price * (1 + (dynamic_spacing / 100) * i)
             
-            # Check if any Fibonacci resistance level is nearby
-            grid_price = base_grid_price
-            for resistance_level in self.fib_resistance_levels:
-                # If within 1% of a Fibonacci level, snap to it
-                if abs(resistance_level - base_grid_price) / base_grid_price < 0.01:
-                    grid_price = resistance_level
-                    break
+            # If within 1% of a Fibonacci resistance level, snap to the lowest such level
+            grid_price = snap_to_level(self.fib_resistance_levels, base_grid_price, 0.01, highest=False)
             
-            grid_levels.append({
-                'price': grid_price,
-                'type': 'SELL',
-                'status': 'ACTIVE',
-                'created_at': latest['open_time']
-            })
-        
-        # Sort grid levels by price
-        grid_levels.sort(key=lambda x: x['price'])
+            grid_prices.append(grid_price)
+            grid_sides.append('SELL')
         
-        return grid_levels
+        # The book keeps the levels sorted by price
+        return GridBook(grid_prices, grid_sides, latest['open_time'])
     
     def should_update_grids(self, df):
         """Enhanced grid reset logic"""
@@ -827,8 +1034,8 @@ class LayerDynamicGridStrategy(TradingStrategy):
             
         # Check if price moved significantly outside grid range (auto-reset)
         current_price = latest['close']
-        min_grid = min(grid['price'] for grid in self.grids)
-        max_grid = max(grid['price'] for grid in self.grids)
+        min_grid = self.grids.min_price
+        max_grid = self.grids.max_price
         
         # If price is outside grid range by more than 2%, update grids
         if current_price < min_grid * 0.98 or current_price > max_grid * 1.02:
@@ -836,8 +1043,7 @@ class LayerDynamicGridStrategy(TradingStrategy):
             return True
             
         # Check if many grid levels have been triggered
-        active_grids = [grid for grid in self.grids if grid['status'] == 'ACTIVE']
-        if len(active_grids) < len(self.grids) * 0.3:  # Less than 30% active
+        if self.grids.active_count < len(self.grids) * 0.3:  # Less than 30% active
             logger.info(f"Too many grid levels have been triggered. Refreshing grid.")
             return True
             
@@ -1014,8 +1220,8 @@ class LayerDynamicGridStrategy(TradingStrategy):
             bearish_signals += 1  # At resistance
         
         # Fibonacci levels (higher weight)
-        close_to_fib_support = any(abs(latest['close'] - level) / latest['close'] < 0.005 for level in self.fib_support_levels)
-        close_to_fib_resistance = any(abs(latest['close'] - level) / latest['close'] < 0.005 for level in self.fib_resistance_levels)
+        close_to_fib_support = near_level(self.fib_support_levels, latest['close'], 0.005)
+        close_to_fib_resistance = near_level(self.fib_resistance_levels, latest['close'], 0.005)
         
         if close_to_fib_support:
             bullish_signals += 1.5  # Strong support
@@ -1079,26 +1285,18 @@ class LayerDynamicGridStrategy(TradingStrategy):
             logger.info(f"Generated new grids for {self.current_market_condition} market condition")
             return None  # No signal on grid initialization
         
-        # Find the nearest grid levels
-        buy_grids = [grid for grid in self.grids if grid['type'] == 'BUY' and grid['status'] == 'ACTIVE']
-        sell_grids = [grid for grid in self.grids if grid['type'] == 'SELL' and grid['status'] == 'ACTIVE']
-        
-        # Find closest buy and sell grids
-        closest_buy = None
-        closest_sell = None
+        # Resting limit orders fill the levels on the exchange
+        if self.resting_grid_orders:
+            return None
         
-        if buy_grids:
-            closest_buy = max(buy_grids, key=lambda x: x['price'])
-            
-        if sell_grids:
-            closest_sell = min(sell_grids, key=lambda x: x['price'])
+        # Find closest buy and sell grids (highest active buy, lowest active sell)
+        closest_buy = self.grids.closest_buy()
+        closest_sell = self.grids.closest_sell()
         
         # Determine signal based on price position relative to grids
-        if closest_buy and current_price <= closest_buy['price'] * 1.001:
+        if closest_buy is not None and current_price <= self.grids.prices[closest_buy] * 1.001:
             # Mark this grid as triggered
-            for grid in self.grids:
-                if grid['price'] == closest_buy['price']:
-                    grid['status'] = 'TRIGGERED'
+            self.grids.trigger(closest_buy)
                     
             # Update position size for risk manager
             if self.risk_manager:
@@ -1108,11 +1306,9 @@ class LayerDynamicGridStrategy(TradingStrategy):
             
             return 'BUY'
             
-        elif closest_sell and current_price >= closest_sell['price'] * 0.999:
+        elif closest_sell is not None and current_price >= self.grids.prices[closest_sell] * 0.999:
             # Mark this grid as triggered
-            for grid in self.grids:
-                if grid['price'] == closest_sell['price']:
-                    grid['status'] = 'TRIGGERED'
+            self.grids.trigger(closest_sell)
                     
             # Update position size for risk manager
             if self.risk_manager:
@@ -1282,14 +1478,225 @@ class LayerDynamicGridStrategy(TradingStrategy):
                 
         return None
     
-    def get_signal(self, klines):
+    @property
+    def signal_lookback(self):
         """
-        Enhanced signal generation integrating all the new features
+        Number of trailing candles read when evaluating the latest candle.
+        The Fibonacci swing window needs the last 100 closes plus the current one.
+        """
+        return max(101, self.trend_ema_slow + 5)
+    
+    @property
+    def indicator_params(self):
+        """Parameters that change the output of add_indicators (part of the cache key)"""
+        return (
+            type(self).__name__, self.trend_ema_fast, self.trend_ema_slow,
+            self.supertrend_period, self.supertrend_multiplier, self.rsi_period,
+            self.volume_ma_period, self.volatility_lookback, self.adx_period,
+            self.adx_threshold, self.sideways_threshold, self.squeeze_threshold
+        )
+    
+    def compact_frame(self, df):
+        """
+        Shrink an indicator frame: drop COMPACT_DROP_COLUMNS, store
+        COMPACT_FLOAT32_COLUMNS as float32, COMPACT_INT8_COLUMNS as int8
+        (Supertrend's NaN warm-up direction becomes 0) and `trend` as an int8
+        coded categorical, so row values still read as 'UPTREND'/'DOWNTREND'
+        
+        Returns:
+            pd.DataFrame: Compact frame (same index and row order)
+        """
+        df = df.drop(columns=[col for col in COMPACT_DROP_COLUMNS if col in df])
+        for col in COMPACT_FLOAT32_COLUMNS:
+            if col in df:
+                df[col] = df[col].astype(np.float32)
+        for col in COMPACT_INT8_COLUMNS:
+            if col in df:
+                df[col] = df[col].fillna(0).astype(np.int8)
+        if 'trend' in df:
+            codes = (df['trend'].to_numpy() == 'UPTREND').astype(np.int8)
+            df['trend'] = pd.Categorical.from_codes(codes, categories=TRENDS)
+        return df
+    
+    def calculate_indicators(self, klines):
+        """
+        Prepare klines and add indicators, reusing a cached frame when the same
+        candles (by content, including the still-open last candle) were already
+        processed with the same parameters
+        
+        Args:
+            klines: Raw klines, a KlineBuffer or a KlineWindow
+        
+        Returns:
+            pd.DataFrame: Indicator frame (a copy - safe to modify), compacted
+            with compact_frame when compact_indicators is set
         """
-        # Prepare and add indicators to the data
         df = self.prepare_data(klines)
+        params = self.indicator_params
+        if self.compact_indicators:
+            params += ('compact',)
+        key = fingerprint(df, ['open_time', 'open', 'high', 'low', 'close', 'volume'], params)
+        
+        cached = self.indicator_cache.get(key)
+        if cached is not None:
+            # add_indicators also sets the Fibonacci levels - restore them for this frame
+            self.calculate_fibonacci_levels(cached)
+            return cached
+        
         df = self.add_indicators(df)
+        if self.compact_indicators:
+            df = self.compact_frame(df)
+        self.indicator_cache.put(key, df)
+        return df
+    
+    def seed_indicator_engine(self, klines):
+        """
+        Build the streaming indicator state from a kline history
+        
+        Args:
+            klines: Raw klines in Binance API format (e.g. the REST history)
+        """
+        from modules.streaming import StreamingIndicatorEngine
+        
+        if self.indicator_engine is None:
+            self.indicator_engine = StreamingIndicatorEngine(self)
+        self.indicator_engine.seed(klines)
+    
+    def update_indicator_engine(self, kline):
+        """
+        Feed one closed candle to the streaming indicator state
+        
+        Returns:
+            dict: Latest indicator row, or None if the engine is not seeded
+        """
+        if self.indicator_engine is None:
+            return None
+        return self.indicator_engine.update(kline)
+    
+    def check_indicator_drift(self, klines, rows=10, tolerance=1e-3):
+        """
+        Compare the streaming indicators with a full recalculation on `klines`
+        and reseed the engine if they diverged
         
+        Returns:
+            dict: Drift report, or None if the engine is not seeded
+        """
+        if self.indicator_engine is None:
+            return None
+        
+        report = self.indicator_engine.check_drift(klines, rows, tolerance)
+        if not report['ok']:
+            logger.warning("Reseeding streaming indicators after drift check failure")
+            self.indicator_engine.seed(klines)
+        return report
+    
+    def get_signal(self, klines):
+        """
+        Enhanced signal generation integrating all the new features
+        
+        Uses the streaming indicator tail when the engine is in sync with
+        `klines`, otherwise recalculates indicators over the whole history.
+        """
+        if self.indicator_engine is not None and self.indicator_engine.in_sync(klines):
+            df = self.indicator_engine.tail()
+            self.calculate_fibonacci_levels(df)
+        else:
+            df = self.calculate_indicators(klines)
+        
+        signal = self.evaluate_signal(df)
+        self.update_trigger_prices(df)
+        return signal
+    
+    def update_trigger_prices(self, df):
+        """
+        Precompute the prices whose crossing before the next candle close
+        produces a signal, so ticks can be checked in O(1): the next active grid
+        buy/sell level (with get_grid_signal's 0.1% tolerance) and, in sideways
+        markets, the Bollinger/VWAP thresholds of get_sideways_signal
+        
+        Args:
+            df: DataFrame with indicators, ending at the candle that just closed
+            
+        Returns:
+            dict: 'buy_below' and 'sell_above' prices, None for a side without a trigger
+        """
+        self.trigger_prices = {'buy_below': None, 'sell_above': None}
+        self._trigger_levels = None
+        if len(df) < self.trend_ema_slow + 5:
+            return self.trigger_prices
+        
+        latest = df.iloc[-1]
+        if self.in_cooloff_period(latest['open_time']):
+            return self.trigger_prices
+        
+        buy_prices = []
+        sell_prices = []
+        if self.grids is not None and len(self.grids) > 0 and not self.resting_grid_orders:
+            buy_index = self.grids.closest_buy()
+            sell_index = self.grids.closest_sell()
+            if buy_index is not None:
+                buy_prices.append(self.grids.prices[buy_index] * 1.001)
+            if sell_index is not None:
+                sell_prices.append(self.grids.prices[sell_index] * 0.999)
+            self._trigger_levels = (self.grids, buy_index, sell_index)
+        
+        if latest['market_condition'] == 'SIDEWAYS':
+            buy_prices.append(min(latest['bb_lower'] * 1.01, latest['vwap']))
+            sell_prices.append(max(latest['bb_upper'] * 0.99, latest['vwap']))
+        
+        # The first level price reaches on its way down (up) is the highest (lowest)
+        buy_prices = [price for price in buy_prices if np.isfinite(price)]
+        sell_prices = [price for price in sell_prices if np.isfinite(price)]
+        if buy_prices:
+            self.trigger_prices['buy_below'] = float(max(buy_prices))
+        if sell_prices:
+            self.trigger_prices['sell_above'] = float(min(sell_prices))
+        return self.trigger_prices
+    
+    def confirm_trigger(self, side, price):
+        """
+        Resolve an intrabar crossing of a published trigger price without
+        recomputing indicators. A crossed grid level is marked as triggered so
+        the next candle close does not act on it again.
+        
+        Args:
+            side: 'BUY' or 'SELL'
+            price: Tick price that crossed the trigger
+            
+        Returns:
+            str: `side` if the trigger is still valid, otherwise None
+        """
+        key = 'buy_below' if side == 'BUY' else 'sell_above'
+        trigger_price = (self.trigger_prices or {}).get(key)
+        if trigger_price is None:
+            return None
+        
+        crossed = price <= trigger_price if side == 'BUY' else price >= trigger_price
+        if not crossed:
+            return None
+        
+        # Each trigger fires at most once per candle
+        self.trigger_prices[key] = None
+        
+        if self.in_cooloff_period(datetime.now()):
+            logger.info(f"In cool-off period after {self.consecutive_losses} consecutive losses. Ignoring {side} trigger.")
+            return None
+        
+        if self._trigger_levels is not None and self._trigger_levels[0] is self.grids:
+            index = self._trigger_levels[1] if side == 'BUY' else self._trigger_levels[2]
+            if index is not None:
+                level = self.grids.prices[index]
+                if (price <= level * 1.001) if side == 'BUY' else (price >= level * 0.999):
+                    self.grids.trigger(index)
+        
+        return side
+    
+    def evaluate_signal(self, df):
+        """
+        Run the signal cascade on a DataFrame that already carries indicators.
+        Only the last `signal_lookback` rows are read, so callers that computed
+        indicators once over a long history can pass a trailing slice.
+        """
         if len(df) < self.trend_ema_slow + 5:
             # Not enough data to generate reliable signals
             return None
@@ -1360,88 +1767,465 @@ class LayerDynamicGridStrategy(TradingStrategy):
                 
         # 6. Default to grid signal if no specialized signal was returned
         return grid_signal
+    
+    def extreme_market_signals(self, df, dip_vwap_factor=1.0, dip_rsi=40,
+                               rally_vwap_factor=1.0, rally_rsi=60):
+        """
+        Vectorized get_extreme_market_signal over every row
+        
+        Args:
+            df: DataFrame with indicators
+            dip_vwap_factor: Buy dips below vwap * factor in EXTREME_BULLISH markets
+            dip_rsi: RSI below which a dip is bought
+            rally_vwap_factor: Sell rallies above vwap * factor in EXTREME_BEARISH markets
+            rally_rsi: RSI above which a rally is sold
+            
+        Returns:
+            np.ndarray: int8 signal codes (1 BUY, -1 SELL, 0 none)
+        """
+        condition = df['market_condition'].cat.codes.to_numpy()
+        close = df['close'].to_numpy(dtype=np.float64)
+        vwap = df['vwap'].to_numpy(dtype=np.float64)
+        rsi = df['rsi'].to_numpy(dtype=np.float64)
+        direction = df['supertrend_direction'].to_numpy(dtype=np.float64)
+        
+        buy = ((condition == MARKET_CONDITION_CODES['EXTREME_BULLISH']) &
+               (close < vwap * dip_vwap_factor) & (direction == 1) & (rsi < dip_rsi))
+        sell = ((condition == MARKET_CONDITION_CODES['EXTREME_BEARISH']) &
+                (close > vwap * rally_vwap_factor) & (direction == -1) & (rsi > rally_rsi))
+        
+        return np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8)
+    
+    def fibonacci_proximity(self, df, tolerance=0.005):
+        """
+        Vectorized Fibonacci checks of get_multi_indicator_signal over every row
+        
+        Each row uses the levels calculate_fibonacci_levels would produce on the
+        history up to that row (swing high/low of the last min(100, row) closes,
+        retracements and extensions oriented by the row's trend).
+        
+        Returns:
+            tuple: (near_support, near_resistance) boolean arrays
+        """
+        n = len(df)
+        close = df['close'].to_numpy(dtype=np.float64)
+        uptrend = (df['trend'] == 'UPTREND').to_numpy()
+        near_support = np.zeros(n, dtype=bool)
+        near_resistance = np.zeros(n, dtype=bool)
+        if n < 20:
+            return near_support, near_resistance
+        
+        # Swing window: closes[i - w + 1 .. i] with w = min(100, i)
+        swing_high = np.full(n, np.nan)
+        swing_low = np.full(n, np.nan)
+        swing_high[1:101] = np.maximum.accumulate(close[1:101])
+        swing_low[1:101] = np.minimum.accumulate(close[1:101])
+        if n > 101:
+            closes = pd.Series(close)
+            swing_high[101:] = closes.rolling(100).max().to_numpy()[101:]
+            swing_low[101:] = closes.rolling(100).min().to_numpy()[101:]
+        swing_range = swing_high - swing_low
+        
+        def near(level):
+            return np.abs(close - level) / close < tolerance
+        
+        for fib in self.fibonacci_levels:
+            # Retracements: below price is support, above is resistance
+            up_level = swing_low + swing_range * (1 - fib)
+            down_level = swing_high - swing_range * fib
+            level = np.where(uptrend, up_level, down_level)
+            is_support = np.where(uptrend, up_level < close, ~(down_level > close))
+            near_support |= near(level) & is_support
+            near_resistance |= near(level) & ~is_support
+        for ext in self.fibonacci_extensions:
+            # Extensions: resistance in uptrends, support in downtrends
+            up_level = swing_low + swing_range * ext
+            down_level = swing_high - swing_range * ext
+            near_resistance |= uptrend & near(up_level)
+            near_support |= ~uptrend & near(down_level)
+        
+        # calculate_fibonacci_levels needs 20 candles
+        near_support[:19] = False
+        near_resistance[:19] = False
+        return near_support, near_resistance
+    
+    def generate_signals(self, df):
+        """
+        Evaluate the signal cascade of evaluate_signal for every row at once
+        
+        The stateless stages (V-reversal, squeeze breakout, multi-indicator
+        scoring, market condition signals) are evaluated as masks over whole
+        columns; each row sees the same values as evaluate_signal on the history
+        up to that row. Grid triggers and the cool-off period depend on earlier
+        trades and are resolved per row by resolve_signal.
+        
+        Args:
+            df: DataFrame with indicators (add_indicators output)
+            
+        Returns:
+            pd.DataFrame: Per row - 'signal' (int8 code of the first stage 1-3
+            signal, otherwise the market condition signal), 'stage', 'needs_grid',
+            'evaluable', the per-stage signals and the multi-indicator scores
+        """
+        n = len(df)
+        codes = MARKET_CONDITION_CODES
+        condition = df['market_condition'].cat.codes.to_numpy()
+        close = df['close'].to_numpy(dtype=np.float64)
+        rsi = df['rsi'].to_numpy(dtype=np.float64)
+        vw_rsi = df['volume_weighted_rsi'].to_numpy(dtype=np.float64)
+        volume_ratio = df['volume_ratio'].to_numpy(dtype=np.float64)
+        vwap = df['vwap'].to_numpy(dtype=np.float64)
+        ema_slow = df['ema_slow'].to_numpy(dtype=np.float64)
+        bb_upper = df['bb_upper'].to_numpy(dtype=np.float64)
+        bb_lower = df['bb_lower'].to_numpy(dtype=np.float64)
+        adx = df['adx'].to_numpy(dtype=np.float64)
+        di_plus = df['di_plus'].to_numpy(dtype=np.float64)
+        di_minus = df['di_minus'].to_numpy(dtype=np.float64)
+        macd = df['macd'].to_numpy(dtype=np.float64)
+        macd_signal = df['macd_signal'].to_numpy(dtype=np.float64)
+        macd_crossover = df['macd_crossover'].to_numpy()
+        reversal = df['potential_reversal'].to_numpy()
+        direction = df['supertrend_direction'].to_numpy(dtype=np.float64)
+        
+        def previous(values, fill):
+            shifted = np.empty_like(values)
+            shifted[:1] = fill
+            shifted[1:] = values[:-1]
+            return shifted
+        
+        prev_condition = previous(condition, -1)
+        prev_direction = previous(direction, np.nan)
+        prev_macd = previous(macd, np.nan)
+        prev_macd_signal = previous(macd_signal, np.nan)
+        
+        extreme_bullish = condition == codes['EXTREME_BULLISH']
+        extreme_bearish = condition == codes['EXTREME_BEARISH']
+        bullish = condition == codes['BULLISH']
+        bearish = condition == codes['BEARISH']
+        
+        # 1. V-shaped reversals in extreme markets
+        reversal_signal = np.where(extreme_bearish & (reversal == 1), 1,
+                                   np.where(extreme_bullish & (reversal == -1), -1, 0))
+        
+        # 2. Breakouts from (or just after) a squeeze on a volume spike
+        in_squeeze = (condition == codes['SQUEEZE']) | (prev_condition == codes['SQUEEZE'])
+        breakout = in_squeeze & (volume_ratio > 1.5)
+        squeeze_signal = np.where(breakout & (close > bb_upper), 1,
+                                  np.where(breakout & (close < bb_lower), -1, 0))
+        
+        # 3. Multi-indicator scoring (same weights and order as get_multi_indicator_signal)
+        up = direction == 1
+        bull = np.where(up, 2.0, 0.0)
+        bear = np.where(up, 0.0, 2.0)
+        above = (close > ema_slow) & (close > vwap)
+        below = ~above & (close < ema_slow) & (close < vwap)
+        bull += np.where(above, 1.5, 0.0)
+        bear += np.where(below, 1.5, 0.0)
+        bull += np.where((prev_direction == -1) & up, 2.0, 0.0)
+        bear += np.where((prev_direction == 1) & (direction == -1), 2.0, 0.0)
+        bull += np.where(rsi < 30, 1.0, 0.0)
+        bear += np.where(~(rsi < 30) & (rsi > 70), 1.0, 0.0)
+        bull += np.where(rsi < 20, 0.5, 0.0)
+        bear += np.where(~(rsi < 20) & (rsi > 80), 0.5, 0.0)
+        bull += np.where(vw_rsi < 25, 1.0, 0.0)
+        bear += np.where(~(vw_rsi < 25) & (vw_rsi > 75), 1.0, 0.0)
+        bull += np.where(macd_crossover == 1, 1.0, 0.0)
+        bear += np.where(macd_crossover == -1, 1.0, 0.0)
+        high_volume = volume_ratio > 1.5
+        bull_leads = bull > bear
+        bear_leads = bear > bull
+        bull += np.where(high_volume & bull_leads, 1.0, 0.0)
+        bear += np.where(high_volume & bear_leads, 1.0, 0.0)
+        plus_leads = di_plus > di_minus
+        trending = adx > self.adx_threshold
+        bull += np.where(trending & plus_leads, 1.0, 0.0)
+        bear += np.where(trending & ~plus_leads, 1.0, 0.0)
+        strong = adx > self.adx_threshold * 1.5
+        bull += np.where(strong & plus_leads, 0.5, 0.0)
+        bear += np.where(strong & ~plus_leads, 0.5, 0.0)
+        below_vwap = close < vwap * 0.98
+        bull += np.where(below_vwap, 0.5, 0.0)
+        bear += np.where(~below_vwap & (close > vwap * 1.02), 0.5, 0.0)
+        at_lower_band = close < bb_lower * 1.01
+        bull += np.where(at_lower_band, 1.0, 0.0)
+        bear += np.where(~at_lower_band & (close > bb_upper * 0.99), 1.0, 0.0)
+        near_support, near_resistance = self.fibonacci_proximity(df)
+        bull += np.where(near_support, 1.5, 0.0)
+        bear += np.where(near_resistance, 1.5, 0.0)
+        
+        bull_threshold = np.full(n, 5.0)
+        bear_threshold = np.full(n, 5.0)
+        trending_up = bullish | extreme_bullish
+        trending_down = bearish | extreme_bearish
+        squeeze = condition == codes['SQUEEZE']
+        bull_threshold += np.where(trending_up, -0.5, np.where(trending_down, 1.0, np.where(squeeze, 0.5, 0.0)))
+        bear_threshold += np.where(trending_up, 1.0, np.where(trending_down, -0.5, np.where(squeeze, 0.5, 0.0)))
+        
+        multi_buy = (bull >= bull_threshold) & (bull > bear * 1.5)
+        multi_sell = (bear >= bear_threshold) & (bear > bull * 1.5)
+        multi_signal = np.where(multi_buy, 1, np.where(multi_sell, -1, 0))
+        
+        # 5. Market condition specific signals
+        macd_cross_up = (prev_macd < prev_macd_signal) & (macd > macd_signal)
+        macd_cross_down = (prev_macd > prev_macd_signal) & (macd < macd_signal)
+        flip_up = (prev_direction == -1) & up
+        flip_down = (prev_direction == 1) & (direction == -1)
+        
+        rsi_oversold = np.where(extreme_bullish, 25, 35)
+        bullish_signal = np.select(
+            [rsi < rsi_oversold,
+             macd_cross_up & (volume_ratio > 1.2),
+             flip_up,
+             (rsi > 80) & (close > bb_upper * 1.01) & (close > vwap * 1.03)],
+            [1, 1, 1, -1], default=0
+        )
+        rsi_overbought = np.where(extreme_bearish, 75, 65)
+        bearish_signal = np.select(
+            [rsi > rsi_overbought,
+             macd_cross_down & (volume_ratio > 1.2),
+             flip_down,
+             (rsi < 20) & (close < bb_lower * 0.99) & (close < vwap * 0.97)],
+            [-1, -1, -1, 1], default=0
+        )
+        sideways_signal = np.select(
+            [(close < bb_lower * 1.01) & (close < vwap),
+             (close > bb_upper * 0.99) & (close > vwap),
+             vw_rsi < 30,
+             vw_rsi > 70],
+            [1, -1, 1, -1], default=0
+        )
+        condition_signal = np.select(
+            [extreme_bullish | extreme_bearish, bullish, bearish, condition == codes['SIDEWAYS']],
+            [self.extreme_market_signals(df), bullish_signal, bearish_signal, sideways_signal],
+            default=0
+        )
+        
+        # Priority cascade: the first of stages 1-3 wins, otherwise the grid
+        # (resolved sequentially) competes with the condition signal
+        evaluable = np.arange(n) >= self.trend_ema_slow + 4
+        stage = np.select(
+            [reversal_signal != 0, squeeze_signal != 0, multi_signal != 0, condition_signal != 0],
+            [1, 2, 3, 4], default=0
+        )
+        stage[~evaluable] = 0
+        signal = np.select(
+            [stage == 1, stage == 2, stage == 3, stage == 4],
+            [reversal_signal, squeeze_signal, multi_signal, condition_signal], default=0
+        )
+        
+        return pd.DataFrame({
+            'signal': signal.astype(np.int8),
+            'stage': stage.astype(np.int8),
+            'needs_grid': evaluable & ((stage == 0) | (stage == 4)),
+            'evaluable': evaluable,
+            'reversal_signal': reversal_signal.astype(np.int8),
+            'squeeze_signal': squeeze_signal.astype(np.int8),
+            'multi_signal': multi_signal.astype(np.int8),
+            'condition_signal': condition_signal.astype(np.int8),
+            'bullish_score': bull,
+            'bearish_score': bear,
+            'bull_threshold': bull_threshold,
+            'bear_threshold': bear_threshold,
+            'near_fib_support': near_support,
+            'near_fib_resistance': near_resistance,
+        }, index=df.index)
+    
+    def resolve_signal(self, df, signal, needs_grid, evaluable=True):
+        """
+        Stateful part of evaluate_signal for the latest row of `df`
+        
+        Applies the risk manager update, the cool-off period and the grid
+        triggers on top of a precomputed generate_signals row.
+        
+        Args:
+            df: Trailing indicator window ending at the row being evaluated
+            signal: The row's 'signal' code from generate_signals
+            needs_grid: The row's 'needs_grid' flag from generate_signals
+            evaluable: The row's 'evaluable' flag from generate_signals
+            
+        Returns:
+            str: 'BUY', 'SELL' or None
+        """
+        if not evaluable:
+            return None
+        
+        latest = df.iloc[-1]
+        market_condition = latest['market_condition']
+        if self.risk_manager:
+            self.risk_manager.set_market_condition(market_condition)
+        
+        if self.in_cooloff_period(latest['open_time']):
+            logger.info(f"In cool-off period after {self.consecutive_losses} consecutive losses. No trading signals.")
+            return None
+        
+        if not needs_grid:
+            # Stage 1-3 signal - the grid is not consulted
+            return SIGNAL_LABELS[int(signal)]
+        
+        # The grid is always updated, even when the condition signal wins
+        self.calculate_fibonacci_levels(df)
+        grid_signal = self.get_grid_signal(df)
+        if signal:
+            return SIGNAL_LABELS[int(signal)]
+        return grid_signal
+
+
+# Strategy name -> factory(**params) returning a new strategy instance
+STRATEGY_REGISTRY = {}
+
+# Strategy used for a symbol when no strategy name is given
+SYMBOL_STRATEGIES = {
+    'LAYERUSDT': 'LayerDynamicGrid',
+    'AVAXUSDT': 'AvaxDynamicGrid'
+}
+
+
+def register_strategy(name, factory=None):
+    """
+    Register a strategy factory under `name`
+    
+    Call it directly (register_strategy('MyGrid', MyGridStrategy)) or use it
+    as a decorator on a strategy class or factory function. The factory is
+    only called when get_strategy asks for `name`, with any parameter
+    overrides as keyword arguments.
+    
+    Returns:
+        The factory, unchanged
+    """
+    def register(factory):
+        if name in STRATEGY_REGISTRY:
+            logger.warning(f"Replacing registered strategy {name}")
+        STRATEGY_REGISTRY[name] = factory
+        return factory
+    
+    if factory is not None:
+        return register(factory)
+    return register
 
 
-# Update the factory function to include only LAYER strategy
-def get_strategy(strategy_name):
-    """Factory function to get a strategy by name"""
-    from modules.config import (
-        # LAYER parameters
-        LAYER_GRID_LEVELS, LAYER_GRID_SPACING_PCT, LAYER_TREND_EMA_FAST, LAYER_TREND_EMA_SLOW,
-        LAYER_VOLATILITY_LOOKBACK, RSI_PERIOD, RSI_OVERBOUGHT, RSI_OVERSOLD,
-        LAYER_VOLUME_MA_PERIOD, LAYER_ADX_PERIOD, LAYER_ADX_THRESHOLD, LAYER_SIDEWAYS_THRESHOLD,
-        LAYER_VOLATILITY_MULTIPLIER, LAYER_TREND_CONDITION_MULTIPLIER,
-        LAYER_MIN_GRID_SPACING, LAYER_MAX_GRID_SPACING,
-        # AVAX parameters
-        AVAX_GRID_LEVELS, AVAX_GRID_SPACING_PCT, AVAX_TREND_EMA_FAST, AVAX_TREND_EMA_SLOW,
-        AVAX_VOLATILITY_LOOKBACK, AVAX_VOLUME_MA_PERIOD, AVAX_ADX_PERIOD, AVAX_ADX_THRESHOLD,
-        AVAX_SIDEWAYS_THRESHOLD, AVAX_VOLATILITY_MULTIPLIER, AVAX_TREND_CONDITION_MULTIPLIER,
-        AVAX_MIN_GRID_SPACING, AVAX_MAX_GRID_SPACING
+def _config_params(prefix):
+    """
+    Constructor parameters from modules.config for a LAYER/AVAX prefix
+    
+    Read on every call, so patched or reloaded config values take effect
+    for the next strategy built.
+    """
+    from modules import config
+    
+    params = {name: getattr(config, f'{prefix}_{name.upper()}') for name in (
+        'grid_levels', 'grid_spacing_pct', 'trend_ema_fast', 'trend_ema_slow',
+        'volatility_lookback', 'volume_ma_period', 'adx_period', 'adx_threshold',
+        'sideways_threshold', 'volatility_multiplier', 'trend_condition_multiplier',
+        'min_grid_spacing', 'max_grid_spacing'
+    )}
+    params.update(
+        rsi_period=config.RSI_PERIOD,
+        rsi_overbought=config.RSI_OVERBOUGHT,
+        rsi_oversold=config.RSI_OVERSOLD
     )
+    return params
+
+
+@register_strategy('LayerDynamicGrid')
+def layer_dynamic_grid(**params):
+    """LayerDynamicGridStrategy with the LAYER_* config parameters"""
+    return LayerDynamicGridStrategy(**{**_config_params('LAYER'), **params})
+
+
+@register_strategy('AvaxDynamicGrid')
+def avax_dynamic_grid(**params):
+    """AvaxDynamicGridStrategy with the AVAX_* config parameters"""
+    return AvaxDynamicGridStrategy(**{**_config_params('AVAX'), **params})
+
+
+def get_strategy(strategy_name, **params):
+    """
+    Factory function to get a strategy by name
     
-    strategies = {
-        'LayerDynamicGrid': LayerDynamicGridStrategy(
-            grid_levels=LAYER_GRID_LEVELS,
-            grid_spacing_pct=LAYER_GRID_SPACING_PCT,
-            trend_ema_fast=LAYER_TREND_EMA_FAST,
-            trend_ema_slow=LAYER_TREND_EMA_SLOW,
-            volatility_lookback=LAYER_VOLATILITY_LOOKBACK,
-            rsi_period=RSI_PERIOD,
-            rsi_overbought=RSI_OVERBOUGHT,
-            rsi_oversold=RSI_OVERSOLD,
-            volume_ma_period=LAYER_VOLUME_MA_PERIOD,
-            adx_period=LAYER_ADX_PERIOD,
-            adx_threshold=LAYER_ADX_THRESHOLD,
-            sideways_threshold=LAYER_SIDEWAYS_THRESHOLD,
-            # Pass LAYER specific parameters
-            volatility_multiplier=LAYER_VOLATILITY_MULTIPLIER,
-            trend_condition_multiplier=LAYER_TREND_CONDITION_MULTIPLIER,
-            min_grid_spacing=LAYER_MIN_GRID_SPACING,
-            max_grid_spacing=LAYER_MAX_GRID_SPACING
-        ),
-        'AvaxDynamicGrid': AvaxDynamicGridStrategy(
-            grid_levels=AVAX_GRID_LEVELS,
-            grid_spacing_pct=AVAX_GRID_SPACING_PCT,
-            trend_ema_fast=AVAX_TREND_EMA_FAST,
-            trend_ema_slow=AVAX_TREND_EMA_SLOW,
-            volatility_lookback=AVAX_VOLATILITY_LOOKBACK,
-            rsi_period=RSI_PERIOD,
-            rsi_overbought=RSI_OVERBOUGHT,
-            rsi_oversold=RSI_OVERSOLD,
-            volume_ma_period=AVAX_VOLUME_MA_PERIOD,
-            adx_period=AVAX_ADX_PERIOD,
-            adx_threshold=AVAX_ADX_THRESHOLD,
-            sideways_threshold=AVAX_SIDEWAYS_THRESHOLD,
-            # Pass AVAX specific parameters
-            volatility_multiplier=AVAX_VOLATILITY_MULTIPLIER,
-            trend_condition_multiplier=AVAX_TREND_CONDITION_MULTIPLIER,
-            min_grid_spacing=AVAX_MIN_GRID_SPACING,
-            max_grid_spacing=AVAX_MAX_GRID_SPACING
-        )
-    }
+    Only the requested strategy is constructed. Keyword arguments override
+    the configured constructor parameters.
     
-    if strategy_name in strategies:
-        return strategies[strategy_name]
+    Returns:
+        TradingStrategy: A new strategy instance
+    """
+    factory = STRATEGY_REGISTRY.get(strategy_name)
+    if factory is not None:
+        return factory(**params)
     
     logger.warning(f"Strategy {strategy_name} not found. Defaulting to base trading strategy.")
     return TradingStrategy(strategy_name)
 
 
+class StrategyPool:
+    """
+    Strategy instances per symbol, constructed on first use and reused
+    
+    Multi-symbol loops and parameter sweeps acquire strategies from a pool
+    instead of calling get_strategy again, so each (symbol, strategy,
+    parameters) combination is built once. Instances keep their state between
+    acquisitions unless `reset` is set, which clears the trading state but
+    keeps the indicator cache.
+    """
+    def __init__(self):
+        self.instances = {}
+    
+    def __len__(self):
+        return len(self.instances)
+    
+    @staticmethod
+    def _key(symbol, strategy_name, params):
+        return (symbol, strategy_name, tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in params.items()
+        )))
+    
+    def acquire(self, symbol, strategy_name=None, reset=False, **params):
+        """
+        Pooled strategy for `symbol`
+        
+        Args:
+            symbol: Trading symbol
+            strategy_name: Registered strategy name (default: SYMBOL_STRATEGIES)
+            reset: Clear the trading state of a reused instance
+            **params: Constructor parameter overrides (part of the pool key)
+        """
+        strategy_name = strategy_name or SYMBOL_STRATEGIES.get(symbol)
+        key = self._key(symbol, strategy_name, params)
+        
+        strategy = self.instances.get(key)
+        if strategy is None:
+            if strategy_name is None:
+                strategy = TradingStrategy(symbol)
+            else:
+                strategy = get_strategy(strategy_name, **params)
+            self.instances[key] = strategy
+        elif reset and hasattr(strategy, 'reset_state'):
+            strategy.reset_state()
+        return strategy
+    
+    def release(self, symbol):
+        """Drop every pooled instance for `symbol`"""
+        for key in [key for key in self.instances if key[0] == symbol]:
+            del self.instances[key]
+    
+    def clear(self):
+        """Drop every pooled instance"""
+        self.instances.clear()
+
+
 def get_strategy_for_symbol(symbol, strategy_name=None):
-    """Get the appropriate strategy based on the trading symbol"""
-    # If a specific strategy is requested, use it
+    """
+    Get the appropriate strategy based on the trading symbol
+    
+    Returns a new instance on every call, built by get_strategy from the
+    name given or the symbol's SYMBOL_STRATEGIES entry. Use a StrategyPool
+    to reuse instances.
+    """
+    # A requested strategy, else the symbol's default
+    strategy_name = strategy_name or SYMBOL_STRATEGIES.get(symbol)
     if strategy_name:
         return get_strategy(strategy_name)
     
-    # Default strategies based on symbol
-    symbol_strategies = {
-        'LAYERUSDT': LayerDynamicGridStrategy(),
-        'AVAXUSDT': AvaxDynamicGridStrategy()
-    }
-    
-    if symbol in symbol_strategies:
-        return symbol_strategies[symbol]
-    
     # Default to base strategy
     return TradingStrategy(symbol)
 
@@ -1492,6 +2276,7 @@ class AvaxDynamicGridStrategy(LayerDynamicGridStrategy):
                  supertrend_period=10,             # For faster trend detection
                  supertrend_multiplier=3.0,
                  fibonacci_levels=[0.236, 0.382, 0.5, 0.618, 0.786],  # For support/resistance
+                 fibonacci_extensions=[1.272, 1.618, 2.0],  # Beyond the swing range
                  squeeze_threshold=0.5,            # For breakout detection
                  cooloff_period=3,                 # Cool-off after losses
                  max_consecutive_losses=2):
@@ -1517,6 +2302,7 @@ class AvaxDynamicGridStrategy(LayerDynamicGridStrategy):
             supertrend_period=supertrend_period,
             supertrend_multiplier=supertrend_multiplier,
             fibonacci_levels=fibonacci_levels,
+            fibonacci_extensions=fibonacci_extensions,
             squeeze_threshold=squeeze_threshold,
             cooloff_period=cooloff_period,
             max_consecutive_losses=max_consecutive_losses
@@ -1535,76 +2321,15 @@ class AvaxDynamicGridStrategy(LayerDynamicGridStrategy):
         - Special multipliers for extreme trend detection (1.4x)
         - Custom squeeze threshold (0.9x) for AVAX's explosive breakouts
         """
-        conditions = []
-        
-        for i in range(len(df)):
-            if i < self.adx_period:
-                conditions.append('SIDEWAYS')  # Default for initial rows
-                continue
-                
-            # Get relevant indicators
-            adx = df['adx'].iloc[i]
-            di_plus = df['di_plus'].iloc[i]
-            di_minus = df['di_minus'].iloc[i]
-            rsi = df['rsi'].iloc[i]
-            bb_width = df['bb_width'].iloc[i]
-            supertrend_dir = df['supertrend_direction'].iloc[i] if i >= self.supertrend_period else 0
-            macd_crossover = df['macd_crossover'].iloc[i] if 'macd_crossover' in df else 0
-            
-            # AVAX-specific: Check for squeeze condition with adjusted threshold
-            # AVAX tends to have more explosive breakouts after consolidation
-            is_squeeze = bb_width < self.squeeze_threshold * 0.9
-            
-            # Enhanced condition classification with multi-indicator confirmation
-            # AVAX-specific market condition detection logic
-            
-            # Strong bullish trend confirmation - more sensitive for AVAX
-            if (adx > self.adx_threshold * 0.9 and 
-                di_plus > di_minus and 
-                supertrend_dir > 0 and
-                (rsi > 48 or macd_crossover > 0)):  # Lower RSI threshold for AVAX
-                conditions.append('BULLISH')
-                
-            # Strong bearish trend confirmation - more sensitive for AVAX
-            elif (adx > self.adx_threshold * 0.9 and 
-                  di_minus > di_plus and 
-                  supertrend_dir < 0 and
-                  (rsi < 52 or macd_crossover < 0)):  # Higher RSI threshold for AVAX
-                conditions.append('BEARISH')
-                
-            # Extreme bullish trend - AVAX specific thresholds
-            elif (adx > self.adx_threshold * 1.4 and 
-                  di_plus > di_minus * 1.4 and 
-                  supertrend_dir > 0):
-                conditions.append('EXTREME_BULLISH')
-                
-            # Extreme bearish trend - AVAX specific thresholds
-            elif (adx > self.adx_threshold * 1.4 and 
-                  di_minus > di_plus * 1.4 and 
-                  supertrend_dir < 0):
-                conditions.append('EXTREME_BEARISH')
-                
-            # Squeeze condition (potential breakout) - AVAX specific
-            elif is_squeeze:
-                conditions.append('SQUEEZE')
-                
-            # Weak trend or consolidation
-            elif adx < self.sideways_threshold:
-                conditions.append('SIDEWAYS')
-                
-            # Moderate bullish trend
-            elif di_plus > di_minus and supertrend_dir > 0:
-                conditions.append('BULLISH')
-                
-            # Moderate bearish trend
-            elif di_minus > di_plus and supertrend_dir < 0:
-                conditions.append('BEARISH')
-                
-            # Default to sideways if no clear condition
-            else:
-                conditions.append('SIDEWAYS')
-        
-        return pd.Series(conditions, index=df.index)
+        return super().classify_market_condition(
+            df,
+            trend_adx_factor=0.9,  # More sensitive trend detection
+            extreme_adx_factor=1.4,
+            extreme_di_factor=1.4,
+            bullish_rsi=48,  # Lower RSI threshold for AVAX
+            bearish_rsi=52,  # Higher RSI threshold for AVAX
+            squeeze_factor=0.9  # AVAX tends to have more explosive breakouts after consolidation
+        )
     
     def calculate_grid_spacing(self, df):
         """
@@ -1658,6 +2383,16 @@ class AvaxDynamicGridStrategy(LayerDynamicGridStrategy):
             # Return default spacing in case of error
             return self.grid_spacing_pct
             
+    def extreme_market_signals(self, df):
+        """Vectorized AVAX get_extreme_market_signal (same AVAX-adjusted thresholds)"""
+        return super().extreme_market_signals(
+            df,
+            dip_vwap_factor=1.01,
+            dip_rsi=42,
+            rally_vwap_factor=0.99,
+            rally_rsi=58
+        )
+    
     def get_extreme_market_signal(self, df):
         """
         AVAX-specialized signal generation for extreme market conditions
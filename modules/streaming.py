@@ -0,0 +1,552 @@
+import logging
+import math
+import copy
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from modules.strategies import supertrend_step, MARKET_CONDITIONS
+
+logger = logging.getLogger(__name__)
+
+# Raw kline columns, in the order returned by the Binance API
+KLINE_COLUMNS = [
+    'open_time', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_asset_volume', 'number_of_trades',
+    'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore'
+]
+
+# Indicator columns, in the order LayerDynamicGridStrategy.add_indicators creates them
+# (plus Supertrend's period-qualified ATR after 'ema_slow', see indicator_columns)
+INDICATOR_COLUMNS = [
+    'ema_fast', 'ema_slow', 'basic_upper', 'basic_lower', 'supertrend',
+    'supertrend_direction', 'final_upper', 'final_lower', 'trend', 'rsi',
+    'volume_ma', 'volume_ratio', 'volume_weighted_rsi', 'atr', 'atr_pct', 'adx',
+    'di_plus', 'di_minus', 'bb_upper', 'bb_middle', 'bb_lower', 'bb_width',
+    'bb_squeeze', 'macd', 'macd_signal', 'macd_diff', 'macd_crossover', 'vwap',
+    'market_condition', 'potential_reversal'
+]
+
+# Columns read by classify_market_condition and detect_reversal_patterns
+CLASSIFIER_INPUTS = [
+    'open', 'high', 'low', 'close', 'rsi', 'supertrend_direction', 'adx',
+    'di_plus', 'di_minus', 'bb_width', 'macd_crossover'
+]
+
+# Columns compared exactly by the drift check (labels, flags and directions)
+DISCRETE_COLUMNS = [
+    'supertrend_direction', 'trend', 'bb_squeeze', 'macd_crossover',
+    'market_condition', 'potential_reversal'
+]
+
+
+def indicator_columns(strategy):
+    """INDICATOR_COLUMNS with the strategy's Supertrend ATR column (e.g. atr_10) in place"""
+    columns = list(INDICATOR_COLUMNS)
+    columns.insert(columns.index('ema_slow') + 1, f'atr_{strategy.supertrend_period}')
+    return columns
+
+
+def _div(a, b):
+    """a / b with NumPy semantics (inf/NaN instead of ZeroDivisionError)"""
+    if b == 0:
+        if a == 0 or a != a:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class EWMState:
+    """
+    Incremental pandas ewm(adjust=False).mean().
+
+    Follows the pandas recursion step by step (including the constant-series
+    shortcut and the leading-NaN handling), so values match the batch result
+    on the same history.
+    """
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        # pandas converts span/alpha to a centre of mass and back
+        com = (span - 1) / 2.0 if span is not None else (1.0 - alpha) / alpha
+        self.alpha = 1.0 / (1.0 + com)
+        self.min_periods = min_periods
+        self.weighted = math.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, value):
+        """Add one value and return the current average (NaN before min_periods)"""
+        is_observation = value == value
+        self.nobs += is_observation
+        if self.weighted == self.weighted:
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = self.old_wt * self.weighted + self.alpha * value
+                    self.weighted /= (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+
+        return self.weighted if self.nobs >= self.min_periods else math.nan
+
+    def copy(self):
+        return copy.copy(self)
+
+
+class WilderATRState:
+    """Incremental ta AverageTrueRange (zeros during warm-up, seeded with the mean true range)"""
+    def __init__(self, window):
+        self.window = window
+        self.rows = 0
+        self.prev_close = None
+        self.atr = 0.0
+        self._warmup = []
+
+    def update(self, high, low, close):
+        """Add one candle and return the current ATR"""
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+
+        if self.rows < self.window:
+            self._warmup.append(true_range)
+            if self.rows == self.window - 1:
+                self.atr = float(np.sum(self._warmup)) / self.window
+                self._warmup = []
+        else:
+            self.atr = (self.atr * (self.window - 1) + true_range) / float(self.window)
+        self.rows += 1
+
+        return self.atr
+
+    def copy(self):
+        state = copy.copy(self)
+        state._warmup = list(self._warmup)
+        return state
+
+
+class ADXState:
+    """
+    Incremental ta ADXIndicator.
+
+    Smoothed sums at row r include the directional movement of row r, DI+/DI-
+    start at row window + 1 and ADX at row 2 * window - 1, exactly as in ta.
+    """
+    def __init__(self, window):
+        self.window = window
+        self.rows = 0
+        self.prev = None
+        self.trs = 0.0
+        self.dip = 0.0
+        self.din = 0.0
+        self.adx = 0.0
+        self._warmup = ([], [], [])
+        self._dx_warmup = []
+
+    def update(self, high, low, close):
+        """Add one candle and return (adx, di_plus, di_minus)"""
+        w = self.window
+        r = self.rows
+        self.rows += 1
+        prev = self.prev
+        self.prev = (high, low, close)
+        if prev is None:
+            return 0.0, 0.0, 0.0
+
+        prev_high, prev_low, prev_close = prev
+        dm = max(high, prev_close) - min(low, prev_close)
+        diff_up = high - prev_high
+        diff_down = prev_low - low
+        pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+
+        if r < w:
+            for values, value in zip(self._warmup, (dm, pos, neg)):
+                values.append(value)
+            return 0.0, 0.0, 0.0
+        if r == w:
+            self._warmup[0].append(dm)
+            self._warmup[1].append(pos)
+            self._warmup[2].append(neg)
+            self.trs, self.dip, self.din = (float(np.sum(values)) for values in self._warmup)
+            self._warmup = ([], [], [])
+        else:
+            self.trs = self.trs - (self.trs / float(w)) + dm
+            self.dip = self.dip - (self.dip / float(w)) + pos
+            self.din = self.din - (self.din / float(w)) + neg
+
+        di_plus = 100 * (self.dip / self.trs) if self.trs != 0 else 0.0
+        di_minus = 100 * (self.din / self.trs) if self.trs != 0 else 0.0
+        if di_plus + di_minus != 0:
+            dx = 100 * abs((di_plus - di_minus) / (di_plus + di_minus))
+        else:
+            dx = 0.0
+
+        if r < 2 * w - 1:
+            self._dx_warmup.append(dx)
+        elif r == 2 * w - 1:
+            self._dx_warmup.append(dx)
+            self.adx = float(np.mean(self._dx_warmup))
+            self._dx_warmup = []
+        else:
+            self.adx = ((self.adx * (w - 1)) + dx) / float(w)
+
+        # ta leaves DI+/DI- at zero on the first smoothed row
+        if r == w:
+            return self.adx, 0.0, 0.0
+        return self.adx, di_plus, di_minus
+
+    def copy(self):
+        state = copy.copy(self)
+        state._warmup = tuple(list(values) for values in self._warmup)
+        state._dx_warmup = list(self._dx_warmup)
+        return state
+
+
+class RollingWindowState:
+    """Fixed-size window for rolling mean / population standard deviation (NaN until full)"""
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+
+    def update(self, value):
+        self.values.append(value)
+
+    def mean(self):
+        if len(self.values) < self.window:
+            return math.nan
+        return math.fsum(self.values) / self.window
+
+    def std(self):
+        mean = self.mean()
+        if mean != mean:
+            return math.nan
+        return math.sqrt(math.fsum((value - mean) ** 2 for value in self.values) / self.window)
+
+    def copy(self):
+        state = copy.copy(self)
+        state.values = deque(self.values, maxlen=self.window)
+        return state
+
+
+class StreamingIndicatorEngine:
+    """
+    Stateful indicator engine for the live bot.
+
+    Keeps the recursion state of every indicator used by
+    LayerDynamicGridStrategy.add_indicators and updates it in O(1) per closed
+    candle, instead of rebuilding a DataFrame from the whole kline history.
+    The latest `tail_size` rows are kept for the signal functions.
+    """
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.indicator_columns = indicator_columns(strategy)
+        self.supertrend_atr_column = f'atr_{strategy.supertrend_period}'
+        self.tail_size = max(strategy.signal_lookback, 20, strategy.volume_ma_period,
+                             strategy.adx_period, strategy.supertrend_period) + 1
+        # Rows handed to the strategy's market condition / reversal classifiers
+        self._classify_rows = max(strategy.adx_period, strategy.supertrend_period) + 1
+        self.reset()
+
+    def reset(self):
+        """Drop all state and history"""
+        strategy = self.strategy
+        self.rows = 0
+        self.last_open_time = None
+        self.last_close = None
+        self._columns = {column: deque(maxlen=self.tail_size)
+                         for column in KLINE_COLUMNS + self.indicator_columns}
+        self._state = {
+            'ema_fast': EWMState(span=strategy.trend_ema_fast, min_periods=strategy.trend_ema_fast),
+            'ema_slow': EWMState(span=strategy.trend_ema_slow, min_periods=strategy.trend_ema_slow),
+            'supertrend_atr': WilderATRState(strategy.supertrend_period),
+            'supertrend': (math.nan, math.nan, math.nan),  # final upper, final lower, supertrend
+            'rsi_up': EWMState(alpha=1 / strategy.rsi_period, min_periods=strategy.rsi_period),
+            'rsi_down': EWMState(alpha=1 / strategy.rsi_period, min_periods=strategy.rsi_period),
+            'volume': RollingWindowState(strategy.volume_ma_period),
+            'atr': WilderATRState(strategy.volatility_lookback),
+            'adx': ADXState(strategy.adx_period),
+            'bb': RollingWindowState(20),
+            'macd_fast': EWMState(span=12, min_periods=12),
+            'macd_slow': EWMState(span=26, min_periods=26),
+            'macd_signal': EWMState(span=9, min_periods=9),
+            'prev_close': math.nan,
+            'prev_macd': (math.nan, math.nan),
+        }
+        self._prev_state = None
+        strategy.session_vwap.reset()
+
+    def seed(self, klines):
+        """
+        Rebuild the engine from a kline history (e.g. the REST history loaded at start-up).
+
+        Args:
+            klines: Raw klines in Binance API format
+        """
+        self.reset()
+        klines = sorted(klines, key=lambda k: int(k[0]))
+        rows = []
+        for kline in klines:
+            row = self._process(kline)
+            if row is not None:
+                rows.append(row)
+
+        if not rows:
+            return
+
+        # Classify the whole seed history at once, like add_indicators does
+        history = pd.DataFrame(rows)
+        history['market_condition'] = self.strategy.classify_market_condition(history).astype(object)
+        history['potential_reversal'] = self.strategy.detect_reversal_patterns(history)
+
+        for row in history.iloc[-self.tail_size:].to_dict('records'):
+            for column, values in self._columns.items():
+                values.append(row[column])
+
+        logger.info(f"Streaming indicators seeded with {len(rows)} candles")
+
+    def update(self, kline):
+        """
+        Add one closed candle. A candle with the same open time as the latest
+        one replaces it.
+
+        Args:
+            kline: Raw kline in Binance API format
+
+        Returns:
+            dict: The latest indicator row, or None if the candle was ignored
+        """
+        row = self._process(kline)
+        if row is None:
+            return None
+
+        for column, values in self._columns.items():
+            values.append(row.get(column))
+
+        # Classifiers only need the last few rows to label the newest one
+        size = len(self._columns['close'])
+        rows = min(self._classify_rows, size)
+        recent = pd.DataFrame({column: [values[i] for i in range(size - rows, size)]
+                               for column, values in self._columns.items()
+                               if column in CLASSIFIER_INPUTS})
+        self._columns['market_condition'][-1] = self.strategy.classify_market_condition(recent).iloc[-1]
+        self._columns['potential_reversal'][-1] = int(self.strategy.detect_reversal_patterns(recent.iloc[-5:]).iloc[-1])
+
+        return self.latest
+
+    def _process(self, kline):
+        """Advance the indicator state by one candle and return its row (without classifier columns)"""
+        open_time = int(kline[0])
+        if self.last_open_time is not None:
+            if open_time < self.last_open_time:
+                logger.debug(f"Ignoring out-of-order candle {open_time} in streaming indicators")
+                return None
+            if open_time == self.last_open_time:
+                # Same candle delivered again - roll back to the state before it
+                self._state = self._prev_state
+                self.rows -= 1
+                for values in self._columns.values():
+                    if values:
+                        values.pop()
+
+        self._prev_state = self._copy_state()
+        strategy = self.strategy
+        state = self._state
+
+        open_, high, low, close, volume = (float(value) for value in kline[1:6])
+        row = dict(zip(KLINE_COLUMNS, kline))
+        row.update(open_time=open_time, open=open_, high=high, low=low, close=close, volume=volume,
+                   close_time=int(kline[6]))
+
+        # Trend EMAs
+        row['ema_fast'] = state['ema_fast'].update(close)
+        row['ema_slow'] = state['ema_slow'].update(close)
+
+        # Supertrend
+        supertrend_atr = state['supertrend_atr'].update(high, low, close)
+        basic_upper = (high + low) / 2 + (strategy.supertrend_multiplier * supertrend_atr)
+        basic_lower = (high + low) / 2 - (strategy.supertrend_multiplier * supertrend_atr)
+        prev_upper, prev_lower, prev_supertrend = state['supertrend']
+        if self.rows < strategy.supertrend_period:
+            upper = lower = supertrend = direction = math.nan
+        elif self.rows == strategy.supertrend_period:
+            upper, lower = basic_upper, basic_lower
+            if close <= upper:
+                supertrend, direction = upper, -1.0
+            else:
+                supertrend, direction = lower, 1.0
+        else:
+            upper, lower, supertrend, direction = supertrend_step(
+                state['prev_close'], close, basic_upper, basic_lower,
+                prev_upper, prev_lower, prev_supertrend
+            )
+        state['supertrend'] = (upper, lower, supertrend)
+        row[self.supertrend_atr_column] = supertrend_atr
+        row.update(basic_upper=basic_upper, basic_lower=basic_lower, supertrend=supertrend,
+                   supertrend_direction=direction, final_upper=upper, final_lower=lower)
+        row['trend'] = 'UPTREND' if direction == 1 else 'DOWNTREND'
+
+        # RSI (Wilder smoothing of gains and losses)
+        diff = close - state['prev_close']
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else -0.0
+        ema_up = state['rsi_up'].update(up)
+        ema_down = state['rsi_down'].update(down)
+        row['rsi'] = 100.0 if ema_down == 0 else 100 - (100 / (1 + _div(ema_up, ema_down)))
+
+        # Volume
+        state['volume'].update(volume)
+        row['volume_ma'] = state['volume'].mean()
+        row['volume_ratio'] = _div(volume, row['volume_ma'])
+        row['volume_weighted_rsi'] = row['rsi'] * row['volume_ratio']
+
+        # Volatility
+        row['atr'] = state['atr'].update(high, low, close)
+        row['atr_pct'] = _div(row['atr'], close) * 100
+
+        # ADX
+        row['adx'], row['di_plus'], row['di_minus'] = state['adx'].update(high, low, close)
+
+        # Bollinger Bands
+        state['bb'].update(close)
+        bb_middle = state['bb'].mean()
+        bb_std = state['bb'].std()
+        row['bb_upper'] = bb_middle + 2 * bb_std
+        row['bb_middle'] = bb_middle
+        row['bb_lower'] = bb_middle - 2 * bb_std
+        row['bb_width'] = _div(row['bb_upper'] - row['bb_lower'], bb_middle)
+        row['bb_squeeze'] = row['bb_width'] < strategy.squeeze_threshold
+
+        # MACD
+        macd = state['macd_fast'].update(close) - state['macd_slow'].update(close)
+        macd_signal = state['macd_signal'].update(macd)
+        prev_macd, prev_signal = state['prev_macd']
+        if prev_macd < prev_signal and macd > macd_signal:
+            crossover = 1
+        elif prev_macd > prev_signal and macd < macd_signal:
+            crossover = -1
+        else:
+            crossover = 0
+        state['prev_macd'] = (macd, macd_signal)
+        row.update(macd=macd, macd_signal=macd_signal, macd_diff=macd - macd_signal,
+                   macd_crossover=crossover)
+
+        # Session VWAP
+        row['vwap'] = strategy.session_vwap.update(open_time, close, volume)
+
+        state['prev_close'] = close
+        self.rows += 1
+        self.last_open_time = open_time
+        self.last_close = close
+
+        return row
+
+    def _copy_state(self):
+        """Snapshot of the recursion state, used to replace a re-delivered candle"""
+        return {key: value.copy() if hasattr(value, 'copy') else value
+                for key, value in self._state.items()}
+
+    def in_sync(self, klines):
+        """True if the engine's latest candle is the last candle of `klines`"""
+        if not klines or self.last_open_time is None:
+            return False
+        return (int(klines[-1][0]) == self.last_open_time and
+                float(klines[-1][4]) == self.last_close)
+
+    @property
+    def latest(self):
+        """The latest indicator row as a dict"""
+        if self.last_open_time is None:
+            return None
+        return {column: values[-1] for column, values in self._columns.items()}
+
+    def tail(self, rows=None):
+        """
+        The last `rows` indicator rows (default: the full tail) as a DataFrame
+        with the same columns and dtypes as add_indicators.
+        """
+        size = len(self._columns['close'])
+        rows = size if rows is None else min(rows, size)
+        data = {column: [values[i] for i in range(size - rows, size)]
+                for column, values in self._columns.items()}
+
+        df = pd.DataFrame(data)
+        df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
+        df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
+        df['market_condition'] = pd.Categorical(df['market_condition'], categories=MARKET_CONDITIONS)
+        return df
+
+    def check_drift(self, klines, rows=10, tolerance=1e-3):
+        """
+        Compare the streamed indicators with a batch add_indicators run on `klines`.
+
+        Only the latest `rows` candles are compared: when `klines` is a trimmed
+        buffer, the batch run starts its warm-up later than the engine did, and
+        its early rows have not converged yet. Rows are matched on open time.
+        Numeric drift is reported relative to each column's largest magnitude
+        over the compared rows; label, flag and direction columns must match exactly.
+
+        Args:
+            klines: Raw klines in Binance API format (e.g. the live kline buffer)
+            rows: Number of latest candles to compare
+            tolerance: Largest acceptable relative drift
+
+        Returns:
+            dict: Drift report with 'ok', 'rows', 'drift' and 'mismatches'
+        """
+        strategy = self.strategy
+        # add_indicators recalculates the Fibonacci levels - keep the live ones
+        fib_levels = (strategy.fib_support_levels, strategy.fib_resistance_levels)
+        try:
+            batch = strategy.add_indicators(strategy.prepare_data(klines))
+        finally:
+            strategy.fib_support_levels, strategy.fib_resistance_levels = fib_levels
+
+        stream = self.tail()
+        batch = batch.drop_duplicates('open_time', keep='last').set_index('open_time')
+        stream = stream.set_index('open_time')
+        common = stream.index.intersection(batch.index)[-rows:]
+        report = {'ok': True, 'rows': len(common), 'drift': {}, 'mismatches': {}}
+        if len(common) == 0:
+            report['ok'] = False
+            logger.warning("Indicator drift check: no overlapping candles between stream and batch")
+            return report
+
+        batch = batch.loc[common]
+        stream = stream.loc[common]
+        for column in self.indicator_columns:
+            if column in DISCRETE_COLUMNS:
+                expected = batch[column].astype(object).to_numpy()
+                actual = stream[column].astype(object).to_numpy()
+                same = (expected == actual) | (pd.isna(expected) & pd.isna(actual))
+                mismatches = int((~same).sum())
+                report['mismatches'][column] = mismatches
+                if mismatches:
+                    report['ok'] = False
+            else:
+                expected = batch[column].to_numpy(dtype=np.float64)
+                actual = stream[column].to_numpy(dtype=np.float64)
+                both = np.isfinite(expected) & np.isfinite(actual)
+                if (np.isfinite(expected) != np.isfinite(actual)).any():
+                    drift = math.inf
+                elif both.any():
+                    scale = max(np.abs(expected[both]).max(), 1e-12)
+                    drift = float(np.abs(actual[both] - expected[both]).max() / scale)
+                else:
+                    drift = 0.0
+                report['drift'][column] = drift
+                if drift > tolerance:
+                    report['ok'] = False
+
+        worst = max(report['drift'], key=report['drift'].get)
+        if report['ok']:
+            logger.info(f"Indicator drift check passed on {len(common)} candles "
+                        f"(max drift {report['drift'][worst]:.2e} in {worst})")
+        else:
+            bad = {column: count for column, count in report['mismatches'].items() if count}
+            logger.warning(f"Indicator drift check failed on {len(common)} candles: "
+                           f"max drift {report['drift'][worst]:.2e} in {worst}, label mismatches {bad}")
+        return report
@@ -0,0 +1,850 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from modules.backtest import Backtester
+from modules.config import BACKTEST_INITIAL_BALANCE, COMPACT_INDICATORS
+from modules.cache import IndicatorCache
+from modules.shared_klines import SharedKlineDataset
+from modules.strategies import get_strategy, StrategyPool
+
+logger = logging.getLogger(__name__)
+
+# Result metrics written for every run, in ranked table order
+SWEEP_METRICS = ('total_return', 'max_drawdown', 'sharpe_ratio', 'total_trades',
+                 'win_rate', 'final_balance')
+
+
+def grid_points(grid):
+    """
+    Every combination of a parameter grid
+
+    Args:
+        grid: Parameter name -> list of values
+
+    Returns:
+        list: Parameter dicts
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+def random_points(space, samples, seed=0):
+    """
+    Random-search points, reproducible for a given seed (so a resumed sweep
+    draws the same points)
+
+    Args:
+        space: Parameter name -> list of choices, or {'min', 'max'} for a
+            uniform draw (integers if both bounds are integers, log-uniform
+            with 'log': true)
+        samples: Number of points to draw (duplicates are dropped)
+        seed: Random seed
+
+    Returns:
+        list: Parameter dicts
+    """
+    rng = np.random.default_rng(seed)
+    names = sorted(space)
+    points, seen = [], set()
+    for _ in range(samples):
+        point = {}
+        for name in names:
+            dimension = space[name]
+            if isinstance(dimension, dict):
+                low, high = dimension['min'], dimension['max']
+                if isinstance(low, int) and isinstance(high, int):
+                    point[name] = int(rng.integers(low, high + 1))
+                elif dimension.get('log'):
+                    point[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+                else:
+                    point[name] = float(rng.uniform(low, high))
+            else:
+                point[name] = dimension[int(rng.integers(len(dimension)))]
+        key = json.dumps(point, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            points.append(point)
+    return points
+
+
+def load_sweep_spec(path):
+    """
+    Read a sweep spec from a JSON file:
+
+        {"strategy": "LayerDynamicGrid",
+         "grid": {"grid_levels": [3, 5, 7], "adx_threshold": [20, 25, 30]},
+         "random": {"samples": 100, "seed": 1,
+                    "space": {"grid_spacing_pct": {"min": 0.5, "max": 2.0}}},
+         "fixed": {"volatility_multiplier": 1.2},
+         "rank_by": "sharpe_ratio"}
+
+    'grid' and 'random' may be used alone or together; 'fixed' parameters
+    are added to every point.
+
+    Returns:
+        dict: 'strategy' (None if not given), 'points' (parameter dicts),
+        'rank_by' and 'seed'
+    """
+    with open(path) as f:
+        spec = json.load(f)
+
+    points = []
+    if 'grid' in spec:
+        points.extend(grid_points(spec['grid']))
+    if 'random' in spec:
+        search = spec['random']
+        points.extend(random_points(search['space'], search['samples'], search.get('seed', 0)))
+    if not points:
+        points = [{}]
+
+    fixed = spec.get('fixed', {})
+    return {
+        'strategy': spec.get('strategy'),
+        'points': [{**fixed, **point} for point in points],
+        'rank_by': spec.get('rank_by', 'sharpe_ratio'),
+        'seed': spec.get('seed', 0)
+    }
+
+
+def run_key(strategy_name, params):
+    """Stable identifier of one sweep run (strategy and parameters)"""
+    payload = json.dumps({'strategy': strategy_name, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def cache_budget(strategy_name, params, dataset, cache_bytes, sample_rows=2000):
+    """
+    Per-worker indicator cache budget that holds one indicator frame of the
+    whole candle history
+
+    The frame size is extrapolated from the indicator frame of the first
+    `sample_rows` candles. IndicatorCache skips frames over its budget, so a
+    smaller budget would recompute the indicators on every run.
+
+    Returns:
+        int: The larger of `cache_bytes` and the estimated frame size
+    """
+    strategy = get_strategy(strategy_name, **params)
+    # Same frame layout as in the Backtester
+    if COMPACT_INDICATORS and hasattr(strategy, 'compact_indicators'):
+        strategy.compact_indicators = True
+    sample = strategy.calculate_indicators(dataset.frame().iloc[:sample_rows])
+    per_row = sample.memory_usage(index=True, deep=True).sum() / max(1, len(sample))
+    # Headroom for the estimate and the cache's own bookkeeping
+    needed = int(per_row * len(dataset) * 1.1)
+    if needed > cache_bytes:
+        logger.info(f"Indicator cache raised to {needed / 1024 ** 2:.0f} MB per worker "
+                    f"for {len(dataset)} candles")
+    return max(cache_bytes, needed)
+
+
+# Per-process state set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(dataset, settings):
+    """Pool initializer: attach to the shared candles and create one indicator cache per process"""
+    # Ctrl+C is handled by the parent, which stops handing out batches
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Thousands of runs would flood the log with per-trade and per-signal info lines
+    logging.getLogger('modules').setLevel(logging.WARNING)
+    _worker['dataset'] = dataset
+    _worker['df'] = dataset.frame()
+    _worker['settings'] = settings
+    _worker['cache'] = IndicatorCache(max_bytes=settings['cache_bytes'])
+    # Points are built once per process and reused (walk-forward windows, halving rungs)
+    _worker['strategies'] = StrategyPool()
+
+
+def _run_batch(strategy_name, batch, window=None, equity=False):
+    """
+    Backtest a batch of (key, params) points in a worker process
+
+    The points of a batch share their indicator parameters, so the indicator
+    frame is computed for the first and served from the process cache for
+    the rest.
+
+    Args:
+        window: (start, end) dates traded with warm-started indicators instead
+            of the sweep's date range; every window of the candle history then
+            shares one cached indicator frame per indicator parameters
+        equity: Include the equity curve as [date, equity] pairs
+    """
+    settings = _worker['settings']
+    start_date, end_date = window or (settings['start_date'], settings['end_date'])
+    records = []
+    for key, params in batch:
+        record = {'key': key, 'strategy': strategy_name, 'params': params}
+        started = time.perf_counter()
+        try:
+            # Backtester resets the trading state of a reused instance
+            strategy = _worker['strategies'].acquire(settings['symbol'], strategy_name, **params)
+            strategy.indicator_cache = _worker['cache']
+            backtester = Backtester(
+                strategy_name, settings['symbol'], settings['timeframe'], start_date, end_date,
+                engine=settings['engine'], strategy=strategy, progress=False
+            )
+            # Same execution noise (skipped signals, slippage) for every point
+            np.random.seed(settings['seed'])
+            results = backtester.run(_worker['df'], warm_start=window is not None)
+            if equity:
+                record['equity_curve'] = [[str(point['date']), float(point['equity'])]
+                                          for point in backtester.equity_curve]
+            if results:
+                record['status'] = 'ok'
+                record.update({metric: float(results[metric]) for metric in SWEEP_METRICS})
+            else:
+                record['status'] = 'no_trades'
+                record.update({metric: 0.0 for metric in SWEEP_METRICS})
+                record['final_balance'] = float(backtester.balance)
+        except Exception as e:
+            record['status'] = 'error'
+            record['error'] = str(e)
+        record['seconds'] = time.perf_counter() - started
+        records.append(record)
+    return records
+
+
+class ParameterSweep:
+    """
+    Backtests a strategy over many parameter points in parallel.
+
+    The candles are placed in shared memory once (SharedKlineDataset) and
+    every worker process attaches to them read-only when the pool starts.
+    Points are batched by indicator parameters, so a batch computes its
+    indicators once and the remaining points only replay the signal and
+    trade logic. Every finished run is appended to results.jsonl
+    in the output directory as soon as it completes; a sweep started again
+    on the same directory skips the runs already recorded there (failed runs
+    are retried). ranked.csv holds the runs ordered by `rank_by`.
+    """
+    def __init__(self, strategy_name, points, symbol, timeframe, start_date, end_date=None,
+                 output_dir=None, engine=None, workers=None, seed=0, rank_by='sharpe_ratio',
+                 batch_size=8, cache_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            strategy_name: Registered strategy name
+            points: Parameter override dicts (see grid_points / random_points)
+            symbol, timeframe, start_date, end_date: Backtest settings
+            output_dir: Directory for results.jsonl and ranked.csv
+            engine: Backtest engine ('event' or 'legacy')
+            workers: Worker processes (default: one per CPU)
+            seed: Seed for the backtest's execution noise, equal for every run
+            rank_by: Metric the ranked table is sorted by (descending; max_drawdown ascending)
+            batch_size: Maximum points per task
+            cache_bytes: Indicator cache budget per worker process, raised
+                to hold one indicator frame of the candles (see cache_budget)
+        """
+        self.strategy_name = strategy_name
+        self.points = list(points)
+        self.settings = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'start_date': start_date,
+            'end_date': end_date,
+            'engine': engine,
+            'seed': seed,
+            'cache_bytes': cache_bytes
+        }
+        self.cache_bytes = cache_bytes
+        self.output_dir = output_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'backtest_results', 'sweeps', f"{symbol}_{strategy_name}_{timeframe}"
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self.rank_by = rank_by
+        self.batch_size = max(1, batch_size)
+        self.results_path = os.path.join(self.output_dir, 'results.jsonl')
+        self.ranked_path = os.path.join(self.output_dir, 'ranked.csv')
+
+    def _check_settings(self):
+        """Write the sweep settings, or make sure a resumed sweep uses the same ones"""
+        path = os.path.join(self.output_dir, 'sweep.json')
+        settings = {key: value for key, value in self.settings.items() if key != 'cache_bytes'}
+        settings['strategy'] = self.strategy_name
+        if os.path.exists(path):
+            with open(path) as f:
+                previous = json.load(f)
+            if previous != settings:
+                raise ValueError(f"{self.output_dir} holds a sweep with different settings "
+                                 f"({previous}); use another output directory")
+        else:
+            with open(path, 'w') as f:
+                json.dump(settings, f, indent=4)
+
+    def completed(self):
+        """Records already in results.jsonl (latest per run, failed runs excluded)"""
+        records = {}
+        if os.path.exists(self.results_path):
+            with open(self.results_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Partly written line from an interrupted sweep
+                    if record.get('status') != 'error':
+                        records[record['key']] = record
+        return records
+
+    def _end_partial_line(self):
+        """
+        Terminate a record left partly written by an interrupted sweep, so the
+        next record starts on its own line instead of being glued to it
+        """
+        if not os.path.exists(self.results_path) or os.path.getsize(self.results_path) == 0:
+            return
+        with open(self.results_path, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    def _collect(self, futures, total):
+        """
+        Append the records of batches to results.jsonl as they finish
+
+        Returns:
+            list: The records
+        """
+        collected = []
+        started = time.perf_counter()
+        self._end_partial_line()
+        with open(self.results_path, 'a') as results_file:
+            try:
+                for future in as_completed(futures):
+                    records = future.result()
+                    for record in records:
+                        results_file.write(json.dumps(record, default=str) + '\n')
+                        if record['status'] == 'error':
+                            logger.error(f"Sweep run {record['params']} failed: {record['error']}")
+                    results_file.flush()
+                    collected.extend(records)
+                    elapsed = time.perf_counter() - started
+                    logger.info(f"Sweep progress: {len(collected)}/{total} runs "
+                                f"({len(collected) / elapsed:.1f} runs/s)")
+            except (KeyboardInterrupt, SystemExit):
+                logger.warning(f"Sweep interrupted after {len(collected)} runs; run it again to resume")
+                for future in futures:
+                    future.cancel()
+                raise
+        return collected
+
+    def _batches(self, pending):
+        """
+        Split (key, params) points into batches sharing indicator parameters,
+        at most batch_size points each and small enough that every worker
+        gets a task (points that only differ in signal or grid parameters
+        all share one indicator group)
+        """
+        groups = {}
+        for key, params in pending:
+            indicator_params = get_strategy(self.strategy_name, **params).indicator_params
+            groups.setdefault(indicator_params, []).append((key, params))
+        size = min(self.batch_size, -(-len(pending) // self.workers))
+        batches = []
+        for group in groups.values():
+            for start in range(0, len(group), size):
+                batches.append(group[start:start + size])
+        # Largest batches first so the pool does not end waiting on one long task
+        return sorted(batches, key=len, reverse=True)
+
+    def run(self, df):
+        """
+        Run every point not yet recorded in the output directory
+
+        Args:
+            df: Candle frame from Backtester.load_historical_data, or a
+                SharedKlineDataset (e.g. shared by several sweeps)
+
+        Returns:
+            pd.DataFrame: Ranked results of all recorded runs
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._check_settings()
+
+        done = self.completed()
+        pending, queued = [], set()
+        for params in self.points:
+            key = run_key(self.strategy_name, params)
+            if key not in done and key not in queued:
+                queued.add(key)
+                pending.append((key, params))
+        logger.info(f"Sweep of {self.strategy_name}: {len(self.points)} points, "
+                    f"{len(done)} already recorded, {len(pending)} to run on {self.workers} processes")
+
+        if pending:
+            # Fails fast on parameter names the strategy does not accept
+            get_strategy(self.strategy_name, **pending[0][1])
+            batches = self._batches(pending)
+            dataset = df if isinstance(df, SharedKlineDataset) else SharedKlineDataset.create(df)
+            try:
+                self.settings['cache_bytes'] = cache_budget(
+                    self.strategy_name, pending[0][1], dataset, self.cache_bytes)
+                with ProcessPoolExecutor(
+                    max_workers=min(self.workers, len(batches)),
+                    initializer=_init_worker, initargs=(dataset, self.settings)
+                ) as executor:
+                    futures = [executor.submit(_run_batch, self.strategy_name, batch) for batch in batches]
+                    self._collect(futures, len(pending))
+            finally:
+                if dataset is not df:
+                    dataset.unlink()
+
+        ranked = self.ranked()
+        ranked.to_csv(self.ranked_path, index=False)
+        logger.info(f"Ranked sweep results saved to {self.ranked_path}")
+        return ranked
+
+    def ranked(self):
+        """
+        Recorded runs as a table ordered by `rank_by`
+
+        Returns:
+            pd.DataFrame: One row per run: rank, the swept parameters, the
+            SWEEP_METRICS, status and the run key
+        """
+        points = {run_key(self.strategy_name, params) for params in self.points}
+        records = [record for key, record in self.completed().items() if key in points]
+        if not records:
+            return pd.DataFrame()
+
+        rows = []
+        names = sorted({name for record in records for name in record['params']})
+        for record in records:
+            row = {name: record['params'].get(name) for name in names}
+            row.update({metric: record.get(metric) for metric in SWEEP_METRICS})
+            row['status'] = record['status']
+            row['key'] = record['key']
+            rows.append(row)
+        table = pd.DataFrame(rows, columns=names + list(SWEEP_METRICS) + ['status', 'key'])
+        table = table.sort_values(self.rank_by, ascending=self.rank_by == 'max_drawdown',
+                                  na_position='last', kind='stable').reset_index(drop=True)
+        table.insert(0, 'rank', range(1, len(table) + 1))
+        return table
+
+
+class SuccessiveHalving(ParameterSweep):
+    """
+    Successive-halving search for large parameter spaces.
+
+    Every point is first backtested on a short recent slice of the date
+    range; the best 1/eta are kept and evaluated again on a slice eta times
+    longer, until the last survivors run on the whole range. Most of the
+    CPU time goes to the points that keep ranking well.
+
+    Each rung is spread over the process pool like a sweep. Slices end at
+    the end of the range and are traded with warm-started indicators, so
+    every rung reuses the cached indicator frames of the previous one.
+    Evaluations are appended to results.jsonl with their rung; a search
+    started again on the same directory reuses the recorded evaluations and
+    continues where it stopped. ranked.csv lists the points by the last
+    rung they reached, then by `rank_by`.
+    """
+    def __init__(self, strategy_name, points, symbol, timeframe, start_date, end_date=None,
+                 output_dir=None, eta=3, min_days=1, min_trades=1, **kwargs):
+        """
+        Args:
+            eta: Reduction factor - 1/eta of the points survive each rung,
+                and each rung's slice is eta times longer
+            min_days: Shortest slice; fewer rungs are used if the range is too short
+            min_trades: Trades a point needs on a rung to rank ahead of points without
+            **kwargs: ParameterSweep options (engine, workers, seed, rank_by, ...)
+        """
+        output_dir = output_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'backtest_results', 'halving', f"{symbol}_{strategy_name}_{timeframe}"
+        )
+        super().__init__(strategy_name, points, symbol, timeframe, start_date, end_date,
+                         output_dir=output_dir, **kwargs)
+        self.eta = max(2, eta)
+        self.min_days = min_days
+        self.min_trades = min_trades
+        self.settings.update(eta=self.eta, min_days=min_days, min_trades=min_trades)
+
+    def rungs(self, candidates, first_time, end_time):
+        """
+        Rung schedule for `candidates` points over [first_time, end_time)
+
+        Returns:
+            list: (slice start, points evaluated) per rung, the last slice
+            being the whole range
+        """
+        span = end_time - first_time
+        count = 1
+        while (self.eta ** count < candidates and
+               span / self.eta ** count >= pd.Timedelta(days=self.min_days)):
+            count += 1
+        return [(end_time - span / self.eta ** (count - 1 - rung), -(-candidates // self.eta ** rung))
+                for rung in range(count)]
+
+    def _score(self, record):
+        """Sort key of a rung's record (higher is better)"""
+        eligible = record.get('status') == 'ok' and record.get('total_trades', 0) >= self.min_trades
+        value = record.get(self.rank_by) or 0.0
+        return eligible, -value if self.rank_by == 'max_drawdown' else value
+
+    def _range(self, dataset):
+        """[first, end) of the date range covered by the candles"""
+        first_time = pd.Timestamp(int(dataset.column('open_time')[0]), unit='ms')
+        end_time = pd.Timestamp(int(dataset.column('close_time')[-1]) + 1, unit='ms')
+        if self.settings['start_date']:
+            first_time = max(first_time, pd.Timestamp(self.settings['start_date']))
+        if self.settings['end_date']:
+            # The Backtester includes candles opening at end_date
+            end_time = min(end_time, pd.Timestamp(self.settings['end_date']) + pd.Timedelta(milliseconds=1))
+        return first_time, end_time
+
+    def run(self, df):
+        """
+        Run the rungs not yet recorded in the output directory
+
+        Args:
+            df: Candle frame from Backtester.load_historical_data, or a
+                SharedKlineDataset
+
+        Returns:
+            pd.DataFrame: Ranked points (see ranked)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._check_settings()
+
+        candidates = list({run_key(self.strategy_name, params): params for params in self.points}.items())
+        # Fails fast on parameter names the strategy does not accept
+        get_strategy(self.strategy_name, **candidates[0][1])
+
+        dataset = df if isinstance(df, SharedKlineDataset) else SharedKlineDataset.create(df)
+        try:
+            first_time, end_time = self._range(dataset)
+            rungs = self.rungs(len(candidates), first_time, end_time)
+            done = self.completed()
+            self.settings['cache_bytes'] = cache_budget(
+                self.strategy_name, candidates[0][1], dataset, self.cache_bytes)
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(dataset, self.settings)) as executor:
+                survivors = candidates
+                for rung, (slice_start, size) in enumerate(rungs):
+                    survivors = survivors[:size]
+                    pending = [(f'{key}@{rung}', params) for key, params in survivors
+                               if f'{key}@{rung}' not in done]
+                    logger.info(f"Rung {rung + 1}/{len(rungs)}: {len(survivors)} points on "
+                                f"{(end_time - slice_start) / pd.Timedelta(days=1):.1f} days, "
+                                f"{len(survivors) - len(pending)} already recorded")
+                    if pending:
+                        window = _window_dates(slice_start, end_time)
+                        futures = [executor.submit(_run_batch, self.strategy_name, batch, window)
+                                   for batch in self._batches(pending)]
+                        for record in self._collect(futures, len(pending)):
+                            if record['status'] != 'error':
+                                done[record['key']] = record
+                    survivors = sorted(survivors, reverse=True,
+                                       key=lambda point: self._score(done.get(f'{point[0]}@{rung}', {})))
+        finally:
+            if dataset is not df:
+                dataset.unlink()
+
+        ranked = self.ranked()
+        ranked.to_csv(self.ranked_path, index=False)
+        logger.info(f"Search of {len(candidates)} points finished after {len(rungs)} rungs")
+        logger.info(f"Ranked search results saved to {self.ranked_path}")
+        return ranked
+
+    def ranked(self):
+        """
+        Every point at the last rung it reached, ordered by rung and then `rank_by`
+
+        Returns:
+            pd.DataFrame: rank, rung, the swept parameters, the SWEEP_METRICS,
+            status and the point's run key
+        """
+        points = {run_key(self.strategy_name, params) for params in self.points}
+        reached = {}
+        for rung_key, record in self.completed().items():
+            key, rung = rung_key.rsplit('@', 1)
+            if key in points and int(rung) >= reached.get(key, (-1, None))[0]:
+                reached[key] = (int(rung), record)
+        if not reached:
+            return pd.DataFrame()
+
+        ordered = sorted(reached.items(), reverse=True,
+                         key=lambda item: (item[1][0], self._score(item[1][1])))
+        names = sorted({name for _, (_, record) in ordered for name in record['params']})
+        rows = []
+        for key, (rung, record) in ordered:
+            row = {'rung': rung + 1}
+            row.update({name: record['params'].get(name) for name in names})
+            row.update({metric: record.get(metric) for metric in SWEEP_METRICS})
+            row['status'] = record['status']
+            row['key'] = key
+            rows.append(row)
+        table = pd.DataFrame(rows, columns=['rung'] + names + list(SWEEP_METRICS) + ['status', 'key'])
+        table.insert(0, 'rank', range(1, len(table) + 1))
+        return table
+
+
+def walk_forward_windows(first_time, end_time, train_days, test_days, anchored=False):
+    """
+    Rolling in-sample / out-of-sample windows over a candle history
+
+    Consecutive test windows are adjacent and do not overlap, so their
+    results can be stitched into one out-of-sample period. Only complete
+    test windows are returned.
+
+    Args:
+        first_time: Open time of the first candle
+        end_time: Close time of the last candle
+        train_days: In-sample length in days
+        test_days: Out-of-sample length (and step) in days
+        anchored: Keep every in-sample window starting at `first_time`
+            (expanding instead of rolling)
+
+    Returns:
+        list: (train_start, test_start, test_end) Timestamps, windows are
+        [train_start, test_start) and [test_start, test_end)
+    """
+    first_time, end_time = pd.Timestamp(first_time), pd.Timestamp(end_time)
+    train, test = pd.Timedelta(days=train_days), pd.Timedelta(days=test_days)
+    windows = []
+    test_start = first_time + train
+    while test_start + test <= end_time:
+        train_start = first_time if anchored else test_start - train
+        windows.append((train_start, test_start, test_start + test))
+        test_start += test
+    return windows
+
+
+def _window_dates(start, end):
+    """Backtester (start, end) dates for the half-open range [start, end)"""
+    return str(start), str(end - pd.Timedelta(milliseconds=1))
+
+
+class WalkForward:
+    """
+    Walk-forward optimization: parameters are chosen on each in-sample
+    window and scored on the out-of-sample window that follows it.
+
+    All in-sample runs (every window and parameter point) are spread over
+    one process pool attached to shared candles, then the winner of each
+    window is backtested on its out-of-sample window in the same pool.
+    Windows are traded with warm-started indicators computed over the whole
+    history, so overlapping windows share one cached indicator frame per
+    indicator parameters in each worker instead of recomputing it. The
+    out-of-sample equity curves are compounded into one stitched curve.
+    """
+    def __init__(self, strategy_name, points, symbol, timeframe, train_days, test_days,
+                 anchored=False, output_dir=None, engine=None, workers=None, seed=0,
+                 rank_by='sharpe_ratio', min_trades=5, batch_size=8, cache_bytes=256 * 1024 * 1024):
+        """
+        Args:
+            strategy_name: Registered strategy name
+            points: Parameter override dicts (see grid_points / random_points)
+            symbol, timeframe: Backtest settings
+            train_days, test_days: In-sample and out-of-sample window lengths
+            anchored: Expanding in-sample windows from the start of the history
+            output_dir: Directory for windows.csv, oos_equity.csv and summary.json
+            engine: Backtest engine ('event' or 'legacy')
+            workers: Worker processes (default: one per CPU)
+            seed: Seed for the backtest's execution noise, equal for every run
+            rank_by: Metric the in-sample winner is chosen by
+            min_trades: In-sample trades a point needs to be eligible
+            batch_size: Maximum points per task
+            cache_bytes: Indicator cache budget per worker process, raised
+                to hold one indicator frame of the whole history (see cache_budget)
+        """
+        self.strategy_name = strategy_name
+        self.points = list(points)
+        self.train_days = train_days
+        self.test_days = test_days
+        self.anchored = anchored
+        self.settings = {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'start_date': None,
+            'end_date': None,
+            'engine': engine,
+            'seed': seed,
+            'cache_bytes': cache_bytes
+        }
+        self.cache_bytes = cache_bytes
+        self.output_dir = output_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            'backtest_results', 'walk_forward',
+            f"{symbol}_{strategy_name}_{timeframe}_{time.strftime('%Y%m%d_%H%M%S')}"
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self.rank_by = rank_by
+        self.min_trades = min_trades
+        self.batch_size = max(1, batch_size)
+
+    def _best(self, records):
+        """In-sample winner of one window, or None if no point qualifies"""
+        eligible = [record for record in records
+                    if record['status'] == 'ok' and record['total_trades'] >= self.min_trades]
+        if not eligible:
+            return None
+        if self.rank_by == 'max_drawdown':
+            return min(eligible, key=lambda record: record['max_drawdown'])
+        return max(eligible, key=lambda record: record[self.rank_by])
+
+    def run(self, df):
+        """
+        Optimize and score every window
+
+        Args:
+            df: Candle frame from Backtester.load_historical_data, or a
+                SharedKlineDataset
+
+        Returns:
+            dict: Stitched out-of-sample results ('total_return',
+            'max_drawdown', 'sharpe_ratio', 'total_trades', 'win_rate',
+            'final_balance', 'equity_curve') and per-window 'windows', or
+            None if the history is too short for one window
+        """
+        dataset = df if isinstance(df, SharedKlineDataset) else SharedKlineDataset.create(df)
+        try:
+            open_times = dataset.column('open_time')
+            windows = walk_forward_windows(
+                pd.Timestamp(int(open_times[0]), unit='ms'),
+                pd.Timestamp(int(dataset.column('close_time')[-1]) + 1, unit='ms'),
+                self.train_days, self.test_days, self.anchored
+            )
+            if not windows:
+                logger.error(f"History too short for a {self.train_days}+{self.test_days} day walk-forward window")
+                return None
+            logger.info(f"Walk-forward of {self.strategy_name}: {len(windows)} windows x "
+                        f"{len(self.points)} points on {self.workers} processes")
+            # Fails fast on parameter names the strategy does not accept
+            get_strategy(self.strategy_name, **self.points[0])
+
+            groups = {}
+            for params in self.points:
+                indicator_params = get_strategy(self.strategy_name, **params).indicator_params
+                groups.setdefault(indicator_params, []).append((run_key(self.strategy_name, params), params))
+
+            # Small enough batches that every worker gets a task
+            size = min(self.batch_size, -(-len(self.points) * len(windows) // self.workers))
+            self.settings['cache_bytes'] = cache_budget(
+                self.strategy_name, self.points[0], dataset, self.cache_bytes)
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(dataset, self.settings)) as executor:
+                # In-sample: grouped by indicator parameters first, so a worker
+                # keeps reusing the same cached indicator frame across windows
+                futures = {}
+                for group in groups.values():
+                    for index, (train_start, test_start, _) in enumerate(windows):
+                        window = _window_dates(train_start, test_start)
+                        for start in range(0, len(group), size):
+                            future = executor.submit(_run_batch, self.strategy_name,
+                                                     group[start:start + size], window)
+                            futures[future] = index
+                in_sample = [[] for _ in windows]
+                for future in as_completed(futures):
+                    in_sample[futures[future]].extend(future.result())
+                logger.info(f"Walk-forward in-sample runs done in {time.perf_counter() - started:.1f}s")
+
+                # Out-of-sample: the in-sample winner of each window
+                best = [self._best(records) for records in in_sample]
+                futures = {}
+                for index, (_, test_start, test_end) in enumerate(windows):
+                    if best[index] is not None:
+                        batch = [(best[index]['key'], best[index]['params'])]
+                        future = executor.submit(_run_batch, self.strategy_name, batch,
+                                                 _window_dates(test_start, test_end), True)
+                        futures[future] = index
+                out_of_sample = [None] * len(windows)
+                for future in as_completed(futures):
+                    out_of_sample[futures[future]] = future.result()[0]
+        finally:
+            if dataset is not df:
+                dataset.unlink()
+
+        results = self._stitch(windows, best, out_of_sample)
+        self.save_results(results)
+        logger.info(f"Walk-forward finished in {time.perf_counter() - started:.1f}s: out-of-sample return "
+                    f"{results['total_return']:.2f}%, max drawdown {results['max_drawdown']:.2f}%, "
+                    f"{results['total_trades']} trades")
+        return results
+
+    def _stitch(self, windows, best, out_of_sample):
+        """
+        Compound the out-of-sample windows into one equity curve and summary
+
+        Each window grows the capital by its own total_return, so the stitched
+        total_return stays within the reality check of the per-window backtests.
+        """
+        capital = BACKTEST_INITIAL_BALANCE
+        equity_curve, rows = [], []
+        total_trades = wins = 0
+        for index, (train_start, test_start, test_end) in enumerate(windows):
+            row = {
+                'window': index + 1,
+                'train_start': str(train_start),
+                'test_start': str(test_start),
+                'test_end': str(test_end),
+                'params': json.dumps(best[index]['params'], sort_keys=True) if best[index] else None,
+                f'in_sample_{self.rank_by}': best[index][self.rank_by] if best[index] else None
+            }
+            record = out_of_sample[index]
+            if record is None or record['status'] == 'error':
+                # No eligible parameters (or the run failed): the window is sat out flat
+                if record is not None:
+                    logger.error(f"Walk-forward window {index + 1} failed: {record['error']}")
+                row.update({metric: 0.0 for metric in SWEEP_METRICS})
+                row['final_balance'] = capital
+                equity_curve.append({'date': str(test_end), 'equity': capital, 'window': index + 1})
+            else:
+                # Compounded on the window's reported final_balance, which the
+                # backtest's reality check may have scaled down; the curve is
+                # clipped to it so the stitched curve ends on the same capital
+                scale = capital / BACKTEST_INITIAL_BALANCE
+                end = record['final_balance'] * scale
+                for date, equity in record.get('equity_curve', []):
+                    equity_curve.append({'date': date, 'equity': min(equity * scale, end), 'window': index + 1})
+                capital = end
+                row.update({metric: record[metric] for metric in SWEEP_METRICS})
+                row['final_balance'] = capital
+                total_trades += int(record['total_trades'])
+                wins += round(record['win_rate'] * record['total_trades'] / 100)
+            rows.append(row)
+
+        equity = pd.Series([point['equity'] for point in equity_curve], dtype=float)
+        peak = equity.cummax()
+        returns = equity.pct_change()
+        return {
+            'strategy': self.strategy_name,
+            'symbol': self.settings['symbol'],
+            'timeframe': self.settings['timeframe'],
+            'train_days': self.train_days,
+            'test_days': self.test_days,
+            'anchored': self.anchored,
+            'rank_by': self.rank_by,
+            'initial_balance': BACKTEST_INITIAL_BALANCE,
+            'final_balance': capital,
+            'total_return': (capital - BACKTEST_INITIAL_BALANCE) / BACKTEST_INITIAL_BALANCE * 100,
+            'max_drawdown': float(((peak - equity) / peak * 100).max()) if len(equity) else 0.0,
+            'sharpe_ratio': float(np.sqrt(252) * returns.mean() / returns.std()) if returns.std() > 0 else 0.0,
+            'total_trades': total_trades,
+            'win_rate': wins / total_trades * 100 if total_trades else 0.0,
+            'profitable_windows': sum(1 for row in rows if row['total_return'] > 0),
+            'windows': rows,
+            'equity_curve': equity_curve
+        }
+
+    def save_results(self, results):
+        """Write windows.csv, oos_equity.csv and summary.json to the output directory"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        pd.DataFrame(results['windows']).to_csv(os.path.join(self.output_dir, 'windows.csv'), index=False)
+        pd.DataFrame(results['equity_curve']).to_csv(os.path.join(self.output_dir, 'oos_equity.csv'), index=False)
+        with open(os.path.join(self.output_dir, 'summary.json'), 'w') as f:
+            summary = {k: v for k, v in results.items() if k not in ('windows', 'equity_curve')}
+            json.dump(summary, f, indent=4, default=str)
+        logger.info(f"Walk-forward results saved to {self.output_dir}")
+        return self.output_dir
@@ -9,8 +9,9 @@ from datetime import datetime
 from modules.config import (
     TRADING_SYMBOL, TIMEFRAME, API_KEY, API_SECRET, 
     RETRY_COUNT, RETRY_DELAY, API_URL, RECV_WINDOW,
-    API_TESTNET, WS_BASE_URL
+    API_TESTNET, WS_BASE_URL, RESAMPLE_FROM_1M, RESAMPLE_TIMEFRAMES
 )
+from modules.resampler import CandleResampler, is_aligned
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +54,15 @@ class BinanceWebSocketManager:
         # Store last received kline data
         self.last_kline_data = {}
         
+        # Tick-level trigger prices per symbol, published after each candle close
+        self.trigger_prices = {}
+        
+        # Higher timeframes built from a single 1m kline stream per symbol
+        self.resample = RESAMPLE_FROM_1M and is_aligned(TIMEFRAME, '1m')
+        if RESAMPLE_FROM_1M and not self.resample:
+            logger.warning(f"Cannot build {TIMEFRAME} candles from 1m klines. Subscribing to {TIMEFRAME} directly.")
+        self.resamplers = {}  # symbol -> CandleResampler
+        
         # Create threads for WebSocket connections
         self.ws_thread = None
         self.user_ws_thread = None
@@ -84,6 +94,67 @@ class BinanceWebSocketManager:
         self.callbacks[data_type] = callback
         logger.debug(f"Registered callback for {data_type}")
         
+    def set_trigger_prices(self, symbol: str, buy_below: Optional[float] = None,
+                           sell_above: Optional[float] = None):
+        """
+        Publish the prices whose crossing triggers a signal between candle closes
+        
+        A side is armed by a tick on its untriggered side (above `buy_below`,
+        below `sell_above`) and fires once, on the first tick that crosses its
+        price, until new trigger prices are published.
+        """
+        self.trigger_prices[symbol] = {
+            'buy_below': buy_below,
+            'sell_above': sell_above,
+            'buy_armed': False,
+            'sell_armed': False
+        }
+        logger.debug(f"Trigger prices for {symbol}: buy <= {buy_below}, sell >= {sell_above}")
+    
+    def clear_trigger_prices(self, symbol: str):
+        """Stop checking ticks for a symbol until new trigger prices are published"""
+        self.trigger_prices.pop(symbol, None)
+    
+    def _check_trigger_prices(self, symbol: str, buy_price: float, sell_price: float, event_time):
+        """
+        O(1) check of one tick against the published trigger prices
+        
+        Args:
+            symbol: Trading symbol
+            buy_price: Price a buy would fill at (trade price or best ask)
+            sell_price: Price a sell would fill at (trade price or best bid)
+            event_time: Tick time in ms
+        """
+        triggers = self.trigger_prices.get(symbol)
+        if triggers is None:
+            return
+        
+        buy_below = triggers['buy_below']
+        if buy_below is not None and buy_price > 0:
+            if buy_price > buy_below:
+                triggers['buy_armed'] = True
+            elif triggers['buy_armed']:
+                triggers['buy_below'] = None
+                self._fire_price_trigger(symbol, 'BUY', buy_price, buy_below, event_time)
+        
+        sell_above = triggers['sell_above']
+        if sell_above is not None and sell_price > 0:
+            if sell_price < sell_above:
+                triggers['sell_armed'] = True
+            elif triggers['sell_armed']:
+                triggers['sell_above'] = None
+                self._fire_price_trigger(symbol, 'SELL', sell_price, sell_above, event_time)
+    
+    def _fire_price_trigger(self, symbol, side, price, trigger_price, event_time):
+        logger.info(f"{symbol} {side} trigger crossed intrabar: {price} vs {trigger_price}")
+        if 'price_trigger' in self.callbacks:
+            self.callbacks['price_trigger'](symbol, {
+                'side': side,
+                'price': price,
+                'trigger_price': trigger_price,
+                'time': event_time
+            })
+    
     def _get_listen_key(self) -> Optional[str]:
         """Get a listen key for user data stream"""
         import requests
@@ -256,8 +327,8 @@ class BinanceWebSocketManager:
         for symbol in self.symbols:
             symbol_lower = symbol.lower()
             
-            # Add kline stream for each symbol
-            timeframe = self.timeframe_mapping.get(TIMEFRAME, '15m')
+            # Add kline stream for each symbol (1m when higher timeframes are resampled)
+            timeframe = '1m' if self.resample else self.timeframe_mapping.get(TIMEFRAME, '15m')
             streams.append(f"{symbol_lower}@kline_{timeframe}")
             
             # Add trade stream
@@ -483,14 +554,26 @@ class BinanceWebSocketManager:
         logger.info("User data WebSocket connected")
         self.user_stream_connected = True
     
+    def get_resampler(self, symbol: str) -> CandleResampler:
+        """CandleResampler building TIMEFRAME and RESAMPLE_TIMEFRAMES candles for `symbol`"""
+        if symbol not in self.resamplers:
+            timeframes = [TIMEFRAME] + [tf for tf in RESAMPLE_TIMEFRAMES if tf != TIMEFRAME]
+            resampler = CandleResampler(timeframes=[])
+            for timeframe in timeframes:
+                try:
+                    resampler.add_timeframe(timeframe)
+                except ValueError as e:
+                    logger.warning(f"Not resampling {timeframe}: {e}")
+            self.resamplers[symbol] = resampler
+        return self.resamplers[symbol]
+    
     def _process_kline_data(self, data):
         """Process kline (candlestick) data"""
         # Extract and format kline data
         kline = data.get('k', {})
         symbol = kline.get('s', '')
         
-        # Update last kline data for this symbol
-        self.last_kline_data[symbol] = {
+        kline_data = {
             'open_time': kline.get('t'),
             'open': float(kline.get('o')),
             'high': float(kline.get('h')),
@@ -498,11 +581,34 @@ class BinanceWebSocketManager:
             'close': float(kline.get('c')),
             'volume': float(kline.get('v')),
             'close_time': kline.get('T'),
-            'is_closed': kline.get('x', False)
+            'is_closed': kline.get('x', False),
+            'quote_asset_volume': float(kline.get('q', 0)),
+            'number_of_trades': kline.get('n', 0),
+            'taker_buy_base_asset_volume': float(kline.get('V', 0)),
+            'taker_buy_quote_asset_volume': float(kline.get('Q', 0))
         }
         
+        # 1m candle: the callbacks get the TIMEFRAME candle built from it
+        closed = kline_data['is_closed']
+        if self.resample:
+            resampler = self.get_resampler(symbol)
+            previous = resampler.latest(TIMEFRAME)
+            completed = resampler.update(kline_data).count(TIMEFRAME)
+            kline_data = resampler.latest(TIMEFRAME)
+            if previous is not None and previous['open_time'] != kline_data['open_time'] and not previous['is_closed']:
+                # 1m candles were missed - the previous candle closed with what it got
+                previous['is_closed'] = True
+                completed -= 1
+                if 'kline' in self.callbacks:
+                    self.callbacks['kline'](symbol, previous)
+            closed = completed > 0
+            kline_data['is_closed'] = closed
+        
+        # Update last kline data for this symbol
+        self.last_kline_data[symbol] = kline_data
+        
         # If kline is closed and we have a callback, call it
-        if kline.get('x', False) and 'kline' in self.callbacks:
+        if closed and 'kline' in self.callbacks:
             self.callbacks['kline'](symbol, self.last_kline_data[symbol])
             
         # Always call real-time kline callback if registered
@@ -520,6 +626,9 @@ class BinanceWebSocketManager:
             'trade_id': data.get('t', 0)
         }
         
+        # Check intrabar grid/band triggers before anything else
+        self._check_trigger_prices(trade_data['symbol'], trade_data['price'], trade_data['price'], trade_data['time'])
+        
         # Call trade callback if registered
         if 'trade' in self.callbacks:
             self.callbacks['trade'](trade_data['symbol'], trade_data)
@@ -535,6 +644,9 @@ class BinanceWebSocketManager:
             'time': data.get('E', 0)
         }
         
+        # Buys would fill at the ask, sells at the bid
+        self._check_trigger_prices(ticker_data['symbol'], ticker_data['ask_price'], ticker_data['bid_price'], ticker_data['time'])
+        
         # Call book ticker callback if registered
         if 'book_ticker' in self.callbacks:
             self.callbacks['book_ticker'](ticker_data['symbol'], ticker_data)
@@ -0,0 +1,36 @@
+import logging
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Strategies log every signal at INFO
+logging.getLogger('modules').setLevel(logging.WARNING)
+
+
+def make_klines(n, seed=7, interval_ms=15 * 60 * 1000, start_ms=1_700_000_000_000):
+    """
+    Synthetic random-walk candles in Binance API format (prices as strings)
+
+    Args:
+        n: Number of candles
+        seed: Random seed (the same seed always gives the same candles)
+        interval_ms: Candle length
+        start_ms: Open time of the first candle (aligned down to the interval)
+    """
+    rng = np.random.default_rng(seed)
+    price = 10 * np.exp(np.cumsum(rng.normal(0, 0.006, n)))
+    klines = []
+    open_time = start_ms - start_ms % interval_ms
+    for i in range(n):
+        open_ = price[i - 1] if i else price[0]
+        close = price[i]
+        high = max(open_, close) * (1 + abs(rng.normal(0, 0.003)))
+        low = min(open_, close) * (1 - abs(rng.normal(0, 0.003)))
+        volume = abs(rng.normal(1000, 300))
+        klines.append([open_time, f"{open_:.6f}", f"{high:.6f}", f"{low:.6f}", f"{close:.6f}", f"{volume:.3f}",
+                       open_time + interval_ms - 1, "0", 0, "0", "0", "0"])
+        open_time += interval_ms
+    return klines
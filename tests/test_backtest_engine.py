@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from conftest import make_klines
+from modules.backtest import Backtester
+
+
+def _run(strategy_name, engine, klines):
+    backtester = Backtester(strategy_name, 'TESTUSDT', '15m', '2023-11-15', '2030-01-01',
+                            engine=engine, progress=False)
+    df = backtester.load_historical_data(klines)
+    # Signal execution and slippage are randomized
+    np.random.seed(1)
+    backtester.run(df)
+    return backtester
+
+
+@pytest.mark.parametrize('strategy_name', ['LayerDynamicGrid', 'AvaxDynamicGrid'])
+def test_event_engine_matches_legacy(strategy_name):
+    klines = make_klines(700, seed=3)
+    event = _run(strategy_name, 'event', klines)
+    legacy = _run(strategy_name, 'legacy', klines)
+
+    assert event.trades, "no trades, the comparison would prove nothing"
+    assert event.trades == legacy.trades
+    assert event.equity_curve == legacy.equity_curve
@@ -0,0 +1,123 @@
+from modules.grid_book import GridBook
+from modules.grid_executor import GRID_ORDER_PREFIX, GridExecutor
+
+SYMBOL = 'TESTUSDT'
+
+
+class StubClient:
+    """In-memory stand-in for the BinanceClient order methods GridExecutor uses"""
+    def __init__(self, open_orders=()):
+        self.open_orders = {order['orderId']: dict(order) for order in open_orders}
+        self.placed = []
+        self.cancelled = []
+        self._next_id = 1000
+
+    def get_symbol_info(self, symbol):
+        return {'price_precision': 2}
+
+    def get_open_orders(self, symbol):
+        return [order for order in self.open_orders.values() if order['symbol'] == symbol]
+
+    def place_limit_order(self, symbol, side, quantity, price, client_order_id=None):
+        self._next_id += 1
+        order = {'orderId': self._next_id, 'clientOrderId': client_order_id, 'symbol': symbol,
+                 'type': 'LIMIT', 'side': side, 'price': str(price), 'origQty': str(quantity)}
+        self.open_orders[order['orderId']] = order
+        self.placed.append((side, price))
+        return order
+
+    def cancel_order(self, symbol, order_id):
+        self.cancelled.append(order_id)
+        return self.open_orders.pop(order_id, None) is not None
+
+
+def _executor(client):
+    return GridExecutor(client, SYMBOL, lambda side, price: 1.0)
+
+
+def _event(order_id, status, price=None, quantity=None):
+    return {'order_id': order_id, 'order_status': status, 'avg_price': price,
+            'cumulative_filled_quantity': quantity}
+
+
+def test_sync_places_tagged_orders_for_active_levels():
+    client = StubClient()
+    executor = _executor(client)
+    book = GridBook([9.0, 9.5, 10.5, 11.0], ['BUY', 'BUY', 'SELL', 'SELL'])
+
+    assert executor.sync(book) == (4, 0)
+    assert sorted(client.placed) == [('BUY', 9.0), ('BUY', 9.5), ('SELL', 10.5), ('SELL', 11.0)]
+    assert all(order['clientOrderId'].startswith(GRID_ORDER_PREFIX) for order in client.open_orders.values())
+
+
+def test_sync_only_replaces_changed_levels():
+    client = StubClient()
+    executor = _executor(client)
+    executor.sync(GridBook([9.0, 9.5, 10.5, 11.0], ['BUY', 'BUY', 'SELL', 'SELL']))
+    client.placed.clear()
+
+    assert executor.sync(GridBook([9.0, 9.6, 10.5, 11.0], ['BUY', 'BUY', 'SELL', 'SELL'])) == (1, 1)
+    assert client.placed == [('BUY', 9.6)]
+    assert executor.sync(GridBook([9.0, 9.6, 10.5, 11.0], ['BUY', 'BUY', 'SELL', 'SELL'])) == (0, 0)
+    assert len(executor) == 4
+
+
+def test_adopts_only_grid_tagged_orders():
+    client = StubClient([
+        {'orderId': 1, 'clientOrderId': f'{GRID_ORDER_PREFIX}1_1', 'symbol': SYMBOL, 'type': 'LIMIT',
+         'side': 'BUY', 'price': '9.00', 'origQty': '1'},
+        {'orderId': 2, 'clientOrderId': 'manual_order', 'symbol': SYMBOL, 'type': 'LIMIT',
+         'side': 'BUY', 'price': '8.00', 'origQty': '5'},
+        {'orderId': 3, 'clientOrderId': 'web_stop', 'symbol': SYMBOL, 'type': 'STOP_MARKET',
+         'side': 'SELL', 'price': '0', 'origQty': '5'},
+    ])
+    executor = _executor(client)
+
+    assert executor.sync(GridBook([9.0, 11.0], ['BUY', 'SELL'])) == (1, 0)
+    assert client.placed == [('SELL', 11.0)]
+    assert 1 in executor.orders and 2 not in executor.orders
+
+    # Emptying the grid cancels the grid orders only
+    assert executor.cancel_all() == 2
+    assert sorted(client.open_orders) == [2, 3]
+
+
+def test_filled_order_triggers_its_level():
+    client = StubClient()
+    executor = _executor(client)
+    book = GridBook([9.0, 11.0], ['BUY', 'SELL'])
+    executor.sync(book)
+    buy_id = next(order_id for order_id, order in executor.orders.items() if order['side'] == 'BUY')
+
+    fill = executor.on_order_update(_event(buy_id, 'FILLED', price=8.99, quantity=1.0))
+    assert fill == {'order_id': buy_id, 'side': 'BUY', 'price': 8.99, 'quantity': 1.0}
+    assert not book.active[book.index_of(9.0)]
+    assert executor.fills == 1 and buy_id not in executor.orders
+
+    # The triggered level is not placed again
+    client.placed.clear()
+    assert executor.sync(book) == (0, 0)
+
+
+def test_canceled_order_is_forgotten_and_replaced():
+    client = StubClient()
+    executor = _executor(client)
+    book = GridBook([9.0, 11.0], ['BUY', 'SELL'])
+    executor.sync(book)
+    sell_id = next(order_id for order_id, order in executor.orders.items() if order['side'] == 'SELL')
+    client.open_orders.pop(sell_id)
+
+    assert executor.on_order_update(_event(sell_id, 'CANCELED')) is None
+    assert sell_id not in executor.orders
+    assert book.active[book.index_of(11.0)]
+
+    client.placed.clear()
+    assert executor.sync(book) == (1, 0)
+    assert client.placed == [('SELL', 11.0)]
+
+
+def test_ignores_updates_for_other_orders():
+    executor = _executor(StubClient())
+    executor.sync(GridBook([9.0], ['BUY']))
+    assert executor.on_order_update(_event(42, 'FILLED', price=9.0, quantity=1.0)) is None
+    assert executor.fills == 0
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import ta
+
+from conftest import make_klines
+from modules.indicators import IndicatorGraph, Node
+from modules.strategies import get_strategy
+
+# Largest difference allowed, relative to the reference's largest magnitude
+TOLERANCE = {'ta': 1e-12, 'numpy': 1e-9}
+
+
+@pytest.fixture(scope='module')
+def candles():
+    return get_strategy('LayerDynamicGrid').prepare_data(make_klines(2000, seed=11))
+
+
+def _references(df):
+    """(node, output key, ta package values) for every indicator the strategies use"""
+    close, high, low = df['close'], df['high'], df['low']
+    adx = ta.trend.ADXIndicator(high, low, close, window=14)
+    bollinger = ta.volatility.BollingerBands(close, window=20, window_dev=2)
+    return {
+        'ema': (Node('ema', source='close', span=21), None, ta.trend.ema_indicator(close, window=21)),
+        'sma': (Node('sma', source='volume', window=20), None, ta.trend.sma_indicator(df['volume'], window=20)),
+        'rsi': (Node('rsi', window=14), None, ta.momentum.rsi(close, window=14)),
+        'atr': (Node('atr', window=20), None, ta.volatility.average_true_range(high, low, close, window=20)),
+        'adx': (Node('adx', window=14), 'adx', adx.adx()),
+        'di_plus': (Node('adx', window=14), 'di_plus', adx.adx_pos()),
+        'di_minus': (Node('adx', window=14), 'di_minus', adx.adx_neg()),
+        'bb_upper': (Node('bollinger', window=20, window_dev=2), 'upper', bollinger.bollinger_hband()),
+        'bb_middle': (Node('bollinger', window=20, window_dev=2), 'middle', bollinger.bollinger_mavg()),
+        'bb_lower': (Node('bollinger', window=20, window_dev=2), 'lower', bollinger.bollinger_lband()),
+        'macd': (Node('macd', fast=12, slow=26), None, ta.trend.macd(close, window_slow=26, window_fast=12)),
+        'macd_signal': (Node('macd_signal', fast=12, slow=26, signal=9), None,
+                        ta.trend.macd_signal(close, window_slow=26, window_fast=12, window_sign=9)),
+    }
+
+
+INDICATORS = ['ema', 'sma', 'rsi', 'atr', 'adx', 'di_plus', 'di_minus',
+              'bb_upper', 'bb_middle', 'bb_lower', 'macd', 'macd_signal']
+
+
+@pytest.mark.parametrize('backend', ['ta', 'numpy'])
+@pytest.mark.parametrize('name', INDICATORS)
+def test_backend_matches_ta(candles, backend, name):
+    node, key, reference = _references(candles)[name]
+    values = IndicatorGraph(candles, backend).get(node)
+    values = np.asarray(values[key] if key else values, dtype=np.float64)
+    reference = reference.to_numpy(dtype=np.float64)
+
+    # Same warm-up rows
+    np.testing.assert_array_equal(np.isnan(values), np.isnan(reference))
+    valid = ~np.isnan(reference)
+    assert valid.sum() > len(reference) // 2
+    scale = np.max(np.abs(reference[valid]))
+    error = np.max(np.abs(values[valid] - reference[valid])) / scale
+    assert error <= TOLERANCE[backend], f"{name} on {backend}: scaled error {error:.1e}"
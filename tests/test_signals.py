@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import make_klines
+from modules.strategies import SIGNAL_LABELS, get_strategy
+
+
+def _condition_signal(strategy, window):
+    """Market condition stage of evaluate_signal for the last row of `window`"""
+    condition = window.iloc[-1]['market_condition']
+    if condition in ('EXTREME_BULLISH', 'EXTREME_BEARISH'):
+        return strategy.get_extreme_market_signal(window)
+    if condition == 'BULLISH':
+        return strategy.get_bullish_signal(window)
+    if condition == 'BEARISH':
+        return strategy.get_bearish_signal(window)
+    if condition == 'SIDEWAYS':
+        return strategy.get_sideways_signal(window)
+    return None
+
+
+@pytest.mark.parametrize('strategy_name', ['LayerDynamicGrid', 'AvaxDynamicGrid'])
+def test_generate_signals_matches_row_stages(strategy_name):
+    strategy = get_strategy(strategy_name)
+    df = strategy.calculate_indicators(make_klines(500, seed=5))
+    signals = strategy.generate_signals(df)
+
+    stages = {
+        'reversal_signal': strategy.get_v_reversal_signal,
+        'squeeze_signal': strategy.get_squeeze_breakout_signal,
+        'multi_signal': strategy.get_multi_indicator_signal,
+        'condition_signal': lambda window: _condition_signal(strategy, window),
+    }
+    fired = 0
+    for i in range(strategy.trend_ema_slow + 4, len(df)):
+        window = df.iloc[:i + 1]
+        # Fibonacci levels are set per history by add_indicators
+        strategy.calculate_fibonacci_levels(window)
+        for column, stage in stages.items():
+            expected = stage(window)
+            assert SIGNAL_LABELS[int(signals[column].iloc[i])] == expected, (column, i)
+            fired += expected is not None
+    assert fired, "no stage fired, the comparison would prove nothing"
+
+
+@pytest.mark.parametrize('strategy_name', ['LayerDynamicGrid', 'AvaxDynamicGrid'])
+def test_resolve_signal_matches_evaluate_signal(strategy_name):
+    row_wise = get_strategy(strategy_name)
+    vectorized = get_strategy(strategy_name)
+    df = vectorized.calculate_indicators(make_klines(500, seed=5))
+    signals = vectorized.generate_signals(df)
+    lookback = vectorized.signal_lookback
+
+    emitted = 0
+    for i in range(30, len(df)):
+        history = df.iloc[:i + 1]
+        row_wise.calculate_fibonacci_levels(history)
+        expected = row_wise.evaluate_signal(history)
+        actual = vectorized.resolve_signal(
+            df.iloc[max(0, i - lookback + 1):i + 1], signals['signal'].iloc[i],
+            signals['needs_grid'].iloc[i], signals['evaluable'].iloc[i]
+        )
+        assert actual == expected, i
+        emitted += expected is not None
+    assert emitted, "no signals, the comparison would prove nothing"
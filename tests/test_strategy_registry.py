@@ -0,0 +1,31 @@
+from modules import config
+from modules.strategies import (
+    STRATEGY_REGISTRY, SYMBOL_STRATEGIES, LayerDynamicGridStrategy, StrategyPool,
+    TradingStrategy, get_strategy_for_symbol, register_strategy
+)
+
+
+def test_symbol_strategy_uses_registry(monkeypatch):
+    monkeypatch.setitem(SYMBOL_STRATEGIES, 'TESTUSDT', 'TestGrid')
+    register_strategy('TestGrid', lambda **params: LayerDynamicGridStrategy(grid_levels=7, **params))
+    try:
+        strategy = get_strategy_for_symbol('TESTUSDT')
+        assert isinstance(strategy, LayerDynamicGridStrategy)
+        assert strategy.grid_levels == 7
+        assert get_strategy_for_symbol('TESTUSDT') is not strategy
+    finally:
+        del STRATEGY_REGISTRY['TestGrid']
+    assert isinstance(get_strategy_for_symbol('NOSUCHUSDT'), TradingStrategy)
+
+
+def test_symbol_strategy_matches_pool_parameters():
+    pooled = StrategyPool().acquire('LAYERUSDT')
+    fresh = get_strategy_for_symbol('LAYERUSDT')
+    assert type(fresh) is type(pooled)
+    assert fresh.indicator_params == pooled.indicator_params
+    assert fresh.grid_levels == pooled.grid_levels == config.LAYER_GRID_LEVELS
+
+
+def test_config_changes_reach_new_strategies(monkeypatch):
+    monkeypatch.setattr(config, 'LAYER_GRID_LEVELS', config.LAYER_GRID_LEVELS + 3)
+    assert get_strategy_for_symbol('LAYERUSDT').grid_levels == config.LAYER_GRID_LEVELS
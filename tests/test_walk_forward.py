@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from modules.config import BACKTEST_INITIAL_BALANCE
+from modules.sweep import WalkForward
+
+
+def capped_record(raw_final, capped_final):
+    """Out-of-sample record whose equity curve ends above its reality-checked final_balance"""
+    return {
+        'status': 'ok', 'params': {}, 'total_return': (capped_final / BACKTEST_INITIAL_BALANCE - 1) * 100,
+        'max_drawdown': 1.0, 'sharpe_ratio': 1.0, 'total_trades': 10, 'win_rate': 50.0,
+        'final_balance': capped_final,
+        'equity_curve': [['2024-01-01', BACKTEST_INITIAL_BALANCE], ['2024-01-02', raw_final]]
+    }
+
+
+def test_stitch_compounds_capped_window_returns():
+    walk_forward = WalkForward('LayerDynamicGrid', [{}], 'TESTUSDT', '15m', 10, 5, output_dir='unused')
+    day = pd.Timedelta(days=5)
+    start = pd.Timestamp('2024-01-01')
+    windows = [(start, start + day, start + 2 * day), (start + day, start + 2 * day, start + 3 * day)]
+    best = [{'params': {}, 'sharpe_ratio': 1.0}] * 2
+    out_of_sample = [capped_record(BACKTEST_INITIAL_BALANCE * 1000, BACKTEST_INITIAL_BALANCE * 2)] * 2
+
+    results = walk_forward._stitch(windows, best, out_of_sample)
+
+    assert results['final_balance'] == pytest.approx(BACKTEST_INITIAL_BALANCE * 4)
+    assert results['total_return'] == pytest.approx(300.0)
+    assert results['equity_curve'][-1]['equity'] == pytest.approx(results['final_balance'])
+    assert max(point['equity'] for point in results['equity_curve']) == pytest.approx(results['final_balance'])